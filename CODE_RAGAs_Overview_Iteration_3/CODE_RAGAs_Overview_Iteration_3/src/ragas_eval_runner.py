@@ -0,0 +1,317 @@
+"""Incremental RAGAS evaluation over a file of (question, answer, contexts) rows.
+
+ragas_intro.py scores a hard-coded dict in one evaluate() call and repeats
+every LLM judgment on each run. This runner streams rows from a JSONL or
+CSV file, scores each (row, metric) pair concurrently with a bounded
+number of judge calls in flight, and memoizes every score on disk under
+(metric, row hash, judge model). Reruns only call the judge for rows that
+are new or changed. Each row is appended to the export CSV as soon as all
+of its metrics are scored. A run always rewrites the export from the
+start; after an interruption, rerunning refills it from the memo without
+repeating the judge calls already made.
+
+Rows use ragas_intro.py's keys (question, answer, contexts, ground_truth)
+or the column names of its exported CSV (user_input, response,
+retrieved_contexts, reference).
+
+    python .\\src\\ragas_eval_runner.py .\\data\\intro_samples.jsonl
+    python .\\src\\ragas_eval_runner.py .\\data\\intro_samples.jsonl --judge stub
+"""
+import argparse
+import ast
+import asyncio
+import copy
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, Iterator, List, Optional
+
+METRIC_NAMES = ['faithfulness', 'answer_relevancy', 'context_precision', 'context_recall']
+ROW_COLUMNS = ['user_input', 'retrieved_contexts', 'response', 'reference']
+
+# Alternative column names mapped onto the keys ragas 0.1 metrics expect
+_ALIASES = {
+    'question': 'question', 'user_input': 'question',
+    'answer': 'answer', 'response': 'answer',
+    'contexts': 'contexts', 'retrieved_contexts': 'contexts',
+    'ground_truth': 'ground_truth', 'reference': 'ground_truth',
+}
+
+
+def normalize_row(raw: Dict) -> Dict:
+    """Map a raw record onto question/answer/contexts/ground_truth."""
+    row = {'question': '', 'answer': '', 'contexts': [], 'ground_truth': ''}
+    for key, value in raw.items():
+        if key in _ALIASES and value is not None:
+            row[_ALIASES[key]] = value
+    contexts = row['contexts']
+    if isinstance(contexts, str):
+        # CSV exports store the context list as its Python repr
+        try:
+            contexts = ast.literal_eval(contexts)
+        except (ValueError, SyntaxError):
+            contexts = [contexts]
+    row['contexts'] = [str(context) for context in contexts]
+    return row
+
+
+def row_hash(row: Dict) -> str:
+    """Stable hash of everything a judge sees for one row."""
+    payload = json.dumps([row['question'], row['answer'], row['contexts'], row['ground_truth']],
+                         ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def iter_rows(path: str) -> Iterator[Dict]:
+    """Stream normalized rows from a .jsonl or .csv file without reading it all."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.csv'):
+            for raw in csv.DictReader(f):
+                yield normalize_row(raw)
+        else:
+            for line in f:
+                if line.strip():
+                    yield normalize_row(json.loads(line))
+
+
+class ScoreMemo:
+    """On-disk memo of metric scores keyed by (metric, row hash, judge model)."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " metric TEXT NOT NULL, row_hash TEXT NOT NULL, judge_model TEXT NOT NULL,"
+            " score REAL, scored_at REAL NOT NULL,"
+            " PRIMARY KEY (metric, row_hash, judge_model))"
+        )
+        self.conn.commit()
+
+    def get(self, metric: str, digest: str, judge_model: str) -> Optional[float]:
+        found = self.conn.execute(
+            "SELECT score FROM scores WHERE metric = ? AND row_hash = ? AND judge_model = ?",
+            (metric, digest, judge_model)
+        ).fetchone()
+        return None if found is None else found[0]
+
+    def put(self, metric: str, digest: str, judge_model: str, score: float) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)",
+            (metric, digest, judge_model, score, time.time())
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class RagasJudge:
+    """Scores single rows with ragas 0.1 metrics and a LangChain chat model as judge."""
+
+    def __init__(self, llm=None, embeddings=None, model_name: str = 'gpt-3.5-turbo', metric_names=None):
+        from ragas.embeddings import LangchainEmbeddingsWrapper
+        from ragas.llms import LangchainLLMWrapper
+        from ragas.run_config import RunConfig
+        from ragas import metrics as ragas_metrics
+
+        if llm is None:
+            from langchain_openai import ChatOpenAI
+            llm = ChatOpenAI(model=model_name)
+        if embeddings is None:
+            from langchain_openai import OpenAIEmbeddings
+            embeddings = OpenAIEmbeddings()
+
+        self.model_name = model_name
+        self.metrics = {}
+        for name in metric_names or METRIC_NAMES:
+            # Copies, so the module-level metric objects keep their own judge
+            metric = copy.copy(getattr(ragas_metrics, name))
+            metric.llm = LangchainLLMWrapper(llm)
+            if hasattr(metric, 'embeddings'):
+                metric.embeddings = LangchainEmbeddingsWrapper(embeddings)
+            metric.init(RunConfig())
+            self.metrics[name] = metric
+
+    async def score(self, metric_name: str, row: Dict) -> float:
+        return float(await self.metrics[metric_name].ascore(row))
+
+
+def _tokens(text: str) -> set:
+    return set(re.findall(r'\w+', text.lower()))
+
+
+def _overlap(part: str, whole: str) -> float:
+    tokens = _tokens(part)
+    return len(tokens & _tokens(whole)) / len(tokens) if tokens else 0.0
+
+
+class StubJudge:
+    """Deterministic offline judge for tests: token overlap instead of LLM calls.
+
+    ``delay`` simulates judge latency and ``calls`` counts how many scores
+    were actually requested, so memoization and concurrency can be checked.
+    """
+
+    def __init__(self, model_name: str = 'stub', delay: float = 0.0):
+        self.model_name = model_name
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def score(self, metric_name: str, row: Dict) -> float:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            contexts = ' '.join(row['contexts'])
+            if metric_name == 'faithfulness':
+                return _overlap(row['answer'], contexts)
+            if metric_name == 'answer_relevancy':
+                return _overlap(row['question'], row['answer'])
+            if metric_name == 'context_precision':
+                return _overlap(contexts, row['ground_truth'])
+            if metric_name == 'context_recall':
+                return _overlap(row['ground_truth'], contexts)
+            raise ValueError(f"Unknown metric: {metric_name}")
+        finally:
+            self.in_flight -= 1
+
+
+class CsvExporter:
+    """Appends scored rows to a CSV file, flushing after every row.
+
+    The file is truncated when opened: every run writes the full export,
+    and rows scored by an earlier, interrupted run are rewritten from the
+    score memo.
+    """
+
+    def __init__(self, path: str, metric_names: List[str]):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(['row'] + ROW_COLUMNS + metric_names + ['row_hash'])
+        self.metric_names = metric_names
+
+    def write(self, index: int, row: Dict, scores: Dict[str, Optional[float]], digest: str) -> None:
+        self.writer.writerow([index, row['question'], repr(row['contexts']), row['answer'], row['ground_truth']]
+                             + ['' if scores[name] is None else scores[name] for name in self.metric_names]
+                             + [digest])
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+async def evaluate_file(rows, judge, memo: ScoreMemo, exporter: CsvExporter,
+                        metric_names: List[str] = None, max_concurrency: int = 8,
+                        max_pending_rows: int = 64) -> Dict[str, int]:
+    """Score every row and export it; returns counts of judged, memoized and failed scores.
+
+    At most ``max_concurrency`` judge calls run at once, from as many row
+    workers, and rows are read ahead in a queue of ``max_pending_rows``, so
+    memory stays flat however large the input is. Failed scores are left
+    empty in the CSV and are not memoized, so the next run retries them.
+    Any other error, such as a failed export write or an unreadable input
+    row, cancels the run and is raised.
+    """
+    metric_names = metric_names or METRIC_NAMES
+    semaphore = asyncio.Semaphore(max_concurrency)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending_rows)
+    counts = {'rows': 0, 'judged': 0, 'memoized': 0, 'failed': 0}
+
+    async def score_metric(name: str, row: Dict, digest: str) -> Optional[float]:
+        cached = memo.get(name, digest, judge.model_name)
+        if cached is not None:
+            counts['memoized'] += 1
+            return cached
+        async with semaphore:
+            try:
+                value = await judge.score(name, row)
+            except Exception as e:
+                print(f"Error scoring {name} for row {digest[:12]}: {str(e)}")
+                counts['failed'] += 1
+                return None
+        memo.put(name, digest, judge.model_name, value)
+        counts['judged'] += 1
+        return value
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            index, row = item
+            digest = row_hash(row)
+            values = await asyncio.gather(*(score_metric(name, row, digest) for name in metric_names))
+            exporter.write(index, row, dict(zip(metric_names, values)), digest)
+            counts['rows'] += 1
+
+    async def produce():
+        for item in enumerate(rows):
+            await queue.put(item)
+        for _ in workers:
+            await queue.put(None)
+
+    # One row per allowed judge call keeps the semaphore busy even when some metrics come from the memo
+    workers = [asyncio.create_task(worker()) for _ in range(max_concurrency)]
+    tasks = workers + [asyncio.create_task(produce())]
+    try:
+        # A worker that dies (e.g. the export file cannot be written) would otherwise
+        # leave the producer blocked on the full queue; stop the whole run instead
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('input', help=".jsonl or .csv file of rows to score")
+    parser.add_argument('--output', default=os.path.join('export', 'ragas_eval_scores.csv'))
+    parser.add_argument('--memo', default=os.path.join('export', 'ragas_score_memo.sqlite'))
+    parser.add_argument('--judge', choices=['openai', 'stub'], default='openai')
+    parser.add_argument('--model', default='gpt-3.5-turbo', help="judge model name")
+    parser.add_argument('--metrics', nargs='+', default=METRIC_NAMES, choices=METRIC_NAMES)
+    parser.add_argument('--concurrency', type=int, default=8, help="judge calls in flight at once")
+    args = parser.parse_args()
+
+    if args.judge == 'stub':
+        judge = StubJudge()
+    else:
+        # set up openai api key, as in ragas_intro.py
+        with open(os.path.join('configs', 'secrets', 'secrets.json'), 'r') as f:
+            os.environ["OPENAI_API_KEY"] = json.load(f)['OPENAI_API_KEY']
+        judge = RagasJudge(model_name=args.model, metric_names=args.metrics)
+
+    memo = ScoreMemo(args.memo)
+    exporter = CsvExporter(args.output, args.metrics)
+    start = time.perf_counter()
+    try:
+        counts = asyncio.run(evaluate_file(iter_rows(args.input), judge, memo, exporter,
+                                           args.metrics, args.concurrency))
+    finally:
+        exporter.close()
+        memo.close()
+    print(f"Scored {counts['rows']} rows in {time.perf_counter() - start:.1f}s: "
+          f"{counts['judged']} judge calls, {counts['memoized']} from memo, {counts['failed']} failed")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
+
+#  command to run the code
+#  python .\src\ragas_eval_runner.py .\data\intro_samples.jsonl
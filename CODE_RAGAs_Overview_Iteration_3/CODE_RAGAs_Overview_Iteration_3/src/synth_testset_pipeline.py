@@ -0,0 +1,276 @@
+"""Streaming, resumable synthetic testset generation over large document sets.
+
+demo_synth_test_data_gen.py loads every page up front and writes its CSV
+only if one generate_with_langchain_docs() call over all of them succeeds.
+This pipeline instead reads the source files lazily, cuts them into
+shards of a few chunks each, and generates a batch of test items per
+shard, several batches in parallel. Every finished batch is appended to
+the export CSV and recorded in a manifest next to it. After a crash the
+same command skips the recorded batches and continues with the rest.
+
+    python .\\src\\synth_testset_pipeline.py .\\data\\sample.txt --items-per-shard 2
+    python .\\src\\synth_testset_pipeline.py .\\data\\sample.txt --generator stub
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Set
+
+from langchain_core.documents import Document
+
+COLUMNS = ['batch_id', 'question', 'contexts', 'ground_truth', 'evolution_type', 'metadata']
+
+# Same question type mix as demo_synth_test_data_gen.py
+DISTRIBUTIONS = {'simple': 0.3, 'multi_context': 0.2, 'reasoning': 0.5}
+
+
+class Shard(NamedTuple):
+    index: int
+    batch_id: str
+    documents: List[Document]
+
+
+def iter_chunks(paths: Iterable[str], chunk_chars: int = 4000) -> Iterator[Document]:
+    """Read files line by line and yield paragraph-aligned chunks of about ``chunk_chars``."""
+    for path in paths:
+        buffer: List[str] = []
+        size = 0
+        chunk = 0
+        with open(path, 'r', encoding='UTF-8') as f:
+            for line in f:
+                buffer.append(line)
+                size += len(line)
+                if size >= chunk_chars and not line.strip():
+                    yield Document(page_content=''.join(buffer).strip(), metadata={'source': path, 'chunk': chunk})
+                    buffer, size, chunk = [], 0, chunk + 1
+        if ''.join(buffer).strip():
+            yield Document(page_content=''.join(buffer).strip(), metadata={'source': path, 'chunk': chunk})
+
+
+def iter_shards(chunks: Iterable[Document], shard_docs: int, items_per_shard: int,
+                settings: str = '') -> Iterator[Shard]:
+    """Group chunks into shards whose ids depend only on their content and the generation settings."""
+    batch: List[Document] = []
+    index = 0
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) == shard_docs:
+            yield _shard(index, batch, items_per_shard, settings)
+            batch, index = [], index + 1
+    if batch:
+        yield _shard(index, batch, items_per_shard, settings)
+
+
+def _shard(index: int, documents: List[Document], items: int, settings: str) -> Shard:
+    digest = hashlib.sha256(f"{items}\0{settings}".encode('utf-8'))
+    for doc in documents:
+        digest.update(b'\0' + doc.page_content.encode('utf-8'))
+    return Shard(index, f"{index:06d}-{digest.hexdigest()[:16]}", documents)
+
+
+class RagasBatchGenerator:
+    """Generates test items for one shard with ragas' TestsetGenerator, as in the demo script.
+
+    A TestsetGenerator keeps every document it is given in its docstore, so
+    each batch gets a fresh one: shards stay independent of each other, and
+    batches generated on parallel threads never share one. Only the
+    LangChain model clients are reused.
+    """
+
+    def __init__(self, model_name: str = "gpt-3.5-turbo", distributions: Dict[str, float] = None):
+        from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+        from ragas.testset.evolutions import multi_context, reasoning, simple
+
+        self.model_name = model_name
+        self.generator_llm = ChatOpenAI(model=model_name)
+        self.critic_llm = ChatOpenAI(model=model_name)
+        self.embeddings = OpenAIEmbeddings()
+        evolutions = {'simple': simple, 'multi_context': multi_context, 'reasoning': reasoning}
+        self.distributions = {evolutions[name]: share for name, share in (distributions or DISTRIBUTIONS).items()}
+
+    def generate(self, documents: List[Document], test_size: int) -> List[Dict]:
+        from ragas.testset.generator import TestsetGenerator
+
+        generator = TestsetGenerator.from_langchain(self.generator_llm, self.critic_llm, self.embeddings)
+        testset = generator.generate_with_langchain_docs(
+            documents, test_size, self.distributions, with_debugging_logs=False, raise_exceptions=True
+        )
+        return testset.to_pandas().to_dict('records')
+
+
+class StubBatchGenerator:
+    """Offline stand-in that builds questions from document sentences, for trying the pipeline."""
+
+    def __init__(self, delay: float = 0.0, model_name: str = 'stub'):
+        self.delay = delay
+        self.model_name = model_name
+
+    def generate(self, documents: List[Document], test_size: int) -> List[Dict]:
+        if self.delay:
+            time.sleep(self.delay)
+        rng = random.Random(documents[0].page_content)
+        records = []
+        for _ in range(test_size):
+            doc = rng.choice(documents)
+            sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', doc.page_content) if len(s.split()) > 4]
+            sentence = rng.choice(sentences or [doc.page_content[:200]])
+            subject = ' '.join(sentence.split()[:4])
+            records.append({'question': f"What does the text say about '{subject}'?", 'contexts': [sentence],
+                            'ground_truth': sentence, 'evolution_type': 'simple', 'metadata': [doc.metadata]})
+        return records
+
+
+class CheckpointedCsv:
+    """Export CSV plus a manifest of completed batches, so a run can be resumed.
+
+    A batch's rows are appended and fsynced before its manifest line is
+    written, and the manifest records the CSV size after the batch. On
+    reopen the CSV is truncated to the last recorded size, dropping the
+    rows of a batch whose manifest line never made it to disk.
+    """
+
+    def __init__(self, path: str, fresh: bool = False):
+        self.path = path
+        self.manifest_path = f"{path}.batches.jsonl"
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if fresh:
+            for stale in (path, self.manifest_path):
+                if os.path.exists(stale):
+                    os.remove(stale)
+
+        self.completed: Set[str] = set()
+        self.rows = 0
+        end = 0
+        if os.path.exists(self.manifest_path):
+            valid = 0
+            with open(self.manifest_path, 'r+b') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # torn last line from a crash
+                    self.completed.add(entry['batch_id'])
+                    self.rows += entry['rows']
+                    end = entry['csv_bytes']
+                    valid += len(line)
+                f.truncate(valid)
+
+        if self.completed and os.path.exists(path):
+            with open(path, 'r+b') as f:
+                f.truncate(end)
+        else:
+            self.completed, self.rows = set(), 0
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                csv.writer(f).writerow(COLUMNS)
+            open(self.manifest_path, 'w').close()
+
+    def append(self, batch_id: str, records: List[Dict]) -> None:
+        with open(self.path, 'a', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            for record in records:
+                writer.writerow([batch_id] + [_cell(record.get(column, '')) for column in COLUMNS[1:]])
+            f.flush()
+            os.fsync(f.fileno())
+            end = f.tell()
+        with open(self.manifest_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'batch_id': batch_id, 'rows': len(records), 'csv_bytes': end}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.completed.add(batch_id)
+        self.rows += len(records)
+
+
+def _cell(value):
+    return value if isinstance(value, (str, int, float)) else json.dumps(value, ensure_ascii=False, default=str)
+
+
+def run_pipeline(shards: Iterable[Shard], generator, export: CheckpointedCsv, items_per_shard: int,
+                 workers: int = 4, retries: int = 1) -> Dict[str, int]:
+    """Generate every shard not yet in ``export``; returns batch counts.
+
+    Shards are pulled from the iterator only as workers free up, so at most
+    ``2 * workers`` shards are held in memory. A batch that still fails
+    after ``retries`` extra attempts is skipped and left for the next run.
+    """
+    counts = {'generated': 0, 'skipped': 0, 'failed': 0}
+
+    def attempt(shard: Shard) -> List[Dict]:
+        for tries in range(retries + 1):
+            try:
+                return generator.generate(shard.documents, items_per_shard)
+            except Exception as e:
+                print(f"Batch {shard.batch_id} failed (attempt {tries + 1}): {str(e)}")
+        raise RuntimeError(f"Batch {shard.batch_id} failed after {retries + 1} attempts")
+
+    shards = iter(shards)
+    pending = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            while len(pending) < 2 * workers:
+                shard = next(shards, None)
+                if shard is None:
+                    break
+                if shard.batch_id in export.completed:
+                    counts['skipped'] += 1
+                    continue
+                pending[executor.submit(attempt, shard)] = shard
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                shard = pending.pop(future)
+                try:
+                    records = future.result()
+                except RuntimeError:
+                    counts['failed'] += 1
+                    continue
+                # Only this thread writes, so batches land in the file one at a time
+                export.append(shard.batch_id, records)
+                counts['generated'] += 1
+                print(f"Checkpointed batch {shard.batch_id}: {len(records)} items ({export.rows} total)")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+', help="text files to generate test items from")
+    parser.add_argument('--output', default=os.path.join('export', 'synthetic_data_test_set.csv'))
+    parser.add_argument('--generator', choices=['openai', 'stub'], default='openai')
+    parser.add_argument('--model', default='gpt-3.5-turbo')
+    parser.add_argument('--chunk-chars', type=int, default=4000)
+    parser.add_argument('--shard-docs', type=int, default=4, help="chunks per generation batch")
+    parser.add_argument('--items-per-shard', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4, help="batches generated in parallel")
+    parser.add_argument('--fresh', action='store_true', help="discard the previous run instead of resuming")
+    args = parser.parse_args()
+
+    if args.generator == 'stub':
+        generator = StubBatchGenerator()
+    else:
+        # Open and read the OPENAI_API_KEY, as in demo_synth_test_data_gen.py
+        with open(os.path.join('configs', 'secrets', 'secrets.json'), 'r') as file:
+            os.environ["OPENAI_API_KEY"] = json.load(file)['OPENAI_API_KEY']
+        generator = RagasBatchGenerator(args.model)
+
+    export = CheckpointedCsv(args.output, fresh=args.fresh)
+    if export.completed:
+        print(f"Resuming: {len(export.completed)} batches ({export.rows} items) already in {args.output}")
+    settings = json.dumps([generator.model_name, DISTRIBUTIONS, args.chunk_chars])
+    shards = iter_shards(iter_chunks(args.paths, args.chunk_chars), args.shard_docs, args.items_per_shard, settings)
+    counts = run_pipeline(shards, generator, export, args.items_per_shard, args.workers)
+    print(f"Generated {counts['generated']} batches, skipped {counts['skipped']} finished, "
+          f"{counts['failed']} failed; {export.rows} items in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
+
+#  command to run the code
+#  python .\src\synth_testset_pipeline.py .\data\sample.txt
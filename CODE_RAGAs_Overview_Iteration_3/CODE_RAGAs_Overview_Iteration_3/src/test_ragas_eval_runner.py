@@ -0,0 +1,90 @@
+import asyncio
+import csv
+
+import pytest
+
+from ragas_eval_runner import METRIC_NAMES, CsvExporter, ScoreMemo, StubJudge, evaluate_file
+
+
+def make_rows(count):
+    return [{'question': f"What is the capital of country {i}?", 'answer': f"City {i} is the capital.",
+             'contexts': [f"City {i} is the capital of country {i}."], 'ground_truth': f"City {i}"}
+            for i in range(count)]
+
+
+class FlakyJudge(StubJudge):
+    """Fails every faithfulness score, like a judge call that times out."""
+
+    async def score(self, metric_name, row):
+        if metric_name == 'faithfulness':
+            raise TimeoutError("judge timed out")
+        return await super().score(metric_name, row)
+
+
+class FailingExporter(CsvExporter):
+    def write(self, index, row, scores, digest):
+        if index == 3:
+            raise OSError("No space left on device")
+        super().write(index, row, scores, digest)
+
+
+def run(tmp_path, rows, judge, exporter_class=CsvExporter, name='scores.csv', **kwargs):
+    memo = ScoreMemo(str(tmp_path / 'memo.sqlite'))
+    exporter = exporter_class(str(tmp_path / name), METRIC_NAMES)
+    try:
+        return asyncio.run(asyncio.wait_for(evaluate_file(rows, judge, memo, exporter, **kwargs), timeout=10))
+    finally:
+        exporter.close()
+        memo.close()
+
+
+def read_export(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_rerun_is_served_from_the_memo(tmp_path):
+    rows = make_rows(10)
+    first = run(tmp_path, rows, StubJudge(), name='first.csv')
+    judge = StubJudge()
+    second = run(tmp_path, rows, judge, name='second.csv')
+
+    assert first == {'rows': 10, 'judged': 40, 'memoized': 0, 'failed': 0}
+    assert second == {'rows': 10, 'judged': 0, 'memoized': 40, 'failed': 0}
+    assert judge.calls == 0
+    assert read_export(tmp_path / 'first.csv') == read_export(tmp_path / 'second.csv')
+
+
+def test_failed_score_is_left_empty_and_retried(tmp_path):
+    rows = make_rows(5)
+    first = run(tmp_path, rows, FlakyJudge(), name='first.csv')
+    judge = StubJudge()
+    second = run(tmp_path, rows, judge, name='second.csv')
+
+    assert first['failed'] == 5 and first['rows'] == 5
+    assert all(row['faithfulness'] == '' and row['answer_relevancy'] != '' for row in read_export(tmp_path / 'first.csv'))
+    # Only the failed scores go back to the judge
+    assert judge.calls == 5
+    assert second == {'rows': 5, 'judged': 5, 'memoized': 15, 'failed': 0}
+    assert all(row['faithfulness'] != '' for row in read_export(tmp_path / 'second.csv'))
+
+
+def test_judge_calls_are_bounded_by_max_concurrency(tmp_path):
+    judge = StubJudge(delay=0.01)
+    run(tmp_path, make_rows(20), judge, max_concurrency=3)
+    assert judge.max_in_flight == 3
+    assert judge.calls == 80
+
+
+def test_worker_failure_cancels_the_run(tmp_path):
+    read = []
+
+    def rows():
+        for row in make_rows(1000):
+            read.append(row)
+            yield row
+
+    with pytest.raises(OSError, match="No space left"):
+        run(tmp_path, rows(), StubJudge(), FailingExporter, max_concurrency=2, max_pending_rows=4)
+    # The producer stopped with the workers instead of reading the whole input
+    assert len(read) < 1000
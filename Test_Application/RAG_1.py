@@ -1,15 +1,32 @@
-from flask import Flask, render_template, request, jsonify
-from langchain.document_loaders import TextLoader
-from langchain.text_splitter import CharacterTextSplitter
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from langchain.embeddings import OpenAIEmbeddings
 from langchain.vectorstores import FAISS
 from langchain.chains import RetrievalQA
 from langchain.llms import OpenAI
+from langchain.schema import Document
+import asyncio
 import os
-import json
 from datetime import datetime, timedelta
+from itertools import islice
 from gmat_scraper import GmatScraper
+from page_cache import PageCache
+from question_store import open_question_store
+from near_dedup import NearDuplicateIndex
+from embedding_cache import CachedEmbeddings
+from answer_cache import AnswerCache
+from streaming import format_sse, stream_chain
+from query_batcher import QueryBatcher
+from hybrid_retriever import BM25Index, HybridRetriever
+from two_stage_retriever import CrossEncoderReranker, TwoStageRetriever
+from reranker import PairBatcher, load_cross_encoder
+from tracing import TraceCallbackHandler, metrics, trace_request
+from index_refresh import InterProcessLock, SnapshotHolder, RefreshScheduler
+from metadata_index import FILTER_FIELDS, MetadataIndex
+from ann_index import IndexSpec, apply_search_params, reindex_vectorstore
+from vector_store import (compute_fingerprint, save_vectorstore, saved_fingerprint, load_vectorstore,
+                          clone_vectorstore, empty_vectorstore)
 import threading
+import time
 import logging
 
 app = Flask(__name__)
@@ -20,141 +37,403 @@ os.environ["OPENAI_API_KEY"] = "sk-proj-E3fanyreH5cRomXbuFsJaznmIpGVZ2nLedQHZC2j
 # Global variables
 last_scrape_time = None
 scrape_interval = timedelta(hours=24)  # Scrape new questions every 24 hours
-qa_system = None
+# The live vector store, metadata index and QA chain, swapped together as one snapshot
+index_holder = SnapshotHolder()
+index_dir = 'gmat_questions_index'  # Persisted FAISS index, memory-mapped on startup
+# Serializes index builds and saves across threads and across gunicorn worker processes
+index_build_lock = InterProcessLock(f"{index_dir}.lock")
+# Seconds between checks for an index saved by another worker process
+index_reload_interval = 5.0
+embedder = None
+answer_cache = None
+# Concurrent /ask queries share embedding calls and FAISS searches through this coalescer
+query_batcher = QueryBatcher(max_batch_size=32, max_wait=0.005)
+# Cross-encoder used to rerank retrieved candidates; None keeps hybrid retrieval only
+rerank_model_name = None  # e.g. "cross-encoder/ms-marco-MiniLM-L-6-v2"
+rerank_candidates = 50
+reranker = None
+# FAISS index type: 'flat' (exact), 'ivf_flat', 'ivf_pq' or 'hnsw'; see bench_ann.py for the trade-offs
+index_spec = IndexSpec('flat')
 questions_lock = threading.Lock()
+question_store = open_question_store('gmat_questions.sqlite', legacy_json='gmat_questions.json')
+near_duplicates = None
+near_duplicate_threshold = 0.8  # Estimated Jaccard similarity above which a scraped question is a repeat
+# Requests carrying this header get a per-stage timing breakdown in the /ask response
+DEBUG_TIMING_HEADER = 'X-Debug-Timing'
 
-def load_questions():
-    """Load questions from the JSON file."""
-    try:
-        with open('gmat_questions.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+def load_questions(**filters):
+    """Stream questions from the question store, optionally filtered by category/difficulty."""
+    return question_store.iter_questions(**filters)
 
-def save_questions(questions):
-    """Save questions to the JSON file."""
-    with open('gmat_questions.json', 'w', encoding='utf-8') as f:
-        json.dump(questions, f, indent=2, ensure_ascii=False)
+def get_near_duplicate_index():
+    """Return the near-duplicate index, seeding it from the stored questions on first use."""
+    global near_duplicates
+    if near_duplicates is None:
+        index = NearDuplicateIndex(threshold=near_duplicate_threshold)
+        index.add_questions(question_store.iter_questions())
+        logging.info(f"Built near-duplicate index over {len(index)} questions")
+        near_duplicates = index
+    return near_duplicates
 
 def scrape_new_questions():
     """Scrape new questions and update the dataset."""
     global last_scrape_time
     
+    scraper = None
     try:
         logging.info("Starting to scrape new questions...")
-        scraper = GmatScraper(use_selenium=True)
-        scraper.scrape_all_sources()
+        scraper = GmatScraper(use_selenium=True, page_cache=PageCache('page_cache.sqlite'))
+        # Fetch every listing page concurrently, rendering only the ones that need a browser
+        asyncio.run(scraper.scrape_all_sources_async())
         
         with questions_lock:
-            # Load existing questions
-            existing_questions = load_questions()
-            
-            # Add new questions
-            new_questions = [q.__dict__ for q in scraper.questions]
-            
-            # Combine questions, avoiding duplicates based on question_text
-            existing_texts = {q['question_text'] for q in existing_questions}
-            unique_new_questions = [q for q in new_questions if q['question_text'] not in existing_texts]
-            
-            all_questions = existing_questions + unique_new_questions
-            
-            # Save updated questions
-            save_questions(all_questions)
+            # Drop near-duplicates of stored (or earlier scraped) questions, then insert the rest;
+            # exact repeats are also rejected by the store's unique hash index
+            scraped = [q.__dict__ for q in scraper.questions]
+            distinct = get_near_duplicate_index().add_questions(scraped)
+            logging.info(f"Skipped {len(scraped) - len(distinct)} near-duplicate questions")
+            unique_new_questions = question_store.add_questions(distinct)
+            # The scraped pages only count as seen once their questions are stored
+            scraper.page_cache.commit()
             
             # Update last scrape time
             last_scrape_time = datetime.now()
             
             logging.info(f"Added {len(unique_new_questions)} new questions to the dataset")
             
-            # Reinitialize QA system with updated dataset
-            initialize_qa_system()
+            # Extend the QA system with only the newly added questions
+            update_qa_system(unique_new_questions)
             
     except Exception as e:
         logging.error(f"Error during question scraping: {str(e)}")
     finally:
-        if scraper and scraper.driver:
-            scraper.driver.quit()
+        if scraper:
+            scraper.close()
+
+# Single-flight background scraping, also across worker processes; requests only ever trigger it without waiting
+scrape_scheduler = RefreshScheduler(scrape_new_questions, scrape_interval.total_seconds(), name='scrape',
+                                    lock_path='scrape.lock')
 
 def should_scrape():
     """Determine if it's time to scrape new questions."""
-    if last_scrape_time is None:
-        return True
-    return datetime.now() - last_scrape_time > scrape_interval
+    return scrape_scheduler.due()
 
-def questions_to_text(questions):
-    """Convert questions to a text format for the RAG system."""
-    text = []
-    for q in questions:
-        text.append(f"Question: {q['question_text']}\n")
-        text.append("Options:\n")
-        for i, opt in enumerate(q['options'], 1):
-            text.append(f"{i}. {opt}\n")
-        text.append(f"Correct Answer: {q['correct_answer']}\n")
-        text.append(f"Explanation: {q['explanation']}\n")
-        text.append(f"Category: {q['category']}\n")
-        text.append(f"Sub-category: {q['sub_category']}\n")
-        text.append(f"Difficulty: {q['difficulty']}\n")
-        text.append("-" * 80 + "\n")
+def question_to_text(q):
+    """Convert a single question to a text format for the RAG system."""
+    text = [f"Question: {q['question_text']}\n", "Options:\n"]
+    for i, opt in enumerate(q['options'], 1):
+        text.append(f"{i}. {opt}\n")
+    text.append(f"Correct Answer: {q['correct_answer']}\n")
+    text.append(f"Explanation: {q['explanation']}\n")
+    text.append(f"Category: {q['category']}\n")
+    text.append(f"Sub-category: {q['sub_category']}\n")
+    text.append(f"Difficulty: {q['difficulty']}\n")
     return "".join(text)
 
+def iter_question_documents(questions):
+    """Yield one Document per question, tagged with its classification metadata."""
+    for q in questions:
+        yield Document(
+            page_content=question_to_text(q),
+            metadata={
+                'category': q['category'],
+                'sub_category': q['sub_category'],
+                'difficulty': q['difficulty'],
+                'source_url': q.get('source_url', '')
+            }
+        )
+
+def get_embedder():
+    """Return the shared embedder, backed by the on-disk embedding cache."""
+    global embedder
+    if embedder is None:
+        embedder = CachedEmbeddings(OpenAIEmbeddings(), 'embedding_cache.sqlite')
+    return embedder
+
+def get_answer_cache():
+    """Return the shared answer cache, matching paraphrased queries by embedding."""
+    global answer_cache
+    if answer_cache is None:
+        answer_cache = AnswerCache(get_embedder(), similarity_threshold=0.95, ttl=3600, max_entries=1000)
+    return answer_cache
+
+def get_llm():
+    """The completion model; streaming so callbacks receive tokens as they are generated."""
+    return OpenAI(streaming=True)
+
+def get_reranker():
+    """Return the shared cross-encoder reranker, or None when reranking is disabled."""
+    global reranker
+    if reranker is None and rerank_model_name:
+        # ONNX on CPU, with pairs from concurrent requests scored in one call
+        model = PairBatcher(load_cross_encoder(rerank_model_name))
+        reranker = CrossEncoderReranker(model=model, max_candidates=rerank_candidates)
+    return reranker
+
+def build_retriever(store, bm25_index, allowed_positions=None):
+    """Hybrid BM25 + vector retrieval, reranked by a cross-encoder when one is configured.
+
+    With ``allowed_positions`` only those vectors (e.g. questions matching metadata filters) are searched.
+    """
+    cross_encoder = get_reranker()
+    if cross_encoder is None:
+        return HybridRetriever(vectorstore=store, bm25_index=bm25_index, batcher=query_batcher,
+                               allowed_positions=allowed_positions)
+    candidates = HybridRetriever(vectorstore=store, bm25_index=bm25_index, batcher=query_batcher,
+                                 allowed_positions=allowed_positions,
+                                 k=rerank_candidates, fetch_k=max(rerank_candidates, 20))
+    return TwoStageRetriever(first_stage=candidates, reranker=cross_encoder)
+
+def build_qa_system(store, bm25_index):
+    """Build a RetrievalQA chain over the configured retriever on a vector store."""
+    return RetrievalQA.from_chain_type(
+        llm=get_llm(),
+        chain_type="stuff",
+        retriever=build_retriever(store, bm25_index)
+    )
+
+def build_vectorstore(embeddings, batch_size=256):
+    """Embed all current questions into a new FAISS vector store, one batch at a time."""
+    documents = iter_question_documents(load_questions())
+    store = None
+    
+    while True:
+        batch = list(islice(documents, batch_size))
+        if not batch:
+            break
+        if store is None:
+            store = FAISS.from_documents(batch, embeddings)
+        else:
+            store.add_documents(batch)
+    
+    # No questions yet; start from an empty index so later updates can extend it
+    if store is None:
+        store = empty_vectorstore(embeddings)
+    
+    return store
+
+def index_fingerprint(embeddings, count):
+    """Fingerprint of the index built for the current questions, ``count`` vectors in all."""
+    return compute_fingerprint(question_store.revision(), embeddings.model_name, index_spec.key_for(count))
+
+def install_vectorstore(store, fingerprint):
+    """Build the side indexes and QA chain for a vector store and swap them in as one snapshot."""
+    bm25_index = BM25Index.from_vectorstore(store)
+    index_holder.swap(store, MetadataIndex.from_vectorstore(store), build_qa_system(store, bm25_index), bm25_index,
+                      fingerprint=fingerprint)
+    # Answers from the previous index may no longer be what it would return
+    get_answer_cache().clear()
+
 def initialize_qa_system():
     """Initialize or reinitialize the QA system with current questions."""
-    global qa_system
-    
     try:
-        # Load questions
-        questions = load_questions()
-        
-        # Convert questions to text format
-        questions_text = questions_to_text(questions)
-        
-        # Save to temporary file for TextLoader
-        with open('temp_questions.txt', 'w', encoding='utf-8') as f:
-            f.write(questions_text)
-        
-        # Initialize QA system components
-        loader = TextLoader('temp_questions.txt')
-        documents = loader.load()
-        
-        text_splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        texts = text_splitter.split_documents(documents)
-        
-        embeddings = OpenAIEmbeddings()
-        vectorstore = FAISS.from_documents(texts, embeddings)
-        
-        qa_system = RetrievalQA.from_chain_type(
-            llm=OpenAI(),
-            chain_type="stuff",
-            retriever=vectorstore.as_retriever()
-        )
-        
-        # Clean up temporary file
-        os.remove('temp_questions.txt')
+        with index_build_lock:
+            embeddings = get_embedder()
+            fingerprint = index_fingerprint(embeddings, len(question_store))
+            
+            # Reuse the persisted index when the questions have not changed since it was built
+            store = load_vectorstore(index_dir, embeddings, fingerprint)
+            if store is not None:
+                apply_search_params(store.index, index_spec)
+            else:
+                store = reindex_vectorstore(build_vectorstore(embeddings), index_spec, index_dir)
+                save_vectorstore(store, index_dir, fingerprint)
+                logging.info(f"Embedding cache stats: {embeddings.stats()}")
+            
+            # The new index was built off to the side; requests switch to it in one step
+            install_vectorstore(store, fingerprint)
         
     except Exception as e:
         logging.error(f"Error initializing QA system: {str(e)}")
         raise
 
+def reload_if_saved_elsewhere():
+    """Swap in the index another worker process saved, once it matches the question store."""
+    live = index_holder.current
+    saved = saved_fingerprint(index_dir)
+    if live is None or saved is None or saved == live.fingerprint:
+        return
+    with index_build_lock:
+        embeddings = get_embedder()
+        fingerprint = index_fingerprint(embeddings, len(question_store))
+        # Otherwise the process that added questions has not saved its index yet; check again later
+        if fingerprint != saved or fingerprint == index_holder.current.fingerprint:
+            return
+        store = load_vectorstore(index_dir, embeddings, fingerprint)
+        if store is not None:
+            apply_search_params(store.index, index_spec)
+            install_vectorstore(store, fingerprint)
+            logging.info("Loaded the index saved by another worker process")
+
+# Requests trigger this check in the background, at most once per interval
+index_reload_scheduler = RefreshScheduler(reload_if_saved_elsewhere, index_reload_interval, name='index-reload')
+
+def update_qa_system(new_questions):
+    """Embed only the new questions and atomically swap in the extended index."""
+    if not new_questions:
+        return
+    
+    with index_build_lock:
+        live = index_holder.current
+        
+        # Nothing to extend yet, so fall back to a full build
+        if live is None:
+            initialize_qa_system()
+            return
+        
+        try:
+            # Extend a copy so in-flight requests keep reading the live index
+            shadow = clone_vectorstore(live.vectorstore)
+            new_documents = list(iter_question_documents(new_questions))
+            shadow_metadata_index = live.metadata_index.copy()
+            shadow_metadata_index.extend(shadow.index.ntotal, [doc.metadata for doc in new_documents])
+            shadow_bm25_index = live.bm25_index.copy()
+            shadow_bm25_index.extend(shadow.index.ntotal, [doc.page_content for doc in new_documents])
+            shadow.add_documents(new_documents)
+            
+            # Crossing the training threshold moves the corpus off the exact index
+            if index_spec.key_for(shadow.index.ntotal) != index_spec.key_for(live.vectorstore.index.ntotal):
+                shadow = reindex_vectorstore(shadow, index_spec, index_dir)
+            
+            embeddings = get_embedder()
+            fingerprint = index_fingerprint(embeddings, shadow.index.ntotal)
+            save_vectorstore(shadow, index_dir, fingerprint)
+            
+            # Readers see either the old snapshot or the new one, never a mix
+            index_holder.swap(shadow, shadow_metadata_index, build_qa_system(shadow, shadow_bm25_index), shadow_bm25_index,
+                              fingerprint=fingerprint)
+            get_answer_cache().clear()
+            
+            logging.info(f"Indexed {len(new_questions)} new questions incrementally")
+            
+        except Exception as e:
+            logging.error(f"Error updating QA system: {str(e)}")
+            raise
+
+def get_qa_chain(filters, snapshot):
+    """Return the snapshot's QA chain, restricted to questions matching the metadata filters if any.
+
+    Filtered chains use the same hybrid retrieval and reranking, limited to the matching questions.
+    """
+    if not filters:
+        return snapshot.qa_system
+    retriever = build_retriever(snapshot.vectorstore, snapshot.bm25_index,
+                                allowed_positions=snapshot.metadata_index.lookup(**filters))
+    return RetrievalQA(
+        combine_documents_chain=snapshot.qa_system.combine_documents_chain,
+        retriever=retriever
+    )
+
 @app.route('/')
 def home():
     return render_template('index.html')
 
+def start_scrape_if_due():
+    """Kick off a background scrape when due, unless one is already running.
+
+    Also checks, in the background, whether another worker saved a newer index.
+    """
+    scrape_scheduler.trigger_if_due()
+    index_reload_scheduler.trigger_if_due()
+
+def request_filters(data):
+    """Optional filters, e.g. {"difficulty": "Hard", "sub_category": "Data Sufficiency"}."""
+    return {field: data[field] for field in FILTER_FIELDS if data.get(field)}
+
+def answer_events(question, filters, include_timing=False):
+    """Yield server-sent events: LLM tokens as they arrive, then the complete answer.
+
+    Traced like /ask; the request is counted in the metrics once the stream ends.
+    """
+    with trace_request('/ask/stream') as trace:
+        try:
+            cache = get_answer_cache()
+            generation = cache.generation
+            with trace.span('answer_cache_lookup'):
+                answer, query_vector = cache.lookup(question, filters)
+            if answer is None:
+                with index_holder.lease() as snapshot, trace.span('qa_chain'):
+                    start = time.perf_counter()
+                    chain = get_qa_chain(filters, snapshot)
+                    for event, data in stream_chain(chain, question, [TraceCallbackHandler(trace)]):
+                        if event == 'token':
+                            if start is not None:
+                                trace.add_span('first_token', start, time.perf_counter() - start)
+                                start = None
+                            yield format_sse('token', data)
+                        else:
+                            answer = data
+                cache.store(question, answer, filters, vector=query_vector, generation=generation)
+            else:
+                trace.cache_status = 'hit'
+            result = {'answer': answer, 'status': 'success'}
+        except Exception as e:
+            logging.error(f"Error streaming answer: {str(e)}")
+            trace.status = 'error'
+            result = {'answer': 'An error occurred while processing your question.', 'status': 'error'}
+        if include_timing:
+            result['timing'] = trace.to_dict()
+        yield format_sse('answer', result)
+
 @app.route('/ask', methods=['POST'])
 def ask_question():
     # Check if we should scrape new questions
-    if should_scrape():
-        threading.Thread(target=scrape_new_questions).start()
+    start_scrape_if_due()
     
     data = request.json
     question = data.get('question', '')
+    filters = request_filters(data)
     
-    try:
-        # Get response from QA system
-        response = qa_system.run(question)
-        return jsonify({'answer': response, 'status': 'success'})
-    except Exception as e:
-        logging.error(f"Error processing question: {str(e)}")
-        return jsonify({'answer': 'An error occurred while processing your question.', 'status': 'error'})
+    with trace_request('/ask') as trace:
+        try:
+            # Serve repeated or paraphrased questions from the answer cache
+            cache = get_answer_cache()
+            generation = cache.generation
+            with trace.span('answer_cache_lookup'):
+                response, query_vector = cache.lookup(question, filters)
+            if response is None:
+                # Get response from QA system, pinned to one index snapshot
+                with index_holder.lease() as snapshot, trace.span('qa_chain'):
+                    response = get_qa_chain(filters, snapshot).run(question, callbacks=[TraceCallbackHandler(trace)])
+                cache.store(question, response, filters, vector=query_vector, generation=generation)
+            else:
+                trace.cache_status = 'hit'
+            result = {'answer': response, 'status': 'success'}
+        except Exception as e:
+            logging.error(f"Error processing question: {str(e)}")
+            trace.status = 'error'
+            result = {'answer': 'An error occurred while processing your question.', 'status': 'error'}
+        # Per-stage breakdown for whoever is debugging a slow answer
+        if request.headers.get(DEBUG_TIMING_HEADER):
+            result['timing'] = trace.to_dict()
+    return jsonify(result)
+
+@app.route('/ask/stream', methods=['POST'])
+def ask_question_stream():
+    """Like /ask, but streams the answer as server-sent events while the LLM writes it."""
+    start_scrape_if_due()
+    
+    data = request.json
+    events = answer_events(data.get('question', ''), request_filters(data),
+                           include_timing=bool(request.headers.get(DEBUG_TIMING_HEADER)))
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(get_answer_cache().stats())
+
+@app.route('/index/stats')
+def index_stats():
+    return jsonify({'index': index_holder.stats(), 'scrape': scrape_scheduler.stats()})
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Request and per-stage latency histograms, token and request counters for Prometheus."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # Create templates directory and index.html
 os.makedirs('templates', exist_ok=True)
@@ -208,7 +487,7 @@ with open('templates/index.html', 'w') as f:
             loading.style.display = 'block';
             response.innerHTML = '';
             
-            fetch('/ask', {
+            fetch('/ask/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -217,13 +496,31 @@ with open('templates/index.html', 'w') as f:
                     question: "Generate a new GMAT question with its solution"
                 })
             })
-            .then(response => response.json())
-            .then(data => {
-                loading.style.display = 'none';
-                if (data.status === 'success') {
-                    response.innerHTML = data.answer;
-                } else {
-                    response.innerHTML = `<div class="error">${data.answer}</div>`;
+            .then(async res => {
+                // Render tokens as they arrive instead of waiting for the whole answer
+                const reader = res.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                let text = '';
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true });
+                    const events = buffer.split('\\n\\n');
+                    buffer = events.pop();
+                    for (const raw of events) {
+                        const event = raw.match(/^event: (.*)$/m)[1];
+                        const data = JSON.parse(raw.match(/^data: (.*)$/m)[1]);
+                        loading.style.display = 'none';
+                        if (event === 'token') {
+                            text += data;
+                            response.textContent = text;
+                        } else if (data.status === 'success') {
+                            response.innerHTML = data.answer;
+                        } else {
+                            response.innerHTML = `<div class="error">${data.answer}</div>`;
+                        }
+                    }
                 }
             })
             .catch(error => {
@@ -239,4 +536,6 @@ with open('templates/index.html', 'w') as f:
 if __name__ == '__main__':
     # Initialize the QA system before starting the server
     initialize_qa_system()
+    # Scrape on a timer in the background, independently of request traffic
+    scrape_scheduler.start()
     app.run(debug=True)
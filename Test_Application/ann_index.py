@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+from typing import NamedTuple, Optional
+
+import faiss
+import numpy as np
+from langchain.docstore import InMemoryDocstore
+from langchain.vectorstores import FAISS
+
+from vector_store import write_atomically
+
+TRAINED_FILE = 'trained.faiss'
+TRAINED_SPEC_FILE = 'trained.json'
+
+# FAISS needs about this many training points per IVF list (and per PQ centroid)
+_POINTS_PER_CENTROID = 39
+
+
+class IndexSpec(NamedTuple):
+    """Which FAISS index to build and how to search it.
+
+    kind is one of 'flat' (exact), 'ivf_flat', 'ivf_pq' or 'hnsw'.
+    nlist/nprobe apply to the IVF kinds, pq_m/pq_bits to IVF-PQ, and
+    hnsw_m/ef_construction/ef_search to HNSW.
+    """
+    kind: str = 'flat'
+    nlist: int = 1024
+    nprobe: int = 16
+    pq_m: int = 16
+    pq_bits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 80
+    ef_search: int = 64
+
+    @property
+    def factory_string(self) -> str:
+        if self.kind == 'flat':
+            return 'Flat'
+        if self.kind == 'ivf_flat':
+            return f'IVF{self.nlist},Flat'
+        if self.kind == 'ivf_pq':
+            return f'IVF{self.nlist},PQ{self.pq_m}x{self.pq_bits}'
+        if self.kind == 'hnsw':
+            return f'HNSW{self.hnsw_m},Flat'
+        raise ValueError(f"Unknown index kind: {self.kind}")
+
+    @property
+    def key(self) -> str:
+        """Identifies the stored index layout; search-time knobs are left out."""
+        if self.kind == 'hnsw':
+            return f'{self.factory_string},efc{self.ef_construction}'
+        return self.factory_string
+
+    def min_training_points(self) -> int:
+        if self.kind == 'ivf_flat':
+            return self.nlist * _POINTS_PER_CENTROID
+        if self.kind == 'ivf_pq':
+            return max(self.nlist, 1 << self.pq_bits) * _POINTS_PER_CENTROID
+        return 0
+
+    def key_for(self, count: int) -> str:
+        """Key of the index reindex_vectorstore actually builds for ``count`` vectors.
+
+        Corpora too small to train this kind stay on the exact index, so
+        fingerprints recorded with this key change once the corpus grows
+        past the training threshold.
+        """
+        if count < self.min_training_points():
+            return IndexSpec().key
+        return self.key
+
+
+def apply_search_params(index, spec: IndexSpec):
+    """Set the search-time knobs (nprobe, efSearch) on a built or loaded index.
+
+    Indexes of other kinds, such as a small corpus left on the exact index,
+    are returned unchanged.
+    """
+    inner = faiss.downcast_index(index)
+    if isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = spec.nprobe
+    elif isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = spec.ef_search
+    return index
+
+
+def search_parameters(index, selector) -> faiss.SearchParameters:
+    """Search parameters restricting a search to ``selector``, of the type the index expects."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def train_index(spec: IndexSpec, dimension: int, sample: np.ndarray):
+    """Create an empty index for ``spec`` and train it on ``sample`` if the kind needs training."""
+    index = faiss.index_factory(dimension, spec.factory_string)
+    if spec.kind == 'hnsw':
+        faiss.downcast_index(index).hnsw.efConstruction = spec.ef_construction
+    if not index.is_trained:
+        index.train(np.ascontiguousarray(sample, dtype='float32'))
+    return apply_search_params(index, spec)
+
+
+def load_or_train(spec: IndexSpec, dimension: int, sample: np.ndarray,
+                  folder: Optional[str] = None, retrain: bool = False):
+    """Return an empty trained index, reusing the quantizer persisted in ``folder``.
+
+    Training IVF centroids and PQ codebooks is the slow part of a build, so
+    the trained, empty index is saved once and later rebuilds only add
+    vectors to a copy of it.
+    """
+    trained_path = os.path.join(folder, TRAINED_FILE) if folder else None
+    spec_path = os.path.join(folder, TRAINED_SPEC_FILE) if folder else None
+    if trained_path and not retrain and os.path.exists(trained_path):
+        try:
+            with open(spec_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved == {'key': spec.key, 'dimension': dimension}:
+                logging.info(f"Reusing trained {spec.key} quantizer from {trained_path}")
+                return apply_search_params(faiss.read_index(trained_path), spec)
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    index = train_index(spec, dimension, sample)
+    if trained_path and spec.min_training_points():
+        os.makedirs(folder, exist_ok=True)
+
+        def write_spec(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'key': spec.key, 'dimension': dimension}, f)
+
+        # Workers starting together may all train; each writes its own temporary file
+        write_atomically(trained_path, lambda path: faiss.write_index(index, path))
+        write_atomically(spec_path, write_spec)
+        logging.info(f"Trained and saved {spec.key} quantizer to {trained_path}")
+    return index
+
+
+def reindex_vectorstore(store: FAISS, spec: IndexSpec, folder: Optional[str] = None,
+                        retrain: bool = False, max_training_points: int = 100_000) -> FAISS:
+    """Move a vector store's vectors into an index of the given kind.
+
+    Positions and docstore ids are unchanged, so metadata and BM25 indexes
+    built against the store stay valid. Corpora too small to train the
+    requested index stay on the exact flat index.
+    """
+    if spec.kind == 'flat':
+        return store
+    count = store.index.ntotal
+    if spec.key_for(count) != spec.key:
+        logging.info(f"{count} vectors are too few to train {spec.key}; keeping the exact index")
+        return store
+
+    vectors = store.index.reconstruct_n(0, count)
+    rng = np.random.default_rng(0)
+    sample = vectors[rng.choice(count, min(count, max_training_points), replace=False)]
+    index = load_or_train(spec, vectors.shape[1], sample, folder, retrain)
+    for start in range(0, count, 65536):
+        index.add(vectors[start:start + 65536])
+    logging.info(f"Rebuilt {count} vectors into a {spec.key} index")
+    return FAISS(store.embedding_function, index, InMemoryDocstore(dict(store.docstore._dict)),
+                 dict(store.index_to_docstore_id))
@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return ' '.join(query.lower().split()).rstrip(' ?.!')
+
+
+class _Entry(NamedTuple):
+    answer: str
+    vector: Optional[np.ndarray]
+    expires_at: float
+
+
+class AnswerCache:
+    """In-memory cache of QA answers, matched exactly and then by query embedding.
+
+    A lookup first tries the normalized query text. On a miss the query is
+    embedded and compared with the cached queries that used the same
+    filters; the closest one counts as a hit if its cosine similarity is at
+    least ``similarity_threshold``. Entries expire after ``ttl`` seconds and
+    the least recently used ones are evicted beyond ``max_entries``.
+    ``clear()`` drops everything and should be called whenever the index the
+    answers came from is rebuilt.
+    """
+
+    def __init__(self, embeddings: Optional[Embeddings] = None, similarity_threshold: float = 0.95,
+                 ttl: float = 3600.0, max_entries: int = 1000):
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Tuple[str, Hashable], _Entry]' = OrderedDict()
+
+    @staticmethod
+    def _scope(filters: Optional[Dict[str, str]]) -> Hashable:
+        return tuple(sorted((filters or {}).items()))
+
+    def _embed(self, query: str) -> Optional[np.ndarray]:
+        if self.embeddings is None:
+            return None
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+
+    def _closest(self, scope: Hashable, vector: np.ndarray) -> Optional[Tuple[str, Hashable]]:
+        keys: List[Tuple[str, Hashable]] = []
+        vectors = []
+        for key, entry in self._entries.items():
+            if key[1] == scope and entry.vector is not None:
+                keys.append(key)
+                vectors.append(entry.vector)
+        if not keys:
+            return None
+        similarities = np.stack(vectors) @ vector
+        best = int(np.argmax(similarities))
+        return keys[best] if similarities[best] >= self.similarity_threshold else None
+
+    def lookup(self, query: str, filters: Optional[Dict[str, str]] = None) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """Return (answer or None, query vector).
+
+        The vector is only computed on an exact miss; pass it back to
+        ``store`` so the query is not embedded twice.
+        """
+        key = (normalize_query(query), self._scope(filters))
+        with self._lock:
+            self._expire(time.time())
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return self._entries[key].answer, None
+
+        vector = self._embed(query)
+        if vector is not None:
+            with self._lock:
+                match = self._closest(key[1], vector)
+                if match is not None and match in self._entries:
+                    self._entries.move_to_end(match)
+                    self.semantic_hits += 1
+                    return self._entries[match].answer, vector
+
+        with self._lock:
+            self.misses += 1
+        return None, vector
+
+    def store(self, query: str, answer: str, filters: Optional[Dict[str, str]] = None,
+              vector: Optional[np.ndarray] = None, generation: Optional[int] = None) -> None:
+        """Cache an answer, evicting the least recently used entries over the size cap.
+
+        Pass the ``generation`` read before answering to drop answers computed
+        against an index that has been replaced in the meantime.
+        """
+        if vector is None:
+            vector = self._embed(query)
+        key = (normalize_query(query), self._scope(filters))
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = _Entry(answer, vector, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters, the hit rate and the current cache size."""
+        hits = self.exact_hits + self.semantic_hits
+        total = hits + self.misses
+        return {
+            'exact_hits': self.exact_hits,
+            'semantic_hits': self.semantic_hits,
+            'misses': self.misses,
+            'hit_rate': hits / total if total else 0.0,
+            'entries': len(self),
+            'max_entries': self.max_entries,
+        }
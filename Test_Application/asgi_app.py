@@ -0,0 +1,139 @@
+"""Async (ASGI) serving mode for the GMAT QA app.
+
+    uvicorn asgi_app:app --workers 2
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi_app:app
+
+The Flask app in RAG_1 ties up a worker thread for the whole LLM round-trip
+of every request. Here the chain runs on the event loop through the LLM's
+async client, so a single process can hold many LLM calls in flight at
+once. The QA system, index, answer cache and background scraping are the
+same module state RAG_1 uses; only the request handling differs.
+"""
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+import RAG_1
+from streaming import astream_chain, format_sse
+from tracing import TraceCallbackHandler, metrics, trace_request
+
+ERROR_ANSWER = 'An error occurred while processing your question.'
+
+
+async def home(request: Request) -> HTMLResponse:
+    with open('templates/index.html', 'r', encoding='utf-8') as f:
+        return HTMLResponse(f.read())
+
+
+async def ask_question(request: Request) -> JSONResponse:
+    RAG_1.start_scrape_if_due()
+    data = await request.json()
+    question = data.get('question', '')
+    filters = RAG_1.request_filters(data)
+
+    with trace_request('/ask') as trace:
+        try:
+            cache = RAG_1.get_answer_cache()
+            generation = cache.generation
+            # The cache may embed the query, which is a blocking call
+            with trace.span('answer_cache_lookup'):
+                response, query_vector = await run_in_threadpool(cache.lookup, question, filters)
+            if response is None:
+                with RAG_1.index_holder.lease() as snapshot, trace.span('qa_chain'):
+                    chain = RAG_1.get_qa_chain(filters, snapshot)
+                    response = await chain.arun(question, callbacks=[TraceCallbackHandler(trace)])
+                cache.store(question, response, filters, vector=query_vector, generation=generation)
+            else:
+                trace.cache_status = 'hit'
+            result = {'answer': response, 'status': 'success'}
+        except Exception as e:
+            logging.error(f"Error processing question: {str(e)}")
+            trace.status = 'error'
+            result = {'answer': ERROR_ANSWER, 'status': 'error'}
+        if request.headers.get(RAG_1.DEBUG_TIMING_HEADER):
+            result['timing'] = trace.to_dict()
+    return JSONResponse(result)
+
+
+async def answer_events(question, filters, include_timing=False):
+    """Async counterpart of RAG_1.answer_events."""
+    with trace_request('/ask/stream') as trace:
+        try:
+            cache = RAG_1.get_answer_cache()
+            generation = cache.generation
+            with trace.span('answer_cache_lookup'):
+                answer, query_vector = await run_in_threadpool(cache.lookup, question, filters)
+            if answer is None:
+                with RAG_1.index_holder.lease() as snapshot, trace.span('qa_chain'):
+                    start = time.perf_counter()
+                    chain = RAG_1.get_qa_chain(filters, snapshot)
+                    async for event, data in astream_chain(chain, question, [TraceCallbackHandler(trace)]):
+                        if event == 'token':
+                            if start is not None:
+                                trace.add_span('first_token', start, time.perf_counter() - start)
+                                start = None
+                            yield format_sse('token', data)
+                        else:
+                            answer = data
+                cache.store(question, answer, filters, vector=query_vector, generation=generation)
+            else:
+                trace.cache_status = 'hit'
+            result = {'answer': answer, 'status': 'success'}
+        except Exception as e:
+            logging.error(f"Error streaming answer: {str(e)}")
+            trace.status = 'error'
+            result = {'answer': ERROR_ANSWER, 'status': 'error'}
+        if include_timing:
+            result['timing'] = trace.to_dict()
+        yield format_sse('answer', result)
+
+
+async def ask_question_stream(request: Request) -> StreamingResponse:
+    RAG_1.start_scrape_if_due()
+    data = await request.json()
+    events = answer_events(data.get('question', ''), RAG_1.request_filters(data),
+                           include_timing=bool(request.headers.get(RAG_1.DEBUG_TIMING_HEADER)))
+    return StreamingResponse(
+        events,
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+async def cache_stats(request: Request) -> JSONResponse:
+    return JSONResponse(RAG_1.get_answer_cache().stats())
+
+
+async def index_stats(request: Request) -> JSONResponse:
+    return JSONResponse({'index': RAG_1.index_holder.stats(), 'scrape': RAG_1.scrape_scheduler.stats()})
+
+
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4')
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await run_in_threadpool(RAG_1.initialize_qa_system)
+    RAG_1.scrape_scheduler.start()
+    yield
+    RAG_1.scrape_scheduler.stop()
+
+
+app = Starlette(
+    routes=[
+        Route('/', home),
+        Route('/ask', ask_question, methods=['POST']),
+        Route('/ask/stream', ask_question_stream, methods=['POST']),
+        Route('/cache/stats', cache_stats),
+        Route('/index/stats', index_stats),
+        Route('/metrics', prometheus_metrics),
+    ],
+    lifespan=lifespan
+)
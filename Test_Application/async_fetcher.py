@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from page_cache import UNCHANGED, PageCache
+
+
+class TokenBucket:
+    """Token-bucket rate limiter usable from both threads and coroutines.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``, so
+    requests are only delayed when they actually exceed the allowed rate,
+    instead of sleeping a fixed amount after every page.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Block the current thread until a token is available."""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Wait, without blocking the event loop, until a token is available."""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AsyncFetcher:
+    """Concurrent HTML fetcher with per-host concurrency and rate limits.
+
+    Different hosts are fetched fully in parallel, while each host gets at
+    most ``max_per_host`` open requests and ``rate_per_host`` requests per
+    second.
+    """
+
+    def __init__(self, max_per_host: int = 4, rate_per_host: float = 1.0, burst: float = 1.0,
+                 timeout: float = 10, max_retries: int = 3,
+                 headers_factory: Optional[Callable[[], Dict[str, str]]] = None,
+                 page_cache: Optional[PageCache] = None):
+        self.max_per_host = max_per_host
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.headers_factory = headers_factory or dict
+        self.page_cache = page_cache
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    async def __aenter__(self) -> 'AsyncFetcher':
+        self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._session.close()
+        self._session = None
+
+    def _limits_for(self, url: str):
+        host = urlsplit(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.max_per_host)
+            self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+        return self._semaphores[host], self._buckets[host]
+
+    async def fetch(self, url: str):
+        """Fetch a page body, retrying on failure; returns None if every attempt fails.
+
+        With a page cache configured the request is conditional, and
+        ``UNCHANGED`` is returned when the page has not changed since last time.
+        """
+        semaphore, bucket = self._limits_for(url)
+        for attempt in range(self.max_retries):
+            async with semaphore:
+                await bucket.acquire_async()
+                headers = self.headers_factory()
+                if self.page_cache:
+                    headers.update(self.page_cache.conditional_headers(url))
+                try:
+                    async with self._session.get(url, headers=headers) as response:
+                        if response.status != 304:
+                            response.raise_for_status()
+                        body = await response.read()
+                        if self.page_cache and self.page_cache.update(url, response.status, response.headers, body):
+                            return UNCHANGED
+                        return await response.text()
+                except (UnicodeDecodeError, aiohttp.ClientPayloadError) as e:
+                    # A malformed body will not improve on retry; drop this page, not the whole gather
+                    logging.error(f"Could not read the body of {url}: {str(e)}")
+                    return None
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logging.error(f"Request failed (attempt {attempt + 1}/{self.max_retries}): {url}: {str(e)}")
+        return None
+
+    async def fetch_all(self, urls: List[str]) -> Dict[str, object]:
+        """Fetch all URLs concurrently, returning a mapping of URL to body, None or ``UNCHANGED``."""
+        bodies = await asyncio.gather(*(self.fetch(url) for url in urls))
+        return dict(zip(urls, bodies))
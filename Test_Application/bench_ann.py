@@ -0,0 +1,86 @@
+"""Benchmark approximate FAISS indexes against the exact flat index.
+
+Usage:
+    python bench_ann.py [--vectors N] [--queries N] [--dim D] [--k K] [--nlist N] [--pq-m M]
+
+Builds every index kind in ann_index over the same synthetic clustered
+vectors and reports build time, index size, recall@k against exact search
+and single-query latency at several nprobe / efSearch operating points.
+Single queries are timed one at a time, the way /ask issues them.
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from ann_index import IndexSpec, apply_search_params, train_index
+
+
+def clustered_vectors(count: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Gaussian blobs around random centres, closer to real embeddings than uniform noise."""
+    centres = rng.standard_normal((clusters, dim)).astype('float32')
+    labels = rng.integers(clusters, size=count)
+    return centres[labels] + 0.9 * rng.standard_normal((count, dim)).astype('float32')
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--vectors', type=int, default=200_000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--dim', type=int, default=128)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--nlist', type=int, default=1024)
+    parser.add_argument('--pq-m', type=int, default=16)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = clustered_vectors(args.vectors + args.queries, args.dim, 2000, rng)
+    vectors, queries = data[:args.vectors], data[args.vectors:]
+
+    specs = [
+        (IndexSpec('flat'), [None]),
+        (IndexSpec('ivf_flat', nlist=args.nlist), [1, 8, 16, 64]),
+        (IndexSpec('ivf_pq', nlist=args.nlist, pq_m=args.pq_m), [8, 16, 64]),
+        (IndexSpec('hnsw'), [16, 64, 128]),
+    ]
+    truth = None
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, recall@{args.k} vs exact\n")
+    print(f"{'index':28} {'search':>12} {'build s':>8} {'MiB':>8} {f'R@{args.k}':>7} {'ms/query':>9}")
+    for spec, knobs in specs:
+        start = time.perf_counter()
+        sample = vectors[rng.choice(args.vectors, min(args.vectors, 100_000), replace=False)]
+        index = train_index(spec, args.dim, sample)
+        index.add(vectors)
+        build = time.perf_counter() - start
+        size = faiss.serialize_index(index).nbytes / 2 ** 20
+        threads = faiss.omp_get_max_threads()
+        faiss.omp_set_num_threads(1)  # Per-query latency, as one request thread sees it
+
+        for knob in knobs:
+            if spec.kind in ('ivf_flat', 'ivf_pq'):
+                spec = spec._replace(nprobe=knob)
+                label = f'nprobe={knob}'
+            elif spec.kind == 'hnsw':
+                spec = spec._replace(ef_search=knob)
+                label = f'efSearch={knob}'
+            else:
+                label = 'exact'
+            apply_search_params(index, spec)
+
+            start = time.perf_counter()
+            found = np.vstack([index.search(query[None, :], args.k)[1] for query in queries])
+            latency = (time.perf_counter() - start) / args.queries
+            if truth is None:
+                truth = found
+            print(f"{spec.key:28} {label:>12} {build:8.1f} {size:8.1f} {recall_at_k(found, truth):7.3f} "
+                  f"{latency * 1000:9.3f}")
+        faiss.omp_set_num_threads(threads)
+
+
+if __name__ == "__main__":
+    main()
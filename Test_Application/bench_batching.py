@@ -0,0 +1,115 @@
+"""Benchmark retrieval throughput with and without the QueryBatcher.
+
+Usage:
+    python bench_batching.py [--clients 1 4 16 64] [--duration S] [--latency MS] [--api-concurrency N]
+
+Builds a FAISS store over a synthetic corpus with an offline embedder whose
+every call costs a fixed latency plus a small per-text cost, like a remote
+embedding API, and which serves at most --api-concurrency calls at a time,
+like a connection pool or a self-hosted model server. Client threads then
+issue queries back to back, either each embedding and searching on its own
+or through a QueryBatcher, and the queries per second and latency
+percentiles are reported for each load level.
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+from typing import List
+
+from langchain.schema import Document
+from langchain.vectorstores import FAISS
+
+from fake_models import HashEmbeddings
+from query_batcher import QueryBatcher
+
+
+class LatencyEmbeddings(HashEmbeddings):
+    """HashEmbeddings that sleep like a network round-trip on every call."""
+
+    def __init__(self, call_latency: float, concurrency: int, per_text: float = 0.0002):
+        super().__init__()
+        self.call_latency = call_latency
+        self.per_text = per_text
+        self._slots = threading.Semaphore(concurrency)
+
+    def _wait(self, count: int) -> None:
+        with self._slots:
+            time.sleep(self.call_latency + self.per_text * count)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._wait(len(texts))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        self._wait(1)
+        return super().embed_query(text)
+
+
+def build_store(size: int, embeddings: LatencyEmbeddings) -> FAISS:
+    rng = random.Random(0)
+    words = ['ratio', 'integer', 'passage', 'argument', 'sufficient', 'table', 'probability',
+             'average', 'author', 'statement', 'value', 'percent', 'interest', 'graph', 'median']
+    docs = [Document(page_content=' '.join(rng.choices(words, k=30))) for _ in range(size)]
+    latency, embeddings.call_latency = embeddings.call_latency, 0.0
+    store = FAISS.from_documents(docs, embeddings)
+    embeddings.call_latency = latency
+    return store
+
+
+def run_load(search, clients: int, duration: float):
+    latencies = []
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def client(seed):
+        rng = random.Random(seed)
+        mine = []
+        while time.monotonic() < stop:
+            start = time.monotonic()
+            search(f"what is the {rng.choice(['ratio', 'average', 'median'])} {rng.randint(0, 999)}")
+            mine.append(time.monotonic() - start)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return len(latencies) / duration, statistics.median(latencies) * 1000, p99 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--duration', type=float, default=2.0)
+    parser.add_argument('--latency', type=float, default=20.0, help='embedding call latency in ms')
+    parser.add_argument('--api-concurrency', type=int, default=4, help='embedding calls served at once')
+    parser.add_argument('--docs', type=int, default=20000)
+    parser.add_argument('--max-batch', type=int, nargs='+', default=[8, 32])
+    parser.add_argument('--max-wait', type=float, default=2.0, help='batch window in ms')
+    args = parser.parse_args()
+
+    embeddings = LatencyEmbeddings(args.latency / 1000, args.api_concurrency)
+    store = build_store(args.docs, embeddings)
+    print(f"{args.docs} docs, {args.latency:.0f} ms per embedding call, {args.api_concurrency} calls at a time, "
+          f"{args.duration:g}s per run\n")
+
+    modes = [('unbatched', lambda query: store.similarity_search(query, k=4))]
+    for max_batch in args.max_batch:
+        batcher = QueryBatcher(max_batch_size=max_batch, max_wait=args.max_wait / 1000)
+        modes.append((f'batched (max {max_batch})', lambda query, b=batcher: b.search(store, query, 4)))
+
+    print(f"{'mode':20} {'clients':>7} {'queries/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, search in modes:
+        for clients in args.clients:
+            qps, p50, p99 = run_load(search, clients, args.duration)
+            print(f"{label:20} {clients:7} {qps:10.0f} {p50:8.1f} {p99:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
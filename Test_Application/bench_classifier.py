@@ -0,0 +1,107 @@
+"""Benchmark the compiled question classifier against the original keyword scans.
+
+Usage:
+    python bench_classifier.py [--questions N] [--repeat N]
+
+Generates a synthetic corpus mixing GMAT keywords with filler words and
+reports questions per second for the original three-scans-per-question
+heuristics and for QuestionClassifier with its regex and (if pyahocorasick is
+installed) Aho-Corasick scanners. All of them must agree on every question.
+"""
+import argparse
+import random
+import time
+
+from question_classifier import (CATEGORY_KEYWORDS, DIFFICULTY_INDICATORS, SUBCATEGORY_PATTERNS,
+                                 Classification, QuestionClassifier)
+
+
+def legacy_classify(question_text: str) -> Classification:
+    """The original per-call heuristics: dicts rebuilt, text lowered and scanned per keyword."""
+    keywords = {name: list(words) for name, words in CATEGORY_KEYWORDS.items()}
+    question_lower = question_text.lower()
+    category_scores = {
+        category: sum(1 for word in words if word.lower() in question_lower)
+        for category, words in keywords.items()
+    }
+    if max(category_scores.values()) > 0:
+        category = max(category_scores.items(), key=lambda x: x[1])[0]
+    else:
+        category = "Uncategorized"
+
+    patterns = {name: list(words) for name, words in SUBCATEGORY_PATTERNS.items()}
+    question_lower = question_text.lower()
+    sub_category = "Other"
+    for name, words in patterns.items():
+        if any(pattern in question_lower for pattern in words):
+            sub_category = name
+            break
+
+    word_count = len(question_text.split())
+    indicators = {name: list(words) for name, words in DIFFICULTY_INDICATORS.items()}
+    question_lower = question_text.lower()
+    difficulty = None
+    for name, words in indicators.items():
+        if any(indicator in question_lower for indicator in words):
+            difficulty = name
+            break
+    if difficulty is None:
+        difficulty = "Hard" if word_count > 100 else "Medium" if word_count > 50 else "Easy"
+
+    return Classification(category, sub_category, difficulty)
+
+
+def synthetic_corpus(size: int, seed: int = 0):
+    rng = random.Random(seed)
+    keywords = sorted({w for table in (CATEGORY_KEYWORDS, SUBCATEGORY_PATTERNS, DIFFICULTY_INDICATORS)
+                       for words in table.values() for w in words})
+    filler = ['the', 'of', 'if', 'x', 'y', 'integer', 'value', 'company', 'sales', 'year', 'which',
+              'following', 'must', 'be', 'true', 'than', 'greater', 'each', 'two', 'city', 'meanings']
+    corpus = []
+    for _ in range(size):
+        words = rng.choices(filler, k=rng.randint(15, 140))
+        for _ in range(rng.randint(0, 6)):
+            word = rng.choice(keywords)
+            words.insert(rng.randrange(len(words) + 1), word.upper() if rng.random() < 0.1 else word)
+        corpus.append(' '.join(words) + '?')
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.questions)
+    regex_classifier = QuestionClassifier(use_automaton=False)
+    classifier = QuestionClassifier()
+
+    runs = [
+        ('original keyword scans', lambda: [legacy_classify(text) for text in corpus]),
+        ('trie regex classify()', lambda: [regex_classifier.classify(text) for text in corpus]),
+        ('trie regex classify_batch()', lambda: regex_classifier.classify_batch(corpus)),
+    ]
+    if classifier._automaton is not None:
+        runs += [
+            ('aho-corasick classify()', lambda: [classifier.classify(text) for text in corpus]),
+            ('aho-corasick classify_batch()', lambda: classifier.classify_batch(corpus)),
+        ]
+
+    expected = runs[0][1]()
+    print(f"{len(corpus)} questions, {args.repeat} repeats\n")
+    print(f"{'classifier':30} {'questions/s':>12} {'speedup':>8}  output")
+    baseline = None
+    for label, run in runs:
+        output = run()
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            run()
+        elapsed = (time.perf_counter() - start) / args.repeat
+        baseline = baseline or elapsed
+        print(f"{label:30} {len(corpus) / elapsed:12,.0f} {baseline / elapsed:7.1f}x  "
+              f"{'matches' if output == expected else 'DIFFERS'}")
+
+
+if __name__ == "__main__":
+    main()
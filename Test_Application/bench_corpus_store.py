@@ -0,0 +1,109 @@
+"""Benchmark the corpus embedding store against the notebook's pickle cache.
+
+Usage:
+    python bench_corpus_store.py [--sentences N] [--dim D] [--prefix N] [--workdir DIR]
+
+Writes the same synthetic corpus once as the notebook's pickled
+{"sentences", "embeddings"} dict and once as a CorpusEmbeddingStore
+(float16 and float32). Each loader then runs in a fresh subprocess, which
+reports the load time, the time of one cosine search over the loaded rows,
+and how much resident memory the process gained, both at its peak and
+after the search.
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from corpus_store import CorpusEmbeddingStore
+
+
+def _memory_mib():
+    """(current RSS, peak RSS) of this process in MiB, from /proc."""
+    values = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(('VmRSS:', 'VmHWM:')):
+                key, amount = line.split(':')
+                values[key] = int(amount.split()[0]) / 1024
+    return values['VmRSS'], values['VmHWM']
+
+
+def child(mode: str, path: str, prefix: int) -> None:
+    baseline, _ = _memory_mib()
+    start = time.perf_counter()
+    if mode == 'pickle':
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        sentences = data['sentences'][0:prefix]
+        embeddings = data['embeddings'][0:prefix]
+    else:
+        sentences, embeddings = CorpusEmbeddingStore(path).load(prefix)
+    load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    query = np.ones(embeddings.shape[1], dtype='float32')
+    # Chunked like BiEncoderRetriever, so float16 rows are never upcast all at once
+    scores = np.concatenate([np.asarray(embeddings[i:i + 65536], dtype='float32') @ query
+                             for i in range(0, len(embeddings), 65536)])
+    int(np.argmax(scores))
+    search = time.perf_counter() - start
+
+    rss, peak = _memory_mib()
+    print(json.dumps({'rows': len(sentences), 'load_ms': load * 1000, 'search_ms': search * 1000,
+                      'rss_mib': rss - baseline, 'peak_mib': peak - baseline}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sentences', type=int, default=100_000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--prefix', type=int, default=20_000, help="rows to load, like max_corpus_size")
+    parser.add_argument('--workdir')
+    parser.add_argument('--child', nargs=3, metavar=('MODE', 'PATH', 'PREFIX'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child[0], args.child[1], int(args.child[2]))
+        return
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='corpus-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    rng = np.random.default_rng(0)
+    sentences = [f"How do I solve question {i} about ratios and {rng.integers(1000)} apples?"
+                 for i in range(args.sentences)]
+    embeddings = rng.standard_normal((args.sentences, args.dim), dtype='float32')
+
+    pickle_path = os.path.join(workdir, 'corpus.pkl')
+    with open(pickle_path, 'wb') as f:
+        pickle.dump({'sentences': sentences, 'embeddings': embeddings}, f)
+    for dtype in ('float16', 'float32'):
+        store = CorpusEmbeddingStore(os.path.join(workdir, dtype), dim=args.dim, dtype=dtype)
+        for start in range(0, args.sentences, 10_000):
+            store.append(sentences[start:start + 10_000], embeddings[start:start + 10_000])
+    del embeddings
+
+    runs = [
+        ('pickle, load all then slice', 'pickle', pickle_path, args.prefix),
+        ('store float16, prefix', 'store', os.path.join(workdir, 'float16'), args.prefix),
+        ('store float32, prefix', 'store', os.path.join(workdir, 'float32'), args.prefix),
+        ('pickle, all rows', 'pickle', pickle_path, args.sentences),
+        ('store float16, all rows', 'store', os.path.join(workdir, 'float16'), args.sentences),
+    ]
+    print(f"{args.sentences} sentences x {args.dim} dims, prefix {args.prefix}, files in {workdir}\n")
+    print(f"{'loader':30} {'rows':>8} {'load ms':>9} {'search ms':>10} {'RSS MiB':>8} {'peak MiB':>9}")
+    for label, mode, path, prefix in runs:
+        output = subprocess.run([sys.executable, __file__, '--child', mode, path, str(prefix)],
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{label:30} {result['rows']:8} {result['load_ms']:9.1f} {result['search_ms']:10.1f} "
+              f"{result['rss_mib']:8.1f} {result['peak_mib']:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
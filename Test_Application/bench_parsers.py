@@ -0,0 +1,257 @@
+"""Benchmark the HTML parser backends used by GmatScraper.
+
+Usage:
+    python bench_parsers.py [fixture_dir] [--repeat N]
+
+fixture_dir may contain saved listing pages named ``gmatclub_*.html`` and
+``veritas_*.html``. Without it, synthetic forum pages of realistic size are
+generated. Every backend's output is checked against the original
+BeautifulSoup page parsers before timings are reported.
+"""
+import argparse
+import glob
+import logging
+import os
+import random
+import time
+from dataclasses import asdict
+from datetime import datetime
+from typing import List
+
+from bs4 import BeautifulSoup
+
+from gmat_scraper import GmatQuestion, GmatScraper
+from html_parsers import available_backends, get_backend
+
+
+# The BeautifulSoup page parsers GmatScraper used before html_parsers, kept as
+# the reference output and the baseline timing.
+def extract_text_safely(element, selector: str = None, class_name: str = None,
+                       attribute: str = None) -> str:
+    """Enhanced safe text extraction with multiple fallback methods."""
+    try:
+        if not element:
+            return ""
+
+        # Try direct selector with class
+        if selector and class_name:
+            found = element.find(selector, class_=class_name)
+            if found:
+                return found.get_text(strip=True)
+
+        # Try finding by attribute
+        if attribute:
+            found = element.find(attrs={attribute: True})
+            if found:
+                return found.get_text(strip=True)
+
+        # Try direct class name
+        if class_name:
+            found = element.find(class_=class_name)
+            if found:
+                return found.get_text(strip=True)
+
+        # Try direct selector
+        if selector:
+            found = element.find(selector)
+            if found:
+                return found.get_text(strip=True)
+
+        # If all else fails, try to get text directly
+        text = element.get_text(strip=True)
+        return text if text else ""
+
+    except Exception as e:
+        logging.warning(f"Error extracting text: {str(e)}")
+        return ""
+
+
+def parse_gmatclub_page(soup: BeautifulSoup, category: str, url: str) -> List[GmatQuestion]:
+    """Extract questions from a GMAT Club listing page."""
+    questions = []
+    question_threads = soup.find_all('div', class_='question-thread')
+
+    for thread in question_threads:
+        try:
+            # Extract question details
+            question_text = extract_text_safely(thread, 'div', 'question-content')
+            if not question_text:
+                continue
+
+            options = []
+            options_container = thread.find('div', class_='answer-choices')
+            if options_container:
+                for opt in options_container.find_all(['div', 'p'], class_='choice'):
+                    opt_text = opt.get_text(strip=True)
+                    if opt_text:
+                        options.append(opt_text)
+
+            # Extract other metadata
+            difficulty = extract_text_safely(thread, 'span', 'difficulty-label')
+            explanation = extract_text_safely(thread, 'div', 'explanation-content')
+            correct_answer = extract_text_safely(thread, 'div', 'correct-answer')
+
+            if question_text and options:
+                classification = GmatScraper.classifier.classify(question_text)
+                question = GmatQuestion(
+                    question_text=question_text,
+                    options=options,
+                    correct_answer=correct_answer or "Not provided",
+                    explanation=explanation or "Not provided",
+                    category=category.capitalize(),
+                    sub_category=classification.sub_category,
+                    difficulty=difficulty or classification.difficulty,
+                    source_url=url,
+                    scraped_date=datetime.now().isoformat()
+                )
+                questions.append(question)
+                logging.info(f"Successfully scraped question from GMAT Club: {question_text[:50]}...")
+
+        except Exception as e:
+            logging.error(f"Error processing GMAT Club question: {str(e)}")
+            continue
+
+    return questions
+
+
+def parse_veritas_page(soup: BeautifulSoup, category: str, url: str) -> List[GmatQuestion]:
+    """Extract questions from a Veritas Prep practice page."""
+    questions = []
+    question_containers = soup.find_all('div', class_=['practice-question', 'question-container'])
+
+    for container in question_containers:
+        try:
+            question_text = extract_text_safely(container, 'div', 'question-stem')
+            if not question_text:
+                continue
+
+            options = []
+            options_div = container.find('div', class_='answer-choices')
+            if options_div:
+                for opt in options_div.find_all(['div', 'p'], class_='choice'):
+                    opt_text = opt.get_text(strip=True)
+                    if opt_text:
+                        options.append(opt_text)
+
+            correct_answer = extract_text_safely(container, 'div', 'correct-answer')
+            explanation = extract_text_safely(container, 'div', 'solution')
+            difficulty = extract_text_safely(container, 'span', 'difficulty')
+
+            if question_text and options:
+                classification = GmatScraper.classifier.classify(question_text)
+                question = GmatQuestion(
+                    question_text=question_text,
+                    options=options,
+                    correct_answer=correct_answer or "Not provided",
+                    explanation=explanation or "Not provided",
+                    category=category.capitalize(),
+                    sub_category=classification.sub_category,
+                    difficulty=difficulty or classification.difficulty,
+                    source_url=url,
+                    scraped_date=datetime.now().isoformat()
+                )
+                questions.append(question)
+                logging.info(f"Successfully scraped question from Veritas: {question_text[:50]}...")
+
+        except Exception as e:
+            logging.error(f"Error processing Veritas question: {str(e)}")
+            continue
+
+    return questions
+
+
+def synthetic_page(source: str, questions: int, seed: int) -> str:
+    """Build a forum-like listing page padded with navigation and sidebar noise."""
+    rng = random.Random(seed)
+    words = ['ratio', 'integer', 'passage', 'argument', 'sufficient', 'table', 'however',
+             'average', 'probability', 'author', 'statement', 'therefore', 'value', 'x', 'y']
+    noise = ''.join(
+        f'<li class="nav-item"><a href="/f/{i}">{" ".join(rng.choices(words, k=4))}</a></li>'
+        for i in range(300)
+    )
+    container, stem, diff, solution = {
+        'gmatclub': ('question-thread', 'question-content', 'difficulty-label', 'explanation-content'),
+        'veritas': ('question-container', 'question-stem', 'difficulty', 'solution'),
+    }[source]
+
+    blocks = []
+    for i in range(questions):
+        text = ' '.join(rng.choices(words, k=rng.randint(20, 120)))
+        choices = ''.join(f'<div class="choice">{chr(65 + c)}) {rng.randint(1, 999)}</div>' for c in range(5))
+        blocks.append(
+            f'<div class="{container}"><div class="post-meta"><span>user{i}</span></div>'
+            f'<div class="{stem}"><p>{text}</p><p>What is the value of x?</p></div>'
+            f'<div class="answer-choices">{choices}</div>'
+            f'<span class="{diff}">{rng.choice(["Easy", "Medium", "Hard"])}</span>'
+            f'<div class="correct-answer">{chr(65 + rng.randint(0, 4))}</div>'
+            f'<div class="{solution}">{" ".join(rng.choices(words, k=60))}</div></div>'
+        )
+    return f'<html><head><title>Forum</title></head><body><ul class="nav">{noise}</ul>{"".join(blocks)}</body></html>'
+
+
+def load_pages(fixture_dir):
+    pages = []
+    if fixture_dir:
+        for source in ('gmatclub', 'veritas'):
+            for path in sorted(glob.glob(os.path.join(fixture_dir, f'{source}_*.html'))):
+                with open(path, 'r', encoding='utf-8') as f:
+                    pages.append((source, f.read()))
+    if not pages:
+        pages = [(source, synthetic_page(source, 40, seed))
+                 for seed, source in enumerate(['gmatclub', 'veritas'] * 5)]
+    return pages
+
+
+def comparable(question):
+    fields = asdict(question)
+    fields.pop('scraped_date')
+    return fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('fixture_dir', nargs='?')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    pages = load_pages(args.fixture_dir)
+    scraper = GmatScraper()
+    legacy_parsers = {'gmatclub': parse_gmatclub_page, 'veritas': parse_veritas_page}
+    total_bytes = sum(len(html) for _, html in pages)
+    print(f"{len(pages)} pages, {total_bytes / 1024:.0f} KiB total, {args.repeat} repeats\n")
+
+    def run_legacy():
+        return [comparable(q) for source, html in pages
+                for q in legacy_parsers[source](BeautifulSoup(html, 'html.parser'), 'quant', 'u')]
+
+    def run_backend(name):
+        backend = get_backend(name)
+        questions = []
+        for source, html in pages:
+            for record in backend.parse(source, html)[1]:
+                question = scraper._question_from_record(record, source, 'quant', 'u')
+                if question:
+                    questions.append(comparable(question))
+        return questions
+
+    expected = run_legacy()
+    runs = [('legacy find_all (html.parser)', run_legacy)]
+    runs += [(f'{name} backend', lambda name=name: run_backend(name)) for name in available_backends()]
+
+    print(f"{'parser':32} {'ms/page':>10} {'MiB/s':>8} {'speedup':>8}  output")
+    baseline = None
+    for label, run in runs:
+        output = run()
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            run()
+        elapsed = (time.perf_counter() - start) / args.repeat
+        baseline = baseline or elapsed
+        print(f"{label:32} {elapsed / len(pages) * 1000:10.2f} "
+              f"{total_bytes / elapsed / 1024 / 1024:8.1f} {baseline / elapsed:7.1f}x  "
+              f"{'matches' if output == expected else 'DIFFERS'} ({len(output)} questions)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Benchmark the local reranker against the notebook's co.rerank calls.
+
+Usage:
+    python bench_rerank.py [--model NAME] [--model-file PATH] [--concurrency N] [--rounds N]
+                           [--cohere-key KEY]
+
+Reranks the notebook's faqs_short and emails fixtures (the emails with
+the same rank_fields) and prints the top results, then times a load of
+concurrent queries over both fixtures: one predict call per query,
+pairs batched across concurrent queries, and a warm pass served from the
+score cache. Without --model the offline OverlapCrossEncoder stands in,
+with a fixed per-call and per-pair delay in place of model latency. With
+--cohere-key (or COHERE_API_KEY) the hosted endpoint is timed as well.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fake_models import OverlapCrossEncoder
+from reranker import CohereReranker, LocalReranker, load_cross_encoder
+
+FAQS_SHORT = [
+    {"text": "Reimbursing Travel Expenses: Easily manage your travel expenses by submitting them through our finance tool. Approvals are prompt and straightforward."},
+    {"text": "Working from Abroad: Working remotely from another country is possible. Simply coordinate with your manager and ensure your availability during core hours."},
+    {"text": "Health and Wellness Benefits: We care about your well-being and offer gym memberships, on-site yoga classes, and comprehensive health insurance."},
+    {"text": "Performance Reviews Frequency: We conduct informal check-ins every quarter and formal performance reviews twice a year."},
+    {"text": "Internal Performance Check: Quarterly Performance Appraisal meetings to be held as part of evaluation."},
+]
+
+EMAILS = [
+    {"from": "Paul Doe <paul_fake_doe@oracle.com>", "to": ["Steve <steve@me.com>", "lisa@example.com"],
+     "date": "2024-03-27", "subject": "Follow-up",
+     "text": "We are happy to give you the following pricing for your project."},
+    {"from": "John McGill <john_fake_mcgill@microsoft.com>", "to": ["Steve <steve@me.com>"],
+     "date": "2024-03-28", "subject": "Missing Information",
+     "text": "Sorry, but here is the pricing you asked for for the newest line of your models."},
+    {"from": "John McGill <john_fake_mcgill@microsoft.com>", "to": ["Steve <steve@me.com>"],
+     "date": "2024-02-15", "subject": "Commited Pricing Strategy",
+     "text": "I know we went back and forth on this during the call but the pricing for now should follow the agreement at hand."},
+    {"from": "Generic Airline Company<no_reply@generic_airline_email.com>", "to": ["Steve <steve@me.com>"],
+     "date": "2023-07-25", "subject": "Your latest flight travel plans",
+     "text": "Thank you for choose to fly Generic Airline Company. Your booking status is confirmed."},
+    {"from": "Generic SaaS Company<marketing@generic_saas_email.com>", "to": ["Steve <steve@me.com>"],
+     "date": "2024-01-26", "subject": "How to build generative AI applications using Generic Company Name",
+     "text": "Hey Steve! Generative AI is growing so quickly and we know you want to build fast!"},
+    {"from": "Paul Doe <paul_fake_doe@oracle.com>", "to": ["Steve <steve@me.com>", "lisa@example.com"],
+     "date": "2024-04-09", "subject": "Price Adjustment",
+     "text": "Re: our previous correspondence on 3/27 we'd like to make an amendment on our pricing proposal. We'll have to decrease the expected base price by 5%."},
+]
+RANK_FIELDS = ["from", "to", "date", "subject", "text"]
+
+# (query, documents, top_n, rank_fields) as in the notebook
+NOTEBOOK_CALLS = [
+    ("Can you provide some information related to Performance review?", FAQS_SHORT, 3, None),
+    ("What is the pricing that we received from MS?\n", EMAILS, 2, RANK_FIELDS),
+]
+TOPICS = ['performance review', 'travel expenses', 'working abroad', 'gym membership', 'pricing from microsoft',
+          'price adjustment from oracle', 'flight booking', 'generative AI newsletter']
+
+
+def load_queries(rounds: int):
+    """Distinct queries over both fixtures, so a cold pass never hits the score cache."""
+    calls = []
+    for i in range(rounds):
+        for topic in TOPICS:
+            calls.append((f"Question {i}: what do we know about {topic}?", FAQS_SHORT, 3, None))
+            calls.append((f"Question {i}: which email is about {topic}?", EMAILS, 2, RANK_FIELDS))
+    return calls
+
+
+def timed(reranker, calls, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda call: reranker.rerank(call[0], call[1], top_n=call[2], rank_fields=call[3]), calls))
+    return (time.perf_counter() - start) / len(calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', help="cross-encoder to load with the ONNX backend")
+    parser.add_argument('--model-file', help="quantized ONNX file inside the model, e.g. onnx/model_qint8_avx512_vnni.onnx")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--cohere-key', default=os.environ.get('COHERE_API_KEY'))
+    args = parser.parse_args()
+
+    def make_model():
+        if args.model:
+            return load_cross_encoder(args.model, model_file=args.model_file)
+        return OverlapCrossEncoder(delay_per_pair=0.0002, delay_per_call=0.005)
+
+    backends = [('local', LocalReranker(model=make_model()))]
+    if args.cohere_key:
+        backends.append(('cohere', CohereReranker(api_key=args.cohere_key)))
+
+    for label, reranker in backends:
+        print(f"== {label} ==")
+        for query, documents, top_n, rank_fields in NOTEBOOK_CALLS:
+            print(f"Query: {query.strip()}")
+            for rank, result in enumerate(reranker.rerank(query, documents, top_n, rank_fields), 1):
+                document = documents[result.index]
+                print(f"  {rank}. {result.relevance_score:.3f} {document.get('subject', document['text'][:60])}")
+        print()
+
+    calls = load_queries(args.rounds)
+    runs = [
+        ('local, per-query calls', LocalReranker(model=make_model(), max_wait=0.0, max_batch_pairs=1), calls),
+        ('local, batched', LocalReranker(model=make_model()), calls),
+    ]
+    runs.append(('local, batched, warm cache', runs[-1][1], calls))
+    if args.cohere_key:
+        runs.append(('cohere', CohereReranker(api_key=args.cohere_key), calls[:20]))
+
+    print(f"{len(calls)} queries over faqs_short and emails, {args.concurrency} concurrent\n")
+    print(f"{'backend':30} {'wall ms/query':>14} {'model calls':>12}")
+    for label, reranker, run_calls in runs:
+        before = reranker.stats()['model_calls'] if isinstance(reranker, LocalReranker) else 0
+        latency = timed(reranker, run_calls, args.concurrency)
+        model_calls = reranker.stats()['model_calls'] - before if isinstance(reranker, LocalReranker) else len(run_calls)
+        print(f"{label:30} {latency * 1000:14.2f} {model_calls:12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Check and time the async scraper against the sync one on a local fixture site.
+
+Usage:
+    python bench_scrape.py [fixture_dir] [--pages N] [--rate R]
+
+Serves listing pages from a local HTTP server: saved pages from
+fixture_dir (``gmatclub_*.html`` and ``veritas_*.html``, as for
+bench_parsers.py) or synthetic ones, plus one page whose body is not valid
+for its declared charset. Both scrape modes run against it with the same
+per-host rate limit; the async mode must scrape the same questions, and
+the undecodable page must be dropped without failing the rest.
+"""
+import argparse
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench_parsers import load_pages
+from gmat_scraper import GmatScraper
+
+# Declared UTF-8, but not decodable as UTF-8
+UNDECODABLE_PAGE = b'<html><body>\xff\xfe\xfa broken \xc3\x28</body></html>'
+
+
+def fixture_site(fixture_dir, pages):
+    """Map URL paths to (body, content type) for gmatclub pages and veritas categories."""
+    by_source = {'gmatclub': [], 'veritas': []}
+    for source, html in load_pages(fixture_dir):
+        by_source[source].append(html.encode('utf-8'))
+    routes = {}
+    for page in range(1, pages + 1):
+        html = by_source['gmatclub'][(page - 1) % len(by_source['gmatclub'])]
+        routes[f'/q/quant/page{page}'] = (html, 'text/html; charset=utf-8')
+    routes['/v/math/'] = (by_source['veritas'][0], 'text/html; charset=utf-8')
+    routes['/v/broken/'] = (UNDECODABLE_PAGE, 'text/html; charset=utf-8')
+    return routes
+
+
+def serve(routes):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in routes:
+                self.send_error(404)
+                return
+            body, content_type = routes[self.path]
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_scraper(port, rate):
+    scraper = GmatScraper(requests_per_second=rate)
+    # Two host names for one server, so per-host limits apply to each source separately
+    scraper.base_urls = {
+        'gmatclub': {'base': f'http://127.0.0.1:{port}/q/', 'categories': {'quant': 'quant/'}},
+        'veritas': {'base': f'http://localhost:{port}/v/', 'categories': {'math': 'math/', 'broken': 'broken/'}},
+    }
+    return scraper
+
+
+def comparable(questions):
+    keys = []
+    for question in questions:
+        fields = asdict(question)
+        fields.pop('scraped_date')
+        keys.append(tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in fields.items())))
+    return sorted(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('fixture_dir', nargs='?')
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--rate', type=float, default=5.0, help="requests per second per host")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    server = serve(fixture_site(args.fixture_dir, args.pages))
+    port = server.server_address[1]
+    try:
+        sync_scraper = make_scraper(port, args.rate)
+        start = time.perf_counter()
+        sync_scraper.scrape_all_sources(pages=args.pages)
+        sync_seconds = time.perf_counter() - start
+
+        async_scraper = make_scraper(port, args.rate)
+        start = time.perf_counter()
+        asyncio.run(async_scraper.scrape_all_sources_async(pages=args.pages))
+        async_seconds = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    same = comparable(sync_scraper.questions) == comparable(async_scraper.questions)
+    print(f"{args.pages + 2} pages, {args.rate:g} requests/s per host")
+    print(f"{'mode':8} {'seconds':>8} {'questions':>10}")
+    print(f"{'sync':8} {sync_seconds:8.2f} {len(sync_scraper.questions):10}")
+    print(f"{'async':8} {async_seconds:8.2f} {len(async_scraper.questions):10}")
+    print(f"same questions: {same}")
+    if not same or not async_scraper.questions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
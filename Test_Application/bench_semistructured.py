@@ -0,0 +1,103 @@
+"""Benchmark filtered semi-structured reranking against reranking the whole mailbox.
+
+Usage:
+    python bench_semistructured.py [--emails N] [--queries N] [--candidates K]
+
+Builds a synthetic mailbox from the notebook's email fixture (random
+senders, dates, subjects and bodies) and answers questions like the
+notebook's "What is the pricing that we received from MS?". The baseline
+does what the notebook does per query: serialize every email over the
+rank_fields and rerank all of them. The store serializes and embeds each
+email once, then applies a sender-domain and date-range filter and a dense
+shortlist of K before reranking. Reported per query: latency, pairs sent
+to the reranker, and the share of top results that match the filter.
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from bench_rerank import EMAILS, RANK_FIELDS
+from fake_models import HashEmbeddings, OverlapCrossEncoder
+from reranker import LocalReranker
+from semistructured_store import SemiStructuredStore, sender_domain
+
+SENDERS = sorted({email['from'] for email in EMAILS}) + [
+    "Ana Ruiz <ana_fake_ruiz@ibm.com>", "Wei Chen <wei_fake_chen@mail.microsoft.com>",
+    "Billing <billing@generic_cloud_email.com>", "Raj Patel <raj_fake_patel@oracle.com>",
+]
+TOPICS = ['pricing', 'invoice', 'travel', 'contract', 'roadmap', 'hiring', 'support ticket', 'renewal']
+
+
+def mailbox(size: int, seed: int = 0):
+    rng = random.Random(seed)
+    first_day = date(2023, 1, 1).toordinal()
+    emails = []
+    for i in range(size):
+        template = rng.choice(EMAILS)
+        topic = rng.choice(TOPICS)
+        emails.append({
+            'from': rng.choice(SENDERS),
+            'to': template['to'],
+            'date': date.fromordinal(first_day + rng.randrange(600)).isoformat(),
+            'subject': f"{template['subject']} about {topic} #{i}",
+            'text': f"{template['text']} This concerns the {topic} for item {rng.randrange(10000)}.",
+        })
+    return emails
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--emails', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=10)
+    parser.add_argument('--candidates', type=int, default=20)
+    args = parser.parse_args()
+
+    emails = mailbox(args.emails)
+    rng = random.Random(1)
+    queries = []
+    for i in range(args.queries):
+        start = date(2023, 1, 1) + timedelta(days=rng.randrange(400))
+        filters = {'sender_domain': sender_domain(rng.choice(SENDERS)),
+                   'date_from': start, 'date_to': start + timedelta(days=90)}
+        queries.append((f"What is the {rng.choice(TOPICS)} that we received from {filters['sender_domain']}? ({i})",
+                        filters))
+
+    def model():
+        return OverlapCrossEncoder(delay_per_pair=0.0002, delay_per_call=0.005)
+
+    start = time.perf_counter()
+    store = SemiStructuredStore(HashEmbeddings(128), RANK_FIELDS, reranker=LocalReranker(model=model()))
+    store.add(emails)
+    build = time.perf_counter() - start
+
+    def matches(email, filters):
+        day = date.fromisoformat(email['date'])
+        return (sender_domain(email['from']).endswith(filters['sender_domain'])
+                and filters['date_from'] <= day <= filters['date_to'])
+
+    baseline = LocalReranker(model=model())
+    runs = [
+        ('rerank whole mailbox', lambda q, f: [emails[r.index] for r in baseline.rerank(q, emails, 2, RANK_FIELDS)],
+         baseline),
+        (f'filter + top {args.candidates} + rerank', lambda q, f: [store.documents[r.index] for r in
+                                                               store.rerank(q, top_n=2, candidates=args.candidates, **f)],
+         store.reranker),
+    ]
+    print(f"{len(emails)} emails, {len(queries)} queries; store built once in {build * 1000:.0f} ms\n")
+    print(f"{'method':28} {'ms/query':>9} {'pairs/query':>12} {'top-2 match':>12}")
+    for label, run, reranker in runs:
+        pairs = reranker.batcher.model.pairs
+        hits = total = 0
+        start = time.perf_counter()
+        for query, filters in queries:
+            top = run(query, filters)
+            hits += sum(matches(email, filters) for email in top)
+            total += len(top)
+        latency = (time.perf_counter() - start) / len(queries)
+        pairs = (reranker.batcher.model.pairs - pairs) / len(queries)
+        print(f"{label:28} {latency * 1000:9.1f} {pairs:12.0f} {hits / max(total, 1):12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+
+def create_chrome_driver():
+    """Start a headless Chrome WebDriver."""
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    return webdriver.Chrome(options=chrome_options)
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class BrowserPool:
+    """A fixed-size pool of reusable Selenium drivers.
+
+    Drivers are started lazily, health-checked on checkout, and recycled
+    after ``max_pages`` page loads so long scrapes do not accumulate browser
+    memory. Callers borrow a driver with ``checkout()`` and it is returned to
+    the pool when the ``with`` block exits. A driver discarded after an error
+    frees its slot, and a waiting caller starts a replacement in it.
+    """
+
+    def __init__(self, size: int = 2, max_pages: int = 50,
+                 driver_factory: Callable = create_chrome_driver, timeout: float = 120):
+        self.size = size
+        self.max_pages = max_pages
+        self.driver_factory = driver_factory
+        self.timeout = timeout  # Default wait for a free driver, in seconds
+        self._idle: Deque[_PooledDriver] = deque()
+        self._created = 0
+        self._available = threading.Condition()
+        self._closed = False
+
+    def _is_healthy(self, pooled: _PooledDriver) -> bool:
+        try:
+            pooled.driver.execute_script("return 1")
+            return True
+        except WebDriverException:
+            return False
+
+    def _discard(self, pooled: _PooledDriver) -> None:
+        try:
+            pooled.driver.quit()
+        except WebDriverException as e:
+            logging.warning(f"Error quitting browser: {str(e)}")
+        with self._available:
+            self._created -= 1
+            self._available.notify()
+
+    def _release(self, pooled: _PooledDriver) -> None:
+        with self._available:
+            if not self._closed:
+                self._idle.append(pooled)
+                self._available.notify()
+                return
+        self._discard(pooled)
+
+    def _acquire(self, timeout: Optional[float]) -> _PooledDriver:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._available:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Browser pool is closed")
+                    if self._idle:
+                        pooled = self._idle.popleft()
+                        break
+                    if self._created < self.size:
+                        self._created += 1
+                        pooled = None
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No browser became available within {timeout} seconds")
+                    self._available.wait(remaining)
+
+            if pooled is None:
+                try:
+                    return _PooledDriver(self.driver_factory())
+                except Exception:
+                    with self._available:
+                        self._created -= 1
+                        self._available.notify()
+                    raise
+
+            if pooled.pages < self.max_pages and self._is_healthy(pooled):
+                return pooled
+            logging.info(f"Recycling browser after {pooled.pages} pages")
+            self._discard(pooled)
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None):
+        """Borrow a driver for the duration of a ``with`` block.
+
+        Waits at most ``timeout`` seconds (the pool's default when None) for
+        one to become free, then raises TimeoutError.
+        """
+        pooled = self._acquire(self.timeout if timeout is None else timeout)
+        healthy = True
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            pooled.pages += 1
+            if healthy:
+                self._release(pooled)
+            else:
+                self._discard(pooled)
+
+    def close(self) -> None:
+        """Quit every idle driver; drivers still checked out are quit on return."""
+        with self._available:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._available.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
@@ -0,0 +1,59 @@
+import os
+import time
+
+import pytest
+
+import fake_models
+
+CATEGORIES = [('Quantitative', 'Problem Solving'), ('Quantitative', 'Data Sufficiency'),
+              ('Verbal', 'Critical Reasoning')]
+DIFFICULTIES = ['Easy', 'Medium', 'Hard']
+ANSWER = "The ratio is 3 to 4."
+
+
+def sample_questions(count=30, offset=0):
+    """Small, varied GMAT-like questions for building a test index."""
+    questions = []
+    for i in range(offset, offset + count):
+        category, sub_category = CATEGORIES[i % len(CATEGORIES)]
+        questions.append({
+            'question_text': f"Question {i}: if a ratio of {i} to {i + 7} is scaled by {i % 5 + 2}, what is the result?",
+            'options': [str(i), str(i + 1), str(i + 2)],
+            'correct_answer': str(i),
+            'explanation': f"Scaling keeps the ratio {i} to {i + 7}.",
+            'category': category,
+            'sub_category': sub_category,
+            'difficulty': DIFFICULTIES[(i // 3) % len(DIFFICULTIES)],
+            'source_url': f"https://example.com/q/{i}",
+            'scraped_date': '2024-01-01',
+        })
+    return questions
+
+
+@pytest.fixture(scope='session')
+def rag_app(tmp_path_factory):
+    """RAG_1 running offline: hash embeddings, a fake streaming LLM and a temporary question store.
+
+    RAG_1 opens its stores relative to the working directory on import, so
+    it is imported from inside a temporary directory.
+    """
+    previous = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('rag_app'))
+    try:
+        import RAG_1
+        RAG_1.OpenAIEmbeddings = fake_models.HashEmbeddings
+        RAG_1.get_llm = lambda: fake_models.DelayedTokenLLM(responses=[ANSWER], delay=0.01)
+        # Not due, so requests never start a real scrape
+        RAG_1.scrape_scheduler.last_started = time.time()
+        RAG_1.question_store.add_questions(sample_questions())
+        RAG_1.initialize_qa_system()
+        yield RAG_1
+    finally:
+        os.chdir(previous)
+
+
+@pytest.fixture
+def rag(rag_app):
+    """The offline app with an empty answer cache."""
+    rag_app.get_answer_cache().clear()
+    return rag_app
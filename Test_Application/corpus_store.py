@@ -0,0 +1,207 @@
+import ast
+import json
+import logging
+import os
+import struct
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EMBEDDINGS_FILE = 'embeddings.npy'
+SENTENCES_FILE = 'sentences.txt'
+OFFSETS_FILE = 'offsets.u64'
+
+# Fixed-size NPY v1.0 header, so the shape can be rewritten in place on append
+_NPY_MAGIC = b'\x93NUMPY\x01\x00'
+_NPY_HEADER_SIZE = 128
+
+
+def _npy_header(dtype: np.dtype, rows: int, dim: int) -> bytes:
+    header = repr({'descr': dtype.str, 'fortran_order': False, 'shape': (rows, dim)})
+    body_size = _NPY_HEADER_SIZE - len(_NPY_MAGIC) - 2
+    return _NPY_MAGIC + struct.pack('<H', body_size) + header.ljust(body_size - 1).encode('latin1') + b'\n'
+
+
+def _read_npy_header(f) -> Tuple[np.dtype, int, int]:
+    prefix = f.read(len(_NPY_MAGIC) + 2)
+    if prefix[:len(_NPY_MAGIC)] != _NPY_MAGIC:
+        raise ValueError("not an NPY v1.0 file written by CorpusEmbeddingStore")
+    (body_size,) = struct.unpack('<H', prefix[-2:])
+    header = ast.literal_eval(f.read(body_size).decode('latin1'))
+    rows, dim = header['shape']
+    return np.dtype(header['descr']), rows, dim
+
+
+class CorpusEmbeddingStore:
+    """Append-only on-disk corpus of sentences and their embeddings.
+
+    Replaces the notebook's pickled ``{"sentences", "embeddings"}`` cache.
+    Embeddings live in a standard ``.npy`` matrix (float16 by default) that
+    is memory-mapped, so loading a prefix of N rows only touches those
+    pages. Sentences are stored as UTF-8 text with a separate ``uint64``
+    file of end offsets, so sentence i can be read without parsing the
+    ones before it. Appending writes new rows at the end of both files and
+    then rewrites the fixed-size NPY header in place; the matrix is never
+    rewritten. Nothing is unpickled, so a store is safe to open even if it
+    came from somewhere untrusted.
+    """
+
+    def __init__(self, path: str, dim: Optional[int] = None, dtype: str = 'float16'):
+        self.path = path
+        embeddings_path = os.path.join(path, EMBEDDINGS_FILE)
+        if os.path.exists(embeddings_path):
+            with open(embeddings_path, 'rb') as f:
+                self.dtype, rows, self.dim = _read_npy_header(f)
+            if dim is not None and dim != self.dim:
+                raise ValueError(f"store has dimension {self.dim}, not {dim}")
+            self._rows = self._recover(rows)
+        else:
+            if dim is None:
+                raise ValueError("dim is required to create a new store")
+            os.makedirs(path, exist_ok=True)
+            self.dtype, self.dim, self._rows = np.dtype(dtype), dim, 0
+            with open(embeddings_path, 'wb') as f:
+                f.write(_npy_header(self.dtype, 0, dim))
+            open(os.path.join(path, SENTENCES_FILE), 'wb').close()
+            open(os.path.join(path, OFFSETS_FILE), 'wb').close()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _recover(self, header_rows: int) -> int:
+        """Drop a partially written tail left by an interrupted append."""
+        offsets = os.path.getsize(self._file(OFFSETS_FILE)) // 8
+        rows = min(header_rows, offsets)
+        if rows != header_rows or rows != offsets:
+            logging.warning(f"Corpus store {self.path} was not closed cleanly; keeping {rows} rows")
+            self._truncate(rows)
+        return rows
+
+    def _truncate(self, rows: int) -> None:
+        row_bytes = self.dim * self.dtype.itemsize
+        with open(self._file(EMBEDDINGS_FILE), 'r+b') as f:
+            f.truncate(_NPY_HEADER_SIZE + rows * row_bytes)
+            f.seek(0)
+            f.write(_npy_header(self.dtype, rows, self.dim))
+        with open(self._file(OFFSETS_FILE), 'r+b') as f:
+            f.truncate(rows * 8)
+        end = int(self._offsets()[rows - 1]) if rows else 0
+        with open(self._file(SENTENCES_FILE), 'r+b') as f:
+            f.truncate(end)
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def append(self, sentences: Sequence[str], embeddings) -> None:
+        """Add sentences and their embeddings at the end of the store."""
+        matrix = np.asarray(embeddings, dtype=self.dtype)
+        if matrix.ndim != 2 or matrix.shape != (len(sentences), self.dim):
+            raise ValueError(f"expected embeddings of shape ({len(sentences)}, {self.dim}), got {matrix.shape}")
+        if not len(sentences):
+            return
+
+        encoded = [sentence.encode('utf-8') for sentence in sentences]
+        start = int(self._offsets()[-1]) if self._rows else 0
+        ends = start + np.cumsum([len(data) for data in encoded], dtype='<u8')
+
+        # Write past the last committed row (overwriting any torn tail), data first and
+        # offsets and header last, so an interrupted append is simply not visible
+        row_bytes = self.dim * self.dtype.itemsize
+        for name, position, data in (
+            (EMBEDDINGS_FILE, _NPY_HEADER_SIZE + self._rows * row_bytes, np.ascontiguousarray(matrix).tobytes()),
+            (SENTENCES_FILE, start, b''.join(encoded)),
+            (OFFSETS_FILE, self._rows * 8, ends.tobytes()),
+        ):
+            with open(self._file(name), 'r+b') as f:
+                f.seek(position)
+                f.write(data)
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+        self._rows += len(sentences)
+        with open(self._file(EMBEDDINGS_FILE), 'r+b') as f:
+            f.write(_npy_header(self.dtype, self._rows, self.dim))
+
+    def _offsets(self) -> np.ndarray:
+        if not os.path.getsize(self._file(OFFSETS_FILE)):
+            return np.zeros(0, dtype='<u8')
+        return np.memmap(self._file(OFFSETS_FILE), dtype='<u8', mode='r')
+
+    def embeddings(self, limit: Optional[int] = None) -> np.ndarray:
+        """Memory-mapped view of the first ``limit`` embeddings (all by default)."""
+        rows = self._rows if limit is None else min(limit, self._rows)
+        matrix = np.load(self._file(EMBEDDINGS_FILE), mmap_mode='r')
+        return matrix[:rows]
+
+    def sentences(self, limit: Optional[int] = None) -> List[str]:
+        """The first ``limit`` sentences, reading only the bytes they occupy."""
+        rows = self._rows if limit is None else min(limit, self._rows)
+        if rows == 0:
+            return []
+        ends = np.array(self._offsets()[:rows], dtype=np.int64)
+        with open(self._file(SENTENCES_FILE), 'rb') as f:
+            data = f.read(int(ends[-1]))
+        starts = np.concatenate(([0], ends[:-1]))
+        return [data[start:end].decode('utf-8') for start, end in zip(starts, ends)]
+
+    def sentence(self, index: int) -> str:
+        offsets = self._offsets()
+        start = int(offsets[index - 1]) if index else 0
+        with open(self._file(SENTENCES_FILE), 'rb') as f:
+            f.seek(start)
+            return f.read(int(offsets[index]) - start).decode('utf-8')
+
+    def load(self, limit: Optional[int] = None) -> Tuple[List[str], np.ndarray]:
+        """(sentences, embeddings) for the first ``limit`` rows, like the notebook's sliced pickle."""
+        return self.sentences(limit), self.embeddings(limit)
+
+    def info(self) -> dict:
+        return {'rows': self._rows, 'dim': self.dim, 'dtype': self.dtype.name, 'path': self.path}
+
+
+def open_corpus_store(path: str, sentences: Iterable[str] = (), encode=None, dim: Optional[int] = None,
+                      dtype: str = 'float16', batch_size: int = 1024) -> CorpusEmbeddingStore:
+    """Open a store, creating it and encoding ``sentences`` in batches if it does not exist yet."""
+    if os.path.exists(os.path.join(path, EMBEDDINGS_FILE)):
+        return CorpusEmbeddingStore(path)
+    store = None
+    batch: List[str] = []
+
+    def flush():
+        nonlocal store
+        vectors = np.asarray(encode(batch), dtype='float32')
+        if store is None:
+            store = CorpusEmbeddingStore(path, dim=vectors.shape[1], dtype=dtype)
+        store.append(batch, vectors)
+        batch.clear()
+
+    for sentence in sentences:
+        batch.append(sentence)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    if store is None:
+        if dim is None:
+            raise ValueError("dim is required to create an empty store")
+        store = CorpusEmbeddingStore(path, dim=dim, dtype=dtype)
+    logging.info(f"Created corpus store {json.dumps(store.info())}")
+    return store
+
+
+def import_pickle(pickle_path: str, path: str, dtype: str = 'float16') -> CorpusEmbeddingStore:
+    """Convert a notebook ``quora-embeddings-*.pkl`` cache into a store.
+
+    Only use this on pickle files you created yourself: unpickling runs
+    arbitrary code, which is the reason for moving off the format.
+    """
+    import pickle
+    with open(pickle_path, 'rb') as f:
+        data = pickle.load(f)
+    embeddings = data['embeddings']
+    if hasattr(embeddings, 'cpu'):
+        embeddings = embeddings.cpu().numpy()
+    embeddings = np.asarray(embeddings, dtype='float32')
+    store = CorpusEmbeddingStore(path, dim=embeddings.shape[1], dtype=dtype)
+    store.append(list(data['sentences']), embeddings)
+    return store
@@ -0,0 +1,186 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from langchain.embeddings.base import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper backed by an on-disk, content-addressed SQLite cache.
+
+    Vectors are keyed by a hash of the embedding model name and the chunk text,
+    so unchanged chunks are never sent to the underlying embedder twice. The
+    cache holds at most ``max_entries`` vectors and evicts the least recently
+    used ones beyond that.
+
+    Query vectors are kept in memory for the last ``query_cache_size``
+    distinct queries, so a question embedded by the answer cache is not
+    embedded again by retrieval moments later.
+    """
+
+    def __init__(self, embeddings: Embeddings, path: str = 'embedding_cache.sqlite',
+                 max_entries: int = 100_000, model_name: Optional[str] = None,
+                 query_cache_size: int = 1024):
+        self.embeddings = embeddings
+        self.path = path
+        self.max_entries = max_entries
+        self.model_name = model_name or getattr(embeddings, 'model', None) or type(embeddings).__name__
+        self.query_cache_size = query_cache_size
+        self.hits = 0
+        self.misses = 0
+        self.query_hits = 0
+        self.query_misses = 0
+        self._queries: 'OrderedDict[str, List[float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        # Running entry count, so eviction does not scan the table on every store
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _key(self, text: str) -> str:
+        """Hash the model name and text into a cache key."""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode('utf-8')).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Fetch cached vectors for the given keys and mark them as recently used."""
+        found = {}
+        now = time.time()
+        unique_keys = list(dict.fromkeys(keys))
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(unique_keys), 500):
+            batch = unique_keys[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = array('f', blob).tolist()
+            self._conn.execute(
+                f"UPDATE embeddings SET last_used = ? WHERE key IN ({placeholders})", [now, *batch]
+            )
+        self._conn.commit()
+        return found
+
+    def _store(self, items: Dict[str, List[float]]) -> None:
+        """Insert new vectors and evict the least recently used ones over the size cap.
+
+        Must be called with the lock held.
+        """
+        now = time.time()
+        # Keys are content hashes, so a row stored meanwhile by another caller already holds this vector
+        inserted = self._conn.executemany(
+            "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+            [(key, array('f', vector).tobytes(), now) for key, vector in items.items()]
+        ).rowcount
+        self._entries += max(inserted, 0)
+        overflow = self._entries - self.max_entries
+        if overflow > 0:
+            evicted = self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (overflow,)
+            ).rowcount
+            self._entries -= evicted
+            logging.info(f"Evicted {evicted} entries from the embedding cache")
+        self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, only calling the underlying embedder for cache misses."""
+        keys = [self._key(text) for text in texts]
+
+        with self._lock:
+            cached = self._lookup(keys)
+            miss_count = sum(1 for key in keys if key not in cached)
+            self.hits += len(keys) - miss_count
+            self.misses += miss_count
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            with self._lock:
+                self._store(fresh)
+            cached.update(fresh)
+
+        return [cached[key] for key in keys]
+
+    def _recent_query(self, text: str) -> Optional[List[float]]:
+        """Look up a recently embedded query; must be called with the lock held."""
+        vector = self._queries.get(text)
+        if vector is None:
+            self.query_misses += 1
+            return None
+        self._queries.move_to_end(text)
+        self.query_hits += 1
+        return vector
+
+    def _remember_queries(self, vectors: Dict[str, List[float]]) -> None:
+        with self._lock:
+            self._queries.update(vectors)
+            for text in vectors:
+                self._queries.move_to_end(text)
+            while len(self._queries) > self.query_cache_size:
+                self._queries.popitem(last=False)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing the vector if the same query was embedded recently."""
+        with self._lock:
+            vector = self._recent_query(text)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._remember_queries({text: vector})
+        return list(vector)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of queries, sending only those not embedded recently in one call."""
+        with self._lock:
+            found = {}
+            for text in dict.fromkeys(texts):
+                vector = self._recent_query(text)
+                if vector is not None:
+                    found[text] = vector
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        if missing:
+            fresh = dict(zip(missing, self.embeddings.embed_documents(missing)))
+            self._remember_queries(fresh)
+            found.update(fresh)
+        return [list(found[text]) for text in texts]
+
+    def __len__(self) -> int:
+        return self._entries
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current cache size."""
+        with self._lock:
+            hits, misses, entries = self.hits, self.misses, self._entries
+            query_hits, query_misses = self.query_hits, self.query_misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'query_hits': query_hits,
+            'query_misses': query_misses,
+        }
+
+    def close(self) -> None:
+        self._conn.close()
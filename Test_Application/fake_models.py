@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import math
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain.embeddings.base import Embeddings
+from langchain.llms.base import LLM
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic, offline embedder for tests and benchmarks.
+
+    Each token is hashed into one of ``size`` buckets and the resulting bag of
+    words is L2-normalised, so texts sharing vocabulary score as similar
+    without any network calls.
+    """
+
+    def __init__(self, size: int = 256):
+        self.size = size
+        self.model = f"hash-{size}"
+        self.calls = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+        for token in re.findall(r"\w+", text.lower()):
+            bucket = int(hashlib.md5(token.encode('utf-8')).hexdigest(), 16) % self.size
+            vector[bucket] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        return self._embed(text)
+
+
+class DelayedTokenLLM(LLM):
+    """Offline LLM that emits canned responses word by word with a delay.
+
+    Tokens are reported through ``on_llm_new_token`` like a streaming
+    OpenAI model, so streaming endpoints can be exercised without network
+    access. Responses are returned in turn, cycling when exhausted.
+    """
+
+    responses: List[str] = ["This is a streamed answer from the fake model."]
+    delay: float = 0.05
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "delayed-token-fake"
+
+    def _next_tokens(self) -> List[str]:
+        response = self.responses[self.calls % len(self.responses)]
+        self.calls += 1
+        return re.findall(r"\S+\s*", response)
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        tokens = self._next_tokens()
+        for token in tokens:
+            time.sleep(self.delay)
+            if run_manager:
+                run_manager.on_llm_new_token(token)
+        return "".join(tokens)
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None,
+                     run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        tokens = self._next_tokens()
+        for token in tokens:
+            await asyncio.sleep(self.delay)
+            if run_manager:
+                await run_manager.on_llm_new_token(token)
+        return "".join(tokens)
+
+
+class OverlapCrossEncoder:
+    """Offline stand-in for a sentence-transformers CrossEncoder.
+
+    Scores each (query, text) pair by the Jaccard overlap of their words and
+    sleeps ``delay_per_pair`` seconds per pair, plus ``delay_per_call`` per
+    ``predict`` call for the fixed overhead of a model invocation, to mimic
+    model latency.
+    """
+
+    def __init__(self, delay_per_pair: float = 0.0, delay_per_call: float = 0.0):
+        self.delay_per_pair = delay_per_pair
+        self.delay_per_call = delay_per_call
+        self.calls = 0
+        self.pairs = 0
+
+    def predict(self, pairs, batch_size: int = 32, **kwargs) -> List[float]:
+        self.calls += 1
+        self.pairs += len(pairs)
+        time.sleep(self.delay_per_call + self.delay_per_pair * len(pairs))
+        scores = []
+        for query, text in pairs:
+            a, b = set(re.findall(r"\w+", query.lower())), set(re.findall(r"\w+", text.lower()))
+            scores.append(len(a & b) / len(a | b) if a | b else 0.0)
+        return scores
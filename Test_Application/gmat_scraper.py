@@ -1,7 +1,10 @@
 import requests
-from bs4 import BeautifulSoup
-import json
+from requests.adapters import HTTPAdapter
+import asyncio
+from concurrent.futures import Future, ProcessPoolExecutor
+import multiprocessing
 import os
+import threading
 from typing import List, Dict, Optional
 import time
 import random
@@ -9,11 +12,16 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 import logging
 from fake_useragent import UserAgent
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from urllib.parse import urlsplit
+from async_fetcher import AsyncFetcher, TokenBucket
+from browser_pool import BrowserPool
+from page_cache import UNCHANGED, PageCache
+from html_parsers import available_backends, parse_page
+from question_classifier import Classification, QuestionClassifier
+from question_store import QuestionStore
 
 # Set up logging
 logging.basicConfig(
@@ -34,14 +42,39 @@ class GmatQuestion:
     scraped_date: str
 
 class GmatScraper:
-    def __init__(self, use_selenium: bool = False):
+    # Keyword matcher compiled once at class load and shared by every instance
+    classifier = QuestionClassifier()
+
+    def __init__(self, use_selenium: bool = False, requests_per_second: float = 0.2,
+                 browser_pool: Optional[BrowserPool] = None, pool_size: int = 2,
+                 page_cache: Optional[PageCache] = None, parser_backend: Optional[str] = None,
+                 parse_workers: Optional[int] = None):
         self.ua = UserAgent()
         self.questions: List[GmatQuestion] = []
         self.use_selenium = use_selenium
-        self.driver = None
+        self.requests_per_second = requests_per_second  # Per-host politeness limit
+        self._rate_limiters: Dict[str, TokenBucket] = {}
+        self._rate_limiters_lock = threading.Lock()  # Renders run on several threads at once
+        self.fetch_counts = {'static': 0, 'browser': 0}
+        
+        # One pooled session keeps connections alive across pages of the same host
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=10))
+        self.session.mount('http://', HTTPAdapter(pool_connections=10, pool_maxsize=10))
+        
+        # Optional ETag/Last-Modified cache so unchanged pages are neither downloaded nor parsed
+        self.page_cache = page_cache
+        
+        # Pages are parsed with this backend ('bs4', 'lxml' or 'selectolax', by default the
+        # fastest installed) in a pool of parse_workers processes (one per CPU by default),
+        # or in the calling thread when it is 0
+        self.parser_backend = parser_backend or available_backends()[-1]
+        self.parse_workers = parse_workers
         
-        if use_selenium:
-            self._setup_selenium()
+        # Browsers are only started when a page actually needs JavaScript rendering
+        self.browser_pool = browser_pool
+        if use_selenium and browser_pool is None:
+            self.browser_pool = BrowserPool(size=pool_size)
         
         self.base_urls = {
             'gmatclub': {
@@ -68,14 +101,6 @@ class GmatScraper:
             }
         }
 
-    def _setup_selenium(self):
-        """Set up Selenium WebDriver with Chrome in headless mode."""
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        self.driver = webdriver.Chrome(options=chrome_options)
-
     def _get_random_headers(self) -> Dict[str, str]:
         """Generate random headers for requests."""
         return {
@@ -87,26 +112,64 @@ class GmatScraper:
             'Upgrade-Insecure-Requests': '1',
         }
 
-    def _make_request(self, url: str, use_selenium: bool = False) -> Optional[BeautifulSoup]:
-        """Make HTTP request with error handling, retries, and optional Selenium support."""
+    def _wait_for_host(self, url: str) -> None:
+        """Block until the per-host rate limit allows another request to this URL's host."""
+        host = urlsplit(url).netloc
+        with self._rate_limiters_lock:
+            bucket = self._rate_limiters.setdefault(host, TokenBucket(self.requests_per_second))
+        bucket.acquire()
+
+    def _remember_needs_browser(self, url: str, missing: bool) -> bool:
+        if self.page_cache:
+            self.page_cache.set_needs_browser(url, missing)
+        return missing
+
+    def _skip_unchanged(self, url: str) -> None:
+        logging.info(f"{url} is unchanged since the last scrape, skipping it")
+        self.page_cache.record_skipped_parse()
+
+    def _render_page_source(self, url: str) -> str:
+        """Load a page in a pooled browser and return the rendered HTML.
+
+        Held to the same per-host rate limit as plain requests; the wait
+        happens before a browser is checked out, so it does not hold one idle.
+        """
+        self._wait_for_host(url)
+        with self.browser_pool.checkout() as driver:
+            driver.get(url)
+            # Wait for the content to load
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            )
+            self.fetch_counts['browser'] += 1
+            return driver.page_source
+
+    def _make_request(self, url: str, use_selenium: bool = False):
+        """Fetch a page's HTML with retries, or render it in a browser with ``use_selenium``.
+
+        Returns None if every attempt fails. With a page cache the request is
+        conditional, and ``UNCHANGED`` is returned when the page has not
+        changed since the last scrape, since there is nothing new to parse.
+        """
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                if use_selenium and self.driver:
-                    self.driver.get(url)
-                    # Wait for the content to load
-                    WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "body"))
-                    )
-                    return BeautifulSoup(self.driver.page_source, 'html.parser')
-                else:
-                    response = requests.get(
-                        url,
-                        headers=self._get_random_headers(),
-                        timeout=10
-                    )
+                if use_selenium and self.browser_pool:
+                    return self._render_page_source(url)
+
+                self._wait_for_host(url)
+                headers = self._get_random_headers()
+                if self.page_cache:
+                    headers.update(self.page_cache.conditional_headers(url))
+                response = self.session.get(url, headers=headers, timeout=10)
+                if response.status_code != 304:
                     response.raise_for_status()
-                    return BeautifulSoup(response.text, 'html.parser')
+                self.fetch_counts['static'] += 1
+
+                if self.page_cache and self.page_cache.update(url, response.status_code,
+                                                              response.headers, response.content):
+                    return UNCHANGED
+                return response.text
             except Exception as e:
                 logging.error(f"Request failed (attempt {attempt + 1}/{max_retries}): {str(e)}")
                 if attempt < max_retries - 1:
@@ -114,269 +177,251 @@ class GmatScraper:
                 continue
         return None
 
-    def _extract_text_safely(self, element, selector: str = None, class_name: str = None, 
-                           attribute: str = None) -> str:
-        """Enhanced safe text extraction with multiple fallback methods."""
+    def _parse_executor(self) -> Optional[ProcessPoolExecutor]:
+        """A process pool for parsing, or None to parse in the calling thread.
+
+        Workers are not forked: the scraper usually runs in a threaded server
+        process, and a forked child can inherit a lock another thread holds.
+        """
+        if self.parse_workers == 0:
+            return None
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        return ProcessPoolExecutor(self.parse_workers, mp_context=multiprocessing.get_context(method))
+
+    def _parse(self, executor, source: str, html: str):
+        """Submit a page to the parser backend; returns a future of (containers found, records)."""
+        if executor is None:
+            future = Future()
+            future.set_result(parse_page(self.parser_backend, source, html))
+            return future
+        return executor.submit(parse_page, self.parser_backend, source, html)
+
+    def _render_and_parse(self, executor, source: str, url: str) -> List[Dict]:
         try:
-            if not element:
-                return ""
-
-            # Try direct selector with class
-            if selector and class_name:
-                found = element.find(selector, class_=class_name)
-                if found:
-                    return found.get_text(strip=True)
-
-            # Try finding by attribute
-            if attribute:
-                found = element.find(attrs={attribute: True})
-                if found:
-                    return found.get_text(strip=True)
-
-            # Try direct class name
-            if class_name:
-                found = element.find(class_=class_name)
-                if found:
-                    return found.get_text(strip=True)
-
-            # Try direct selector
-            if selector:
-                found = element.find(selector)
-                if found:
-                    return found.get_text(strip=True)
-
-            # If all else fails, try to get text directly
-            text = element.get_text(strip=True)
-            return text if text else ""
-
+            html = self._render_page_source(url)
         except Exception as e:
-            logging.warning(f"Error extracting text: {str(e)}")
-            return ""
+            logging.error(f"Browser rendering failed for {url}: {str(e)}")
+            return []
+        return self._parse(executor, source, html).result()[1]
+
+    def _scrape_pages(self, targets: List[tuple]) -> List[GmatQuestion]:
+        """Fetch (source, category, url) listing pages in turn and extract their questions.
+
+        Each page is handed to the parser pool as soon as it arrives, so
+        parsing overlaps with fetching the next page. Pages are fetched with
+        plain requests; only those whose static HTML has no questions (now or,
+        if unchanged, last time) are rendered in the browser pool.
+        """
+        executor = self._parse_executor()
+        pending = []
+        try:
+            for source, category, url in targets:
+                html = self._make_request(url)
+                if html is UNCHANGED:
+                    if self.browser_pool and self.page_cache.needs_browser(url):
+                        pending.append((source, category, url, None))
+                    else:
+                        self._skip_unchanged(url)
+                elif html is not None:
+                    pending.append((source, category, url, self._parse(executor, source, html)))
+
+            questions = []
+            for source, category, url, parsed in pending:
+                if parsed is None:
+                    records = self._render_and_parse(executor, source, url)
+                else:
+                    found, records = parsed.result()
+                    if self._remember_needs_browser(url, found == 0) and self.browser_pool:
+                        logging.info(f"Static HTML of {url} has no questions, rendering in browser")
+                        records = self._render_and_parse(executor, source, url)
+                for record in records:
+                    question = self._question_from_record(record, source, category, url)
+                    if question:
+                        questions.append(question)
+                        logging.info(f"Successfully scraped question from {source}: {question.question_text[:50]}...")
+            return questions
+        finally:
+            if executor:
+                executor.shutdown()
 
     def scrape_gmatclub(self, category: str = 'quant', pages: int = 5) -> List[GmatQuestion]:
         """Scrape GMAT questions from GMAT Club."""
-        questions = []
         logging.info(f"Scraping GMAT Club - {category}...")
-
         base_url = self.base_urls['gmatclub']['base']
         category_path = self.base_urls['gmatclub']['categories'].get(category, '')
-        
-        for page in range(1, pages + 1):
-            url = f"{base_url}{category_path}page{page}"
-            soup = self._make_request(url, use_selenium=True)
-            
-            if not soup:
-                continue
-
-            question_threads = soup.find_all('div', class_='question-thread')
-            
-            for thread in question_threads:
-                try:
-                    # Extract question details
-                    question_text = self._extract_text_safely(thread, 'div', 'question-content')
-                    if not question_text:
-                        continue
-
-                    options = []
-                    options_container = thread.find('div', class_='answer-choices')
-                    if options_container:
-                        for opt in options_container.find_all(['div', 'p'], class_='choice'):
-                            opt_text = opt.get_text(strip=True)
-                            if opt_text:
-                                options.append(opt_text)
-
-                    # Extract other metadata
-                    difficulty = self._extract_text_safely(thread, 'span', 'difficulty-label')
-                    explanation = self._extract_text_safely(thread, 'div', 'explanation-content')
-                    correct_answer = self._extract_text_safely(thread, 'div', 'correct-answer')
-
-                    if question_text and options:
-                        question = GmatQuestion(
-                            question_text=question_text,
-                            options=options,
-                            correct_answer=correct_answer or "Not provided",
-                            explanation=explanation or "Not provided",
-                            category=category.capitalize(),
-                            sub_category=self._determine_subcategory(question_text),
-                            difficulty=difficulty or self._determine_difficulty(question_text),
-                            source_url=url,
-                            scraped_date=datetime.now().isoformat()
-                        )
-                        questions.append(question)
-                        logging.info(f"Successfully scraped question from GMAT Club: {question_text[:50]}...")
-
-                except Exception as e:
-                    logging.error(f"Error processing GMAT Club question: {str(e)}")
-                    continue
-
-            # Add delay between pages
-            time.sleep(random.uniform(3, 7))
-
-        return questions
+        return self._scrape_pages([
+            ('gmatclub', category, f"{base_url}{category_path}page{page}") for page in range(1, pages + 1)
+        ])
 
     def scrape_veritas(self) -> List[GmatQuestion]:
         """Scrape GMAT questions from Veritas Prep."""
-        questions = []
         logging.info("Scraping Veritas Prep...")
-
-        for category, path in self.base_urls['veritas']['categories'].items():
-            url = f"{self.base_urls['veritas']['base']}{path}"
-            soup = self._make_request(url, use_selenium=True)
-            
-            if not soup:
-                continue
-
-            question_containers = soup.find_all('div', class_=['practice-question', 'question-container'])
-            
-            for container in question_containers:
-                try:
-                    question_text = self._extract_text_safely(container, 'div', 'question-stem')
-                    if not question_text:
-                        continue
-
-                    options = []
-                    options_div = container.find('div', class_='answer-choices')
-                    if options_div:
-                        for opt in options_div.find_all(['div', 'p'], class_='choice'):
-                            opt_text = opt.get_text(strip=True)
-                            if opt_text:
-                                options.append(opt_text)
-
-                    correct_answer = self._extract_text_safely(container, 'div', 'correct-answer')
-                    explanation = self._extract_text_safely(container, 'div', 'solution')
-                    difficulty = self._extract_text_safely(container, 'span', 'difficulty')
-
-                    if question_text and options:
-                        question = GmatQuestion(
-                            question_text=question_text,
-                            options=options,
-                            correct_answer=correct_answer or "Not provided",
-                            explanation=explanation or "Not provided",
-                            category=category.capitalize(),
-                            sub_category=self._determine_subcategory(question_text),
-                            difficulty=difficulty or self._determine_difficulty(question_text),
-                            source_url=url,
-                            scraped_date=datetime.now().isoformat()
-                        )
-                        questions.append(question)
-                        logging.info(f"Successfully scraped question from Veritas: {question_text[:50]}...")
-
-                except Exception as e:
-                    logging.error(f"Error processing Veritas question: {str(e)}")
-                    continue
-
-            time.sleep(random.uniform(2, 5))
-
-        return questions
+        return self._scrape_pages([
+            ('veritas', category, f"{self.base_urls['veritas']['base']}{path}")
+            for category, path in self.base_urls['veritas']['categories'].items()
+        ])
 
     def _determine_category(self, question_text: str) -> str:
         """Enhanced category determination with more keywords."""
-        keywords = {
-            'Quantitative': [
-                'calculate', 'solve', 'equation', 'number', 'percentage', 'ratio', 'math',
-                'quantity', 'geometric', 'algebra', 'arithmetic', 'probability', 'average',
-                'mean', 'median', 'mode', 'standard deviation', 'profit', 'loss', 'interest'
-            ],
-            'Verbal': [
-                'passage', 'argument', 'sentence', 'grammar', 'correct', 'read', 'text',
-                'paragraph', 'conclusion', 'premise', 'author', 'meaning', 'vocabulary',
-                'structure', 'reasoning', 'inference', 'strengthen', 'weaken'
-            ],
-            'Data Insights': [
-                'graph', 'table', 'data', 'chart', 'interpret', 'analysis', 'trend',
-                'statistics', 'correlation', 'relationship', 'pattern', 'visualization',
-                'dashboard', 'metric', 'measurement', 'indicator'
-            ]
-        }
-        
-        # Convert question text to lowercase for case-insensitive matching
-        question_lower = question_text.lower()
-        
-        # Count matches for each category
-        category_scores = {
-            category: sum(1 for word in words if word.lower() in question_lower)
-            for category, words in keywords.items()
-        }
-        
-        # Return the category with the most matches, or "Uncategorized" if no matches
-        max_score = max(category_scores.values())
-        if max_score > 0:
-            return max(category_scores.items(), key=lambda x: x[1])[0]
-        return "Uncategorized"
+        return self.classifier.classify(question_text).category
 
     def _determine_subcategory(self, question_text: str) -> str:
         """Enhanced subcategory determination."""
-        subcategory_patterns = {
-            'Problem Solving': ['solve', 'calculate', 'find', 'what is', 'how many'],
-            'Data Sufficiency': ['sufficient', 'determine', 'could be determined', 'statement'],
-            'Critical Reasoning': ['argument', 'conclusion', 'premise', 'strengthen', 'weaken'],
-            'Reading Comprehension': ['passage', 'author', 'paragraph', 'according to'],
-            'Sentence Correction': ['sentence', 'grammar', 'correct', 'properly'],
-            'Integrated Reasoning': ['table', 'graph', 'data', 'information']
-        }
-
-        question_lower = question_text.lower()
-        for subcategory, patterns in subcategory_patterns.items():
-            if any(pattern in question_lower for pattern in patterns):
-                return subcategory
-        return "Other"
+        return self.classifier.classify(question_text).sub_category
 
     def _determine_difficulty(self, question_text: str) -> str:
         """Enhanced difficulty determination based on various factors."""
-        # Word count as a basic complexity indicator
-        word_count = len(question_text.split())
-        
-        # Look for complexity indicators
-        complexity_indicators = {
-            'Hard': ['however', 'nevertheless', 'conversely', 'complex', 'challenging'],
-            'Medium': ['therefore', 'consequently', 'furthermore', 'moreover'],
-            'Easy': ['simple', 'straightforward', 'basic', 'direct']
-        }
+        return self.classifier.classify(question_text).difficulty
 
-        question_lower = question_text.lower()
-        
-        # Check for explicit difficulty indicators
-        for difficulty, indicators in complexity_indicators.items():
-            if any(indicator in question_lower for indicator in indicators):
-                return difficulty
-
-        # Use word count as a fallback
-        if word_count > 100:
-            return "Hard"
-        elif word_count > 50:
-            return "Medium"
-        return "Easy"
-
-    def scrape_all_sources(self) -> None:
-        """Scrape questions from all available sources."""
-        try:
-            # Scrape GMAT Club
-            for category in self.base_urls['gmatclub']['categories'].keys():
-                self.questions.extend(self.scrape_gmatclub(category))
+    def classify_questions(self, questions: List[GmatQuestion]) -> List[Classification]:
+        """Classify a whole list of questions in one pass over their texts."""
+        return self.classifier.classify_batch([q.question_text for q in questions])
 
-            # Scrape Veritas Prep
-            self.questions.extend(self.scrape_veritas())
+    def scrape_all_sources(self, pages: int = 5) -> None:
+        """Scrape questions from all available sources, one page at a time."""
+        try:
+            # GMAT Club pages, then Veritas Prep, sharing one parser pool
+            self.questions.extend(self._scrape_pages(self._listing_pages(pages)))
 
             logging.info(f"Total questions scraped: {len(self.questions)}")
+            if self.page_cache:
+                logging.info(f"Page cache metrics: {self.page_cache.metrics}")
 
         except Exception as e:
             logging.error(f"Error during scraping: {str(e)}")
         finally:
-            if self.driver:
-                self.driver.quit()
+            self.close()
+
+    def close(self) -> None:
+        """Shut down any pooled browsers. Safe to call more than once."""
+        if self.browser_pool:
+            self.browser_pool.close()
+
+    def _listing_pages(self, pages: int = 5) -> List[tuple]:
+        """List every (source, category, url) listing page to scrape."""
+        targets = []
+        gmatclub = self.base_urls['gmatclub']
+        for category, path in gmatclub['categories'].items():
+            for page in range(1, pages + 1):
+                targets.append(('gmatclub', category, f"{gmatclub['base']}{path}page{page}"))
+
+        veritas = self.base_urls['veritas']
+        for category, path in veritas['categories'].items():
+            targets.append(('veritas', category, f"{veritas['base']}{path}"))
+        return targets
+
+    def _question_from_record(self, record: Dict, source: str, category: str, url: str) -> Optional[GmatQuestion]:
+        """Turn a raw record from html_parsers into a GmatQuestion, as the page parsers do."""
+        if not record['question_text'] or not record['options']:
+            return None
+        classification = self.classifier.classify(record['question_text'])
+        return GmatQuestion(
+            question_text=record['question_text'],
+            options=record['options'],
+            correct_answer=record['correct_answer'] or "Not provided",
+            explanation=record['explanation'] or "Not provided",
+            category=category.capitalize(),
+            sub_category=classification.sub_category,
+            difficulty=record['difficulty'] or classification.difficulty,
+            source_url=url,
+            scraped_date=datetime.now().isoformat()
+        )
+
+    async def _parse_off_loop(self, executor, source: str, html: str):
+        """Parse a page in the executor so CPU-bound parsing never blocks fetching."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, parse_page, self.parser_backend, source, html)
+
+    async def _fetch_and_parse(self, fetcher: AsyncFetcher, executor, source: str, url: str):
+        """Fetch one listing page and parse it as soon as it arrives.
+
+        Returns (needs_browser, records); records is empty when the page
+        failed, was unchanged, or has to be rendered in a browser first.
+        """
+        body = await fetcher.fetch(url)
+        if body is None:
+            return False, []
+        self.fetch_counts['static'] += 1
+        if body is UNCHANGED:
+            if self.browser_pool and self.page_cache.needs_browser(url):
+                return True, []
+            self._skip_unchanged(url)
+            return False, []
+
+        found, records = await self._parse_off_loop(executor, source, body)
+        missing = self._remember_needs_browser(url, found == 0)
+        return missing and self.browser_pool is not None, records
+
+    async def scrape_all_sources_async(self, pages: int = 5, max_per_host: int = 4,
+                                       rate_per_host: Optional[float] = None) -> None:
+        """Scrape all sources concurrently over plain HTTP.
+
+        Pages from different hosts are fetched in parallel; each host is held
+        to ``max_per_host`` concurrent requests and ``rate_per_host`` requests
+        per second (defaults to ``requests_per_second``). Each page is parsed
+        with ``parser_backend`` off the event loop as soon as it arrives.
+        """
+        targets = self._listing_pages(pages)
+        fetcher = AsyncFetcher(
+            max_per_host=max_per_host,
+            rate_per_host=rate_per_host or self.requests_per_second,
+            headers_factory=self._get_random_headers,
+            page_cache=self.page_cache
+        )
+        executor = self._parse_executor()
+
+        try:
+            async with fetcher:
+                results = await asyncio.gather(
+                    *(self._fetch_and_parse(fetcher, executor, source, url) for source, _, url in targets)
+                )
+            parsed = {url: records for (_, _, url), (_, records) in zip(targets, results)}
+
+            # Render only the pages whose static HTML lacks questions; the pool bounds concurrency
+            needs_browser = [
+                (source, url) for (source, _, url), (render, _) in zip(targets, results) if render
+            ]
+            if needs_browser:
+                logging.info(f"Rendering {len(needs_browser)} pages in the browser pool")
+                rendered = await asyncio.gather(
+                    *(asyncio.to_thread(self._render_page_source, url) for _, url in needs_browser),
+                    return_exceptions=True
+                )
+                for (source, url), html in zip(needs_browser, rendered):
+                    if isinstance(html, Exception):
+                        logging.error(f"Browser rendering failed for {url}: {str(html)}")
+                        continue
+                    _, parsed[url] = await self._parse_off_loop(executor, source, html)
+        finally:
+            if executor:
+                executor.shutdown()
+
+        for source, category, url in targets:
+            for record in parsed[url]:
+                question = self._question_from_record(record, source, category, url)
+                if question:
+                    self.questions.append(question)
+
+        logging.info(f"Total questions scraped: {len(self.questions)}")
+        if self.page_cache:
+            logging.info(f"Page cache metrics: {self.page_cache.metrics}")
 
-    def save_questions(self, output_file: str = 'gmat_questions.json') -> None:
-        """Save scraped questions to a JSON file."""
+    def save_questions(self, output_file: str = 'gmat_questions.sqlite') -> None:
+        """Add scraped questions to the question store, skipping ones already saved."""
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump([asdict(q) for q in self.questions], f, indent=2, ensure_ascii=False)
-            logging.info(f"Successfully saved {len(self.questions)} questions to {output_file}")
+            store = QuestionStore(output_file)
+            added = store.add_questions(asdict(q) for q in self.questions)
+            store.close()
+            # Only now may the scraped pages count as seen
+            if self.page_cache:
+                self.page_cache.commit()
+            logging.info(f"Saved {len(added)} new of {len(self.questions)} scraped questions to {output_file}")
         except Exception as e:
             logging.error(f"Error saving questions: {str(e)}")
 
 def main():
     # Create scraper instance with Selenium support
-    scraper = GmatScraper(use_selenium=True)
+    scraper = GmatScraper(use_selenium=True, page_cache=PageCache())
     
     try:
         # Scrape all sources
@@ -388,9 +433,8 @@ def main():
     except Exception as e:
         logging.error(f"Error in main execution: {str(e)}")
     finally:
-        # Ensure the browser is closed
-        if scraper.driver:
-            scraper.driver.quit()
+        # Ensure the browsers are closed
+        scraper.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,26 @@
+# Gunicorn settings for serving RAG_1 with several workers:
+#   gunicorn -c gunicorn.conf.py RAG_1:app
+#   gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi_app:app  (async mode)
+#
+# The persisted FAISS index is built (or validated) once before forking, in
+# a child process, so the master never imports RAG_1 and never opens its
+# SQLite connections (question store, embedding cache, page cache) for the
+# workers to inherit. Each worker then imports the app after the fork and
+# memory-maps the same index file read-only, so the vectors live once in
+# the OS page cache instead of once per worker.
+import subprocess
+import sys
+
+bind = '127.0.0.1:5000'
+workers = 4
+
+
+def on_starting(server):
+    """Build and persist the index once, before any worker starts."""
+    subprocess.run([sys.executable, '-c', 'import RAG_1; RAG_1.initialize_qa_system()'], check=True)
+
+
+def post_worker_init(worker):
+    """Load the persisted index into the worker via a shared memory map."""
+    import RAG_1
+    RAG_1.initialize_qa_system()
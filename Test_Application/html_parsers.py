@@ -0,0 +1,216 @@
+import logging
+from typing import Dict, List, Tuple
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import html as lxml_html
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    lxml_html = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# Where each field lives on a listing page, as (tag, class) pairs mirroring
+# the arguments GmatScraper passes to _extract_text_safely.
+SOURCE_LAYOUTS = {
+    'gmatclub': {
+        'container': 'div.question-thread',
+        'fields': {
+            'question_text': ('div', 'question-content'),
+            'difficulty': ('span', 'difficulty-label'),
+            'explanation': ('div', 'explanation-content'),
+            'correct_answer': ('div', 'correct-answer')
+        }
+    },
+    'veritas': {
+        'container': 'div.practice-question, div.question-container',
+        'fields': {
+            'question_text': ('div', 'question-stem'),
+            'correct_answer': ('div', 'correct-answer'),
+            'explanation': ('div', 'solution'),
+            'difficulty': ('span', 'difficulty')
+        }
+    }
+}
+
+OPTIONS_CONTAINER = 'div.answer-choices'
+OPTION = 'div.choice, p.choice'
+
+
+class ParserBackend:
+    """Extracts raw question records from listing pages with precompiled CSS selectors.
+
+    Field lookups follow the same fallback order as
+    GmatScraper._extract_text_safely: tag and class, then class alone, then
+    the first tag of that type, then the container's own text. Subclasses
+    only supply the primitive operations of their HTML library.
+    """
+
+    name = None
+
+    def __init__(self):
+        self._layouts = {}
+        for source, layout in SOURCE_LAYOUTS.items():
+            self._layouts[source] = {
+                'container': self.compile(layout['container']),
+                'options_container': self.compile(OPTIONS_CONTAINER),
+                'option': self.compile(OPTION),
+                'fields': {
+                    field: [self.compile(f"{tag}.{cls}"), self.compile(f".{cls}"), self.compile(tag)]
+                    for field, (tag, cls) in layout['fields'].items()
+                }
+            }
+
+    def compile(self, selector: str):
+        raise NotImplementedError
+
+    def root(self, html: str):
+        raise NotImplementedError
+
+    def select(self, node, compiled) -> list:
+        raise NotImplementedError
+
+    def select_one(self, node, compiled):
+        raise NotImplementedError
+
+    def text(self, node) -> str:
+        raise NotImplementedError
+
+    def _field_text(self, container, chain) -> str:
+        for compiled in chain:
+            found = self.select_one(container, compiled)
+            if found is not None:
+                return self.text(found)
+        return self.text(container)
+
+    def parse(self, source: str, html: str) -> Tuple[int, List[Dict]]:
+        """Return the number of question containers on the page and their records."""
+        layout = self._layouts[source]
+        containers = self.select(self.root(html), layout['container'])
+        records = []
+        for container in containers:
+            record = {field: self._field_text(container, chain) for field, chain in layout['fields'].items()}
+            options_container = self.select_one(container, layout['options_container'])
+            options = []
+            if options_container is not None:
+                for opt in self.select(options_container, layout['option']):
+                    opt_text = self.text(opt)
+                    if opt_text:
+                        options.append(opt_text)
+            record['options'] = options
+            records.append(record)
+        return len(containers), records
+
+
+class Bs4Backend(ParserBackend):
+    """BeautifulSoup with soupsieve selectors compiled once per source."""
+
+    name = 'bs4'
+
+    def __init__(self, features: str = 'html.parser'):
+        self.features = features
+        super().__init__()
+
+    def compile(self, selector):
+        return soupsieve.compile(selector)
+
+    def root(self, html):
+        return BeautifulSoup(html, self.features)
+
+    def select(self, node, compiled):
+        return compiled.select(node)
+
+    def select_one(self, node, compiled):
+        return compiled.select_one(node)
+
+    def text(self, node):
+        return node.get_text(strip=True)
+
+
+class LxmlBackend(ParserBackend):
+    """lxml.html with CSS selectors compiled to XPath up front."""
+
+    name = 'lxml'
+
+    def compile(self, selector):
+        return CSSSelector(selector)
+
+    def root(self, html):
+        return lxml_html.fromstring(html)
+
+    def select(self, node, compiled):
+        # CSSSelector matches the context node itself too; callers want descendants only
+        return [el for el in compiled(node) if el is not node]
+
+    def select_one(self, node, compiled):
+        found = self.select(node, compiled)
+        return found[0] if found else None
+
+    def text(self, node):
+        return ''.join(part.strip() for part in node.itertext())
+
+
+class SelectolaxBackend(ParserBackend):
+    """selectolax's lexbor engine, the fastest of the three on large pages."""
+
+    name = 'selectolax'
+
+    def compile(self, selector):
+        return selector
+
+    def root(self, html):
+        return LexborHTMLParser(html).root
+
+    def select(self, node, compiled):
+        return node.css(compiled)
+
+    def select_one(self, node, compiled):
+        return node.css_first(compiled)
+
+    def text(self, node):
+        return node.text(deep=True, separator='', strip=True)
+
+
+BACKENDS = {
+    'bs4': Bs4Backend,
+    'lxml': LxmlBackend,
+    'selectolax': SelectolaxBackend
+}
+
+
+def available_backends() -> List[str]:
+    """Names of the backends whose libraries are installed."""
+    names = ['bs4']
+    if lxml_html is not None:
+        names.append('lxml')
+    if LexborHTMLParser is not None:
+        names.append('selectolax')
+    return names
+
+
+_backend_cache: Dict[str, ParserBackend] = {}
+
+
+def get_backend(name: str) -> ParserBackend:
+    """Return a shared backend instance, so selectors are compiled once per process."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown parser backend: {name}")
+    if name not in available_backends():
+        raise ValueError(f"Parser backend {name} is not installed")
+    if name not in _backend_cache:
+        _backend_cache[name] = BACKENDS[name]()
+    return _backend_cache[name]
+
+
+def parse_page(backend_name: str, source: str, html: str) -> Tuple[int, List[Dict]]:
+    """Parse one page; a module-level function so it can run in a process pool."""
+    try:
+        return get_backend(backend_name).parse(source, html)
+    except Exception as e:
+        logging.error(f"Error parsing {source} page with {backend_name}: {str(e)}")
+        return 0, []
@@ -0,0 +1,169 @@
+import contextvars
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Container, Dict, Iterable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain.callbacks.manager import CallbackManagerForRetrieverRun
+from langchain.schema import BaseRetriever, Document
+from langchain.vectorstores import FAISS
+
+import tracing
+from ann_index import search_parameters
+from query_batcher import QueryBatcher
+
+# Runs the dense side of a hybrid search when there is no QueryBatcher to hand it to
+_dense_executor = ThreadPoolExecutor(max_workers=4)
+
+# Numbers are kept whole ("3.5", "120") since exact values matter in GMAT questions
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_STOPWORDS = frozenset(
+    'a an and are as at be by for from has have if in is it its of on or that the this to was were '
+    'what which who will with'.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+class BM25Index:
+    """In-process Okapi BM25 inverted index over the documents of a FAISS store.
+
+    Documents are keyed by their FAISS position, like MetadataIndex, so BM25
+    and vector hits refer to the same documents and new questions are
+    indexed incrementally with ``extend`` as they are appended to the store.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._lengths: Dict[int, int] = {}
+        self._total_length = 0
+
+    @classmethod
+    def from_vectorstore(cls, store: FAISS, **kwargs) -> 'BM25Index':
+        """Build the index from the text of every document in a vector store."""
+        index = cls(**kwargs)
+        for position, doc_id in store.index_to_docstore_id.items():
+            index.add(position, store.docstore.search(doc_id).page_content)
+        return index
+
+    def add(self, position: int, text: str) -> None:
+        terms = tokenize(text)
+        for term, count in Counter(terms).items():
+            self._postings[term][position] = count
+        self._lengths[position] = len(terms)
+        self._total_length += len(terms)
+
+    def extend(self, start: int, texts: Iterable[str]) -> None:
+        """Index consecutive documents appended to the store from ``start`` onwards."""
+        for offset, text in enumerate(texts):
+            self.add(start + offset, text)
+
+    def copy(self) -> 'BM25Index':
+        clone = BM25Index(self.k1, self.b)
+        for term, postings in self._postings.items():
+            clone._postings[term] = dict(postings)
+        clone._lengths = dict(self._lengths)
+        clone._total_length = self._total_length
+        return clone
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def search(self, query: str, k: int = 4, allowed: Optional[Container[int]] = None) -> List[Tuple[int, float]]:
+        """Return the top-k (position, score) pairs for a query, only among ``allowed`` positions if given."""
+        count = len(self._lengths)
+        if not count:
+            return []
+        average_length = self._total_length / count
+        k1, b = self.k1, self.b
+
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, frequency in postings.items():
+                if allowed is not None and position not in allowed:
+                    continue
+                norm = k1 * (1 - b + b * self._lengths[position] / average_length)
+                scores[position] += idf * frequency * (k1 + 1) / (frequency + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[int]], k: int = 60) -> List[int]:
+    """Merge ranked position lists; each list contributes 1 / (k + rank) per document."""
+    fused: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, position in enumerate(ranking, start=1):
+            fused[position] += 1.0 / (k + rank)
+    return sorted(fused, key=fused.get, reverse=True)
+
+
+class HybridRetriever(BaseRetriever):
+    """Dense FAISS search and BM25 run side by side, merged with reciprocal-rank fusion.
+
+    The dense search is handed to the QueryBatcher when one is set (or to a
+    small thread pool otherwise) and BM25 scores the query while it is in
+    flight. Each side contributes ``fetch_k`` candidates and the fused list
+    is cut to ``k`` documents.
+
+    With ``allowed_positions`` (e.g. from MetadataIndex.lookup) both sides
+    only consider those vectors: FAISS through an ID selector, BM25 by
+    skipping other postings. Filtered searches bypass the batcher, whose
+    batches search the whole index.
+    """
+
+    vectorstore: FAISS
+    bm25_index: BM25Index
+    batcher: Optional[QueryBatcher] = None
+    allowed_positions: Optional[np.ndarray] = None
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def _dense_positions(self, query: str) -> List[int]:
+        store = self.vectorstore
+        with tracing.span('query_embedding'):
+            embedding = np.array([store.embeddings.embed_query(query)], dtype='float32')
+        k = min(self.fetch_k, store.index.ntotal)
+        params = None
+        if self.allowed_positions is not None:
+            params = search_parameters(store.index, faiss.IDSelectorBatch(self.allowed_positions))
+            k = min(k, len(self.allowed_positions))
+        with tracing.span('faiss_search'):
+            _, found = store.index.search(embedding, k, params=params)
+        return [int(position) for position in found[0] if position != -1]
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        store = self.vectorstore
+        allowed = None
+        if self.allowed_positions is not None:
+            if len(self.allowed_positions) == 0:
+                return []
+            allowed = set(self.allowed_positions.tolist())
+        if store.index.ntotal == 0:
+            return []
+
+        if self.batcher is not None and allowed is None:
+            dense = self.batcher.submit(store, query, self.fetch_k, positions=True)
+        else:
+            # Copy the context so the pool thread records its spans on this request's trace
+            dense = _dense_executor.submit(contextvars.copy_context().run, self._dense_positions, query)
+        with tracing.span('bm25_search'):
+            lexical = [position for position, _ in self.bm25_index.search(query, self.fetch_k, allowed)]
+
+        dense_positions = dense.result()
+        for name, start, duration in getattr(dense, 'stage_timings', ()):
+            tracing.record_span(name, start, duration)
+        fused = reciprocal_rank_fusion([dense_positions, lexical], k=self.rrf_k)[:self.k]
+        return [store.docstore.search(store.index_to_docstore_id[position]) for position in fused]
@@ -0,0 +1,251 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Not on POSIX: locks only cover the threads of this process
+    fcntl = None
+
+
+class IndexSnapshot:
+    """One consistent generation of the vector store, its side indexes and QA chain.
+
+    Requests read all of them through a single snapshot, so a swap can never
+    pair a new vector store with an old metadata or BM25 index.
+    """
+
+    def __init__(self, vectorstore, metadata_index, qa_system, bm25_index=None, version: int = 0,
+                 fingerprint: Optional[str] = None):
+        self.vectorstore = vectorstore
+        self.metadata_index = metadata_index
+        self.qa_system = qa_system
+        self.bm25_index = bm25_index
+        self.version = version
+        self.fingerprint = fingerprint  # Of the persisted index this snapshot matches, if any
+        self.in_flight = 0
+
+
+class SnapshotHolder:
+    """Holds the live IndexSnapshot and swaps it atomically.
+
+    Requests take a lease on the live snapshot for their whole duration. A
+    swap only replaces the pointer; the previous snapshot is kept as retired
+    until its last lease is returned, so in-flight queries finish on the
+    index they started with and nothing is torn down underneath them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current: Optional[IndexSnapshot] = None
+        self._retired: List[IndexSnapshot] = []
+        self._versions = 0
+
+    @property
+    def current(self) -> Optional[IndexSnapshot]:
+        return self._current
+
+    def swap(self, vectorstore, metadata_index, qa_system, bm25_index=None,
+             fingerprint: Optional[str] = None) -> IndexSnapshot:
+        """Install a new snapshot built off the request path and return it."""
+        with self._lock:
+            self._versions += 1
+            snapshot = IndexSnapshot(vectorstore, metadata_index, qa_system, bm25_index, self._versions, fingerprint)
+            previous, self._current = self._current, snapshot
+            if previous is not None and previous.in_flight:
+                self._retired.append(previous)
+        logging.info(f"Swapped in index version {snapshot.version} with {vectorstore.index.ntotal} vectors")
+        return snapshot
+
+    @contextmanager
+    def lease(self) -> Iterator[IndexSnapshot]:
+        """Pin the live snapshot for the duration of one request."""
+        with self._lock:
+            snapshot = self._current
+            if snapshot is None:
+                raise RuntimeError("QA system has not been initialized")
+            snapshot.in_flight += 1
+        try:
+            yield snapshot
+        finally:
+            with self._lock:
+                snapshot.in_flight -= 1
+                if snapshot.in_flight == 0 and snapshot in self._retired:
+                    self._retired.remove(snapshot)
+                    logging.info(f"Released index version {snapshot.version} after in-flight queries drained")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            current = self._current
+            return {
+                'version': current.version if current else None,
+                'fingerprint': current.fingerprint if current else None,
+                'in_flight': current.in_flight if current else 0,
+                'retired_versions': [snapshot.version for snapshot in self._retired],
+                'retired_in_flight': sum(snapshot.in_flight for snapshot in self._retired),
+            }
+
+
+class InterProcessLock:
+    """A reentrant lock shared by this process's threads and, through flock on ``path``,
+    by every other process using the same path, such as the other gunicorn workers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if not self._thread_lock.acquire(blocking=blocking):
+            return False
+        if self._depth == 0 and fcntl is not None:
+            f = open(self.path, 'a+')
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                f.close()
+                self._thread_lock.release()
+                return False
+            self._file = f
+        self._depth += 1
+        return True
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+    def __enter__(self) -> 'InterProcessLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class RefreshScheduler:
+    """Runs a refresh job in the background, at most one at a time.
+
+    ``trigger()`` never blocks: it starts the job on a daemon thread unless
+    a run is already in progress, in which case it returns False. The job is
+    due once ``interval`` seconds have passed since the previous run started,
+    whether or not that run succeeded, so a failing job is retried once per
+    interval rather than on every request. ``start()`` additionally runs the
+    job on a timer, independently of request traffic.
+
+    With ``lock_path`` the single flight extends across processes: a run
+    holds an InterProcessLock on that file, and records its start time in
+    it, so a worker whose own schedule is due skips the job while another
+    worker runs it or has run it within the interval.
+    """
+
+    def __init__(self, job: Callable[[], Any], interval: float, name: str = 'refresh',
+                 lock_path: Optional[str] = None):
+        self.job = job
+        self.interval = interval
+        self.name = name
+        self.lock_path = lock_path
+        self._process_lock = InterProcessLock(lock_path) if lock_path else None
+        self.runs = 0
+        self.skipped = 0
+        self.last_started: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._running = threading.Lock()
+        self._stop = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+
+    def due(self) -> bool:
+        return self.last_started is None or time.time() - self.last_started >= self.interval
+
+    @property
+    def running(self) -> bool:
+        return self._running.locked()
+
+    def trigger(self, only_if_due: bool = False) -> bool:
+        """Start the job in the background unless it is already running.
+
+        With ``only_if_due`` and a ``lock_path``, the background thread also
+        skips the job if another process ran it within the interval.
+        """
+        if not self._running.acquire(blocking=False):
+            self.skipped += 1
+            return False
+        self.last_started = time.time()
+        threading.Thread(target=self._run, args=(only_if_due,), name=self.name, daemon=True).start()
+        return True
+
+    def trigger_if_due(self) -> bool:
+        return self.due() and self.trigger(only_if_due=True)
+
+    def _read_shared_start(self) -> Optional[float]:
+        try:
+            with open(self.lock_path, 'r', encoding='utf-8') as f:
+                return float(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _claim(self, only_if_due: bool) -> bool:
+        """Take the cross-process lock and record the start; False if another process has the job."""
+        if not self._process_lock.acquire(blocking=False):
+            logging.info(f"Background {self.name} is already running in another process")
+            return False
+        shared_start = self._read_shared_start()
+        if only_if_due and shared_start is not None and time.time() - shared_start < self.interval:
+            self.last_started = shared_start
+            self._process_lock.release()
+            return False
+        with open(self.lock_path, 'w', encoding='utf-8') as f:
+            f.write(repr(self.last_started))
+        return True
+
+    def _run(self, only_if_due: bool = False) -> None:
+        if self._process_lock is not None and not self._claim(only_if_due):
+            self.skipped += 1
+            self._running.release()
+            return
+        start = time.perf_counter()
+        try:
+            self.job()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            logging.error(f"Background {self.name} failed: {str(e)}")
+        finally:
+            self.runs += 1
+            self.last_duration = time.perf_counter() - start
+            if self._process_lock is not None:
+                self._process_lock.release()
+            self._running.release()
+
+    def start(self, poll: float = 60.0) -> None:
+        """Check every ``poll`` seconds and run the job whenever it is due."""
+        if self._timer is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(poll):
+                self.trigger_if_due()
+
+        self._timer = threading.Thread(target=loop, name=f"{self.name}-timer", daemon=True)
+        self._timer.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'running': self.running,
+            'runs': self.runs,
+            'skipped': self.skipped,
+            'last_started': self.last_started,
+            'last_duration': self.last_duration,
+            'last_error': self.last_error,
+        }
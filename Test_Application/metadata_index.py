@@ -0,0 +1,102 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+import faiss
+import numpy as np
+from langchain.callbacks.manager import CallbackManagerForRetrieverRun
+from langchain.schema import BaseRetriever, Document
+from langchain.vectorstores import FAISS
+
+import tracing
+from ann_index import search_parameters
+
+# GmatQuestion fields that can be used to narrow a search
+FILTER_FIELDS = ('category', 'sub_category', 'difficulty')
+
+
+def _normalize(value: str) -> str:
+    return str(value).strip().lower()
+
+
+class MetadataIndex:
+    """Inverted index from (field, value) to FAISS vector positions."""
+
+    def __init__(self):
+        self._postings: Dict[tuple, Set[int]] = defaultdict(set)
+
+    @classmethod
+    def from_vectorstore(cls, store: FAISS) -> 'MetadataIndex':
+        """Build the index from the metadata of every document in a vector store."""
+        index = cls()
+        for position, doc_id in store.index_to_docstore_id.items():
+            index.add(position, store.docstore.search(doc_id).metadata)
+        return index
+
+    def add(self, position: int, metadata: Dict) -> None:
+        """Register the vector at ``position`` under each of its filterable fields."""
+        for field in FILTER_FIELDS:
+            if metadata.get(field):
+                self._postings[(field, _normalize(metadata[field]))].add(position)
+
+    def extend(self, start: int, metadatas: List[Dict]) -> None:
+        """Register consecutive vectors appended to the index from ``start`` onwards."""
+        for offset, metadata in enumerate(metadatas):
+            self.add(start + offset, metadata)
+
+    def copy(self) -> 'MetadataIndex':
+        clone = MetadataIndex()
+        for key, positions in self._postings.items():
+            clone._postings[key] = set(positions)
+        return clone
+
+    def lookup(self, **filters) -> Optional[np.ndarray]:
+        """Return the sorted vector positions matching every given filter.
+
+        Returns None when no filter is set, meaning the whole index is searched.
+        """
+        active = {field: value for field, value in filters.items() if field in FILTER_FIELDS and value}
+        if not active:
+            return None
+
+        # Intersect the smallest posting lists first
+        postings = sorted(
+            (self._postings.get((field, _normalize(value)), set()) for field, value in active.items()),
+            key=len
+        )
+        matches = set(postings[0])
+        for positions in postings[1:]:
+            matches &= positions
+            if not matches:
+                break
+        return np.array(sorted(matches), dtype='int64')
+
+
+class FilteredRetriever(BaseRetriever):
+    """Retriever that searches only the vectors matching metadata filters."""
+
+    vectorstore: FAISS
+    metadata_index: MetadataIndex
+    filters: Dict[str, str] = {}
+    k: int = 4
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        positions = self.metadata_index.lookup(**self.filters)
+        if positions is None:
+            return self.vectorstore.similarity_search(query, k=self.k)
+        if len(positions) == 0:
+            return []
+
+        with tracing.span('query_embedding'):
+            embedding = np.array([self.vectorstore.embeddings.embed_query(query)], dtype='float32')
+        with tracing.span('faiss_search'):
+            params = search_parameters(self.vectorstore.index, faiss.IDSelectorBatch(positions))
+            _, found = self.vectorstore.index.search(embedding, min(self.k, len(positions)), params=params)
+
+        docs = []
+        for position in found[0]:
+            if position == -1:
+                continue
+            doc_id = self.vectorstore.index_to_docstore_id[int(position)]
+            docs.append(self.vectorstore.docstore.search(doc_id))
+        return docs
@@ -0,0 +1,167 @@
+import hashlib
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from question_store import question_hash
+
+# Universal hashing mod a prime just above 2**32: with 32-bit inputs and
+# coefficients below 2**32, a * x + b never overflows uint64.
+_PRIME = np.uint64(4294967311)
+_MAX_COEFFICIENT = 1 << 32
+
+_SOURCE_LINE = re.compile(r'^\s*(source|src)\s*:.*$', re.IGNORECASE | re.MULTILINE)
+# get_text(strip=True) joins a page's "Source:" paragraph onto the question as a trailing suffix.
+# Only an attribution at the very end counts: after the end of a sentence or a separator, with a
+# URL or a short tail, so an inline "the data source: A or B?" is left alone.
+_SOURCE_SUFFIX = re.compile(
+    r'(?:(?<=[?.!])|[(\[|\-\u2013\u2014])\s*\b(?:source|src)\s*:\s*'
+    r'(?:(?:https?://|www\.)\S+|[\w-]+(?:\.[\w-]+)+(?:/\S*)?|[^\n?.!]{0,60})\.?\s*[)\]]?\s*\Z',
+    re.IGNORECASE)
+_OPTION_LABEL = re.compile(r'^\s*\(?[a-e]\s*[).:]\s*', re.IGNORECASE)
+_NON_WORD = re.compile(r'[^\w\s]+')
+
+
+def normalize_for_dedup(text: str) -> str:
+    """Drop 'Source:' lines or suffixes and punctuation, lowercase and collapse whitespace.
+
+    >>> normalize_for_dedup("If x = 2, what is x? Source: GMAT Prep")
+    'if x 2 what is x'
+    >>> normalize_for_dedup("If x = 2, what is x?Source: OG 2020")
+    'if x 2 what is x'
+    >>> normalize_for_dedup("If x = 2, what is x? (Source: https://gmatclub.com/forum/x-1.html)")
+    'if x 2 what is x'
+    >>> normalize_for_dedup("Which is the data source: the survey or the census?")
+    'which is the data source the survey or the census'
+    """
+    text = _SOURCE_SUFFIX.sub(' ', _SOURCE_LINE.sub(' ', text))
+    return ' '.join(_NON_WORD.sub(' ', text.lower()).split())
+
+
+def question_dedup_text(question: Dict) -> str:
+    """Question text plus its options, unlabelled and sorted so their order does not matter."""
+    options = sorted(normalize_for_dedup(_OPTION_LABEL.sub('', option)) for option in question.get('options', []))
+    return ' '.join([normalize_for_dedup(question['question_text'])] + options)
+
+
+def shingles(text: str, size: int = 3) -> np.ndarray:
+    """32-bit hashes of the word n-grams of already-normalized text."""
+    words = text.split()
+    if len(words) <= size:
+        grams = {' '.join(words)}
+    else:
+        grams = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def lsh_parameters(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Pick (bands, rows) whose S-curve midpoint (1/b)**(1/r) is closest to the threshold."""
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class NearDuplicateIndex:
+    """MinHash signatures with LSH banding for near-duplicate questions.
+
+    Each text is shingled into word n-grams and summarized by ``num_perm``
+    MinHash values, whose agreement rate estimates Jaccard similarity. The
+    signature is cut into bands and every band is hashed into a bucket, so a
+    lookup only compares against items sharing at least one bucket instead of
+    the whole corpus. Candidates are then confirmed with the estimated
+    similarity against ``threshold``. Items are added one at a time, so the
+    index grows incrementally alongside the question store.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_parameters(threshold, num_perm)
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MAX_COEFFICIENT, size=num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.randint(0, _MAX_COEFFICIENT, size=num_perm, dtype=np.uint64)[:, None]
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [defaultdict(list) for _ in range(self.bands)]
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of already-normalized text."""
+        hashes = shingles(text, self.shingle_size)
+        if not len(hashes):
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        return ((self._a * hashes[None, :] + self._b) % _PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        rows = self.rows
+        return [hashlib.blake2b(signature[i * rows:(i + 1) * rows].tobytes(), digest_size=8).digest()
+                for i in range(self.bands)]
+
+    def _best_match(self, signature: np.ndarray, band_keys: List[bytes]) -> Optional[Hashable]:
+        candidates = set()
+        for bucket, band_key in zip(self._buckets, band_keys):
+            candidates.update(bucket.get(band_key, ()))
+        best_key, best_score = None, self.threshold
+        for key in candidates:
+            score = float(np.mean(self._signatures[key] == signature))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def query(self, text: str) -> Optional[Hashable]:
+        """Key of the most similar indexed item at or above the threshold, if any."""
+        signature = self.signature(text)
+        return self._best_match(signature, self._band_keys(signature))
+
+    def add(self, key: Hashable, text: str) -> Optional[Hashable]:
+        """Index an item unless it near-duplicates one already indexed.
+
+        Returns the key of the existing item it duplicates, or None when the
+        item was new and has been added.
+        """
+        signature = self.signature(text)
+        band_keys = self._band_keys(signature)
+        duplicate_of = self._best_match(signature, band_keys)
+        if duplicate_of is None:
+            self._signatures[key] = signature
+            for bucket, band_key in zip(self._buckets, band_keys):
+                bucket[band_key].append(key)
+        return duplicate_of
+
+    def add_questions(self, questions: Iterable[Dict]) -> List[Dict]:
+        """Index question dicts in order and return only those that were not near-duplicates."""
+        unique = []
+        for question in questions:
+            if self.add(question_hash(question['question_text']), question_dedup_text(question)) is None:
+                unique.append(question)
+        return unique
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._signatures
+
+
+def find_near_duplicates(texts: Iterable[str], threshold: float = 0.8, **kwargs) -> List[Tuple[int, int]]:
+    """Batch dedup: (index, index of earlier near-duplicate) pairs for a list of texts.
+
+    Runs in roughly linear time, since every text only meets the texts it
+    shares an LSH bucket with.
+    """
+    index = NearDuplicateIndex(threshold=threshold, **kwargs)
+    pairs = []
+    for i, text in enumerate(texts):
+        duplicate_of = index.add(i, normalize_for_dedup(text))
+        if duplicate_of is not None:
+            pairs.append((i, duplicate_of))
+    return pairs
@@ -0,0 +1,145 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Mapping
+
+# Returned by fetchers in place of a body when the page has not changed
+UNCHANGED = object()
+
+
+class PageCache:
+    """Persistent per-URL validator cache for conditional HTTP requests.
+
+    For every URL it remembers the ETag, Last-Modified date, a hash and the
+    size of the last body seen, and whether the page needed a browser to
+    render. Fetchers send If-None-Match / If-Modified-Since from it and
+    treat a 304 or an identical body hash as "unchanged", so the page does
+    not have to be parsed again.
+
+    New validators are only held in memory until ``commit()``, which the
+    caller runs once the questions scraped from those pages are stored; if
+    ingestion fails, the pages are parsed again on the next scrape instead
+    of looking unchanged.
+    """
+
+    def __init__(self, path: str = 'page_cache.sqlite'):
+        self.path = path
+        self.metrics = {
+            'requests': 0,
+            'not_modified': 0,
+            'unchanged_body': 0,
+            'bytes_saved': 0,
+            'parses_saved': 0
+        }
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict] = {}  # url -> row to write on commit()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                length INTEGER NOT NULL DEFAULT 0,
+                needs_browser INTEGER NOT NULL DEFAULT 0,
+                fetched_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def _row(self, url: str):
+        return self._conn.execute(
+            "SELECT etag, last_modified, body_hash, length, needs_browser FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Validator headers to send with the next request for ``url``."""
+        with self._lock:
+            row = self._row(url)
+        headers = {}
+        if row and row[0]:
+            headers['If-None-Match'] = row[0]
+        if row and row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def update(self, url: str, status: int, headers: Mapping[str, str], body: bytes) -> bool:
+        """Record a response until the next commit() and return True if the page content is unchanged."""
+        with self._lock:
+            self.metrics['requests'] += 1
+            row = self._row(url)
+
+            if status == 304 and row:
+                self.metrics['not_modified'] += 1
+                self.metrics['bytes_saved'] += row[3]
+                self._conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+                self._conn.commit()
+                return True
+
+            body_hash = hashlib.sha256(body).hexdigest()
+            unchanged = bool(row) and row[2] == body_hash
+            if unchanged:
+                self.metrics['unchanged_body'] += 1
+
+            self._pending[url] = {
+                'url': url,
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'body_hash': body_hash,
+                'length': len(body),
+                'needs_browser': row[4] if row else 0,
+                'fetched_at': time.time()
+            }
+            return unchanged
+
+    def commit(self) -> int:
+        """Persist the validators of every page recorded since the last commit.
+
+        Call this only after the questions scraped from those pages are stored.
+        """
+        with self._lock:
+            entries = list(self._pending.values())
+            self._pending.clear()
+            self._conn.executemany(
+                """INSERT INTO pages (url, etag, last_modified, body_hash, length, needs_browser, fetched_at)
+                   VALUES (:url, :etag, :last_modified, :body_hash, :length, :needs_browser, :fetched_at)
+                   ON CONFLICT(url) DO UPDATE SET
+                       etag = excluded.etag,
+                       last_modified = excluded.last_modified,
+                       body_hash = excluded.body_hash,
+                       length = excluded.length,
+                       needs_browser = excluded.needs_browser,
+                       fetched_at = excluded.fetched_at""",
+                entries
+            )
+            self._conn.commit()
+        return len(entries)
+
+    def rollback(self) -> None:
+        """Forget uncommitted pages, so they are fetched and parsed again next time."""
+        with self._lock:
+            self._pending.clear()
+
+    def needs_browser(self, url: str) -> bool:
+        """Whether the static HTML of ``url`` lacked questions last time it was seen."""
+        with self._lock:
+            if url in self._pending:
+                return bool(self._pending[url]['needs_browser'])
+            row = self._row(url)
+        return bool(row and row[4])
+
+    def set_needs_browser(self, url: str, value: bool) -> None:
+        with self._lock:
+            if url in self._pending:
+                self._pending[url]['needs_browser'] = int(value)
+                return
+            self._conn.execute("UPDATE pages SET needs_browser = ? WHERE url = ?", (int(value), url))
+            self._conn.commit()
+
+    def record_skipped_parse(self) -> None:
+        with self._lock:
+            self.metrics['parses_saved'] += 1
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+from langchain.callbacks.manager import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain.schema import BaseRetriever, Document
+from langchain.vectorstores import FAISS
+
+
+class _Pending(NamedTuple):
+    store: FAISS
+    query: str
+    k: int
+    future: Future
+    positions: bool = False
+
+
+class QueryBatcher:
+    """Coalesce concurrent retrieval requests into batched embedding and FAISS calls.
+
+    Requests are queued and a dispatcher thread collects them until it has
+    ``max_batch_size`` or ``max_wait`` seconds have passed since the first
+    one arrived. Each batch is embedded with a single call and searched with
+    a single ``index.search`` over the query matrix, and every waiting
+    request gets its own documents back. Up to ``max_concurrent_batches``
+    batches are in flight at once; while they are all busy new requests keep
+    queueing, so batches grow with load instead of latency.
+    """
+
+    def __init__(self, max_batch_size: int = 32, max_wait: float = 0.005, max_concurrent_batches: int = 4):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.queries = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._slots = threading.BoundedSemaphore(max_concurrent_batches)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches)
+        self._dispatcher = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, store: FAISS, query: str, k: int = 4, positions: bool = False) -> Future:
+        """Queue a query; the future resolves to its top-k documents, or their FAISS positions.
+
+        Once resolved, the future's ``stage_timings`` lists the batch's
+        (stage, start, seconds) embedding and search times.
+        """
+        if self._dispatcher is None:
+            with self._start_lock:
+                if self._dispatcher is None:
+                    self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+                    self._dispatcher.start()
+        future: Future = Future()
+        self._queue.put(_Pending(store, query, k, future, positions))
+        return future
+
+    def search(self, store: FAISS, query: str, k: int = 4) -> List[Document]:
+        return self.submit(store, query, k).result()
+
+    def _collect(self) -> List[_Pending]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # Requests that are already waiting join the batch without extending the wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch(self) -> None:
+        while True:
+            batch = self._collect()
+            self._slots.acquire()
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: List[_Pending]) -> None:
+        try:
+            # A swap may leave requests for the old and new index in one batch
+            by_store: Dict[int, List[_Pending]] = defaultdict(list)
+            for pending in batch:
+                by_store[id(pending.store)].append(pending)
+            for group in by_store.values():
+                try:
+                    self._search_group(group)
+                except Exception as e:
+                    logging.error(f"Batched retrieval failed: {str(e)}")
+                    for pending in group:
+                        if not pending.future.done():
+                            pending.future.set_exception(e)
+            self.batches += 1
+            self.queries += len(batch)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _search_group(group: List[_Pending]) -> None:
+        store = group[0].store
+        embeddings = store.embeddings
+        # CachedEmbeddings.embed_queries serves repeated queries from its in-memory query LRU and
+        # embeds the rest in one call, without filling the on-disk document cache with one-off queries
+        embed_batch = getattr(embeddings, 'embed_queries', embeddings.embed_documents)
+        embed_start = time.perf_counter()
+        vectors = np.array(embed_batch([pending.query for pending in group]), dtype='float32')
+        search_start = time.perf_counter()
+
+        k = min(max(pending.k for pending in group), store.index.ntotal)
+        if k == 0:
+            for pending in group:
+                pending.future.set_result([])
+            return
+        _, found = store.index.search(vectors, k)
+        # Shared by every query in the batch, for request tracing on the caller's side
+        stage_timings = [('query_embedding', embed_start, search_start - embed_start),
+                         ('faiss_search', search_start, time.perf_counter() - search_start)]
+
+        for pending, row in zip(group, found):
+            pending.future.stage_timings = stage_timings
+            positions = [int(position) for position in row[:pending.k] if position != -1]
+            if pending.positions:
+                pending.future.set_result(positions)
+                continue
+            docs = [store.docstore.search(store.index_to_docstore_id[position]) for position in positions]
+            pending.future.set_result(docs)
+
+    def stats(self) -> Dict[str, float]:
+        """Return batch counters and the mean batch size so far."""
+        return {
+            'batches': self.batches,
+            'queries': self.queries,
+            'mean_batch_size': self.queries / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait': self.max_wait,
+        }
+
+
+class BatchedRetriever(BaseRetriever):
+    """Similarity retriever whose searches go through a shared QueryBatcher."""
+
+    vectorstore: FAISS
+    batcher: QueryBatcher
+    k: int = 4
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.batcher.search(self.vectorstore, query, self.k)
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        return await asyncio.wrap_future(self.batcher.submit(self.vectorstore, query, self.k))
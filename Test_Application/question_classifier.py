@@ -0,0 +1,159 @@
+import re
+from typing import Dict, Iterable, List, NamedTuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Keyword heuristics for GmatScraper, in priority order. Matching is on
+# lowercase substrings, exactly as the original per-call scans did it.
+CATEGORY_KEYWORDS = {
+    'Quantitative': [
+        'calculate', 'solve', 'equation', 'number', 'percentage', 'ratio', 'math',
+        'quantity', 'geometric', 'algebra', 'arithmetic', 'probability', 'average',
+        'mean', 'median', 'mode', 'standard deviation', 'profit', 'loss', 'interest'
+    ],
+    'Verbal': [
+        'passage', 'argument', 'sentence', 'grammar', 'correct', 'read', 'text',
+        'paragraph', 'conclusion', 'premise', 'author', 'meaning', 'vocabulary',
+        'structure', 'reasoning', 'inference', 'strengthen', 'weaken'
+    ],
+    'Data Insights': [
+        'graph', 'table', 'data', 'chart', 'interpret', 'analysis', 'trend',
+        'statistics', 'correlation', 'relationship', 'pattern', 'visualization',
+        'dashboard', 'metric', 'measurement', 'indicator'
+    ]
+}
+
+SUBCATEGORY_PATTERNS = {
+    'Problem Solving': ['solve', 'calculate', 'find', 'what is', 'how many'],
+    'Data Sufficiency': ['sufficient', 'determine', 'could be determined', 'statement'],
+    'Critical Reasoning': ['argument', 'conclusion', 'premise', 'strengthen', 'weaken'],
+    'Reading Comprehension': ['passage', 'author', 'paragraph', 'according to'],
+    'Sentence Correction': ['sentence', 'grammar', 'correct', 'properly'],
+    'Integrated Reasoning': ['table', 'graph', 'data', 'information']
+}
+
+DIFFICULTY_INDICATORS = {
+    'Hard': ['however', 'nevertheless', 'conversely', 'complex', 'challenging'],
+    'Medium': ['therefore', 'consequently', 'furthermore', 'moreover'],
+    'Easy': ['simple', 'straightforward', 'basic', 'direct']
+}
+
+
+class Classification(NamedTuple):
+    category: str
+    sub_category: str
+    difficulty: str
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Build a regex alternation shaped like a trie, so shared prefixes are matched once."""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def render(node: Dict) -> str:
+        ends_here = '' in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if ends_here:
+            # Prefer the longest keyword; shorter ones are recovered from the prefix table
+            return '(?:' + body + ')?'
+        return body
+
+    return render(trie)
+
+
+class QuestionClassifier:
+    """Single-pass keyword classifier for category, sub-category and difficulty.
+
+    Every keyword from the three tables gets one bit. A text is scanned once
+    for all keywords, producing a bitmask of the keywords it contains, and
+    the three decisions are then mask intersections. The scan uses a
+    pyahocorasick automaton when that package is installed, and otherwise
+    one trie-shaped regex wrapped in a lookahead, which finds the longest
+    keyword starting at every position; keywords that are prefixes of a
+    match (e.g. 'mean' inside 'meaning') are folded in from a precomputed
+    table. Both reproduce the substring semantics of ``keyword in text``.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]] = CATEGORY_KEYWORDS,
+                 subcategories: Dict[str, List[str]] = SUBCATEGORY_PATTERNS,
+                 difficulties: Dict[str, List[str]] = DIFFICULTY_INDICATORS,
+                 use_automaton: bool = True):
+        vocabulary = sorted({w.lower() for table in (categories, subcategories, difficulties)
+                             for words in table.values() for w in words})
+        bits = {word: 1 << i for i, word in enumerate(vocabulary)}
+
+        def masks(table):
+            return [(name, sum(bits[w.lower()] for w in set(words))) for name, words in table.items()]
+
+        self._category_masks = masks(categories)
+        self._subcategory_masks = masks(subcategories)
+        self._difficulty_masks = masks(difficulties)
+
+        if use_automaton and ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for word, bit in bits.items():
+                self._automaton.add_word(word, bit)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            # Longest match per position plus every keyword that is a prefix of it
+            self._match_masks = {
+                word: sum(bit for other, bit in bits.items() if word.startswith(other))
+                for word in vocabulary
+            }
+            self._pattern = re.compile('(?=(' + _trie_pattern(vocabulary) + '))')
+
+    def _keyword_mask(self, text_lower: str) -> int:
+        """Bitmask of every keyword occurring as a substring of the text."""
+        found = 0
+        if self._automaton is not None:
+            for _, bit in self._automaton.iter(text_lower):
+                found |= bit
+        else:
+            match_masks = self._match_masks
+            for match in self._pattern.finditer(text_lower):
+                if match.group(1):
+                    found |= match_masks[match.group(1)]
+        return found
+
+    def _decide(self, found: int, text: str) -> Classification:
+        best_category, best_score = "Uncategorized", 0
+        for category, mask in self._category_masks:
+            score = bin(found & mask).count('1')
+            if score > best_score:
+                best_category, best_score = category, score
+
+        sub_category = next((name for name, mask in self._subcategory_masks if found & mask), "Other")
+
+        difficulty = next((name for name, mask in self._difficulty_masks if found & mask), None)
+        if difficulty is None:
+            # Use word count as a fallback
+            word_count = len(text.split())
+            if word_count > 100:
+                difficulty = "Hard"
+            elif word_count > 50:
+                difficulty = "Medium"
+            else:
+                difficulty = "Easy"
+
+        return Classification(best_category, sub_category, difficulty)
+
+    def classify(self, text: str) -> Classification:
+        """Classify one question text in a single scan."""
+        return self._decide(self._keyword_mask(text.lower()), text)
+
+    def classify_batch(self, texts: Iterable[str]) -> List[Classification]:
+        """Classify many question texts, one scan each, with no per-call setup."""
+        keyword_mask = self._keyword_mask
+        decide = self._decide
+        return [decide(keyword_mask(text.lower()), text) for text in texts]
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+QUESTION_FIELDS = (
+    'question_text', 'options', 'correct_answer', 'explanation', 'category',
+    'sub_category', 'difficulty', 'source_url', 'scraped_date'
+)
+
+
+def normalize_question_text(text: str) -> str:
+    """Lowercase and collapse whitespace so trivially different copies compare equal."""
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+def question_hash(text: str) -> str:
+    return hashlib.sha256(normalize_question_text(text).encode('utf-8')).hexdigest()
+
+
+class QuestionStore:
+    """SQLite-backed question store, replacing the monolithic gmat_questions.json.
+
+    Questions are unique on a hash of their normalized text, so adding a
+    scrape is an indexed insert of only the new rows rather than a rewrite
+    of the whole corpus. The database runs in WAL mode, so readers that
+    stream questions are never blocked by a writer.
+    """
+
+    def __init__(self, path: str = 'gmat_questions.sqlite'):
+        self.path = path
+        self._write_lock = threading.Lock()
+        self._conn = self._connect()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                question_hash TEXT NOT NULL UNIQUE,
+                question_text TEXT NOT NULL,
+                options TEXT NOT NULL,
+                correct_answer TEXT,
+                explanation TEXT,
+                category TEXT,
+                sub_category TEXT,
+                difficulty TEXT,
+                source_url TEXT,
+                scraped_date TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_questions_category ON questions (category);
+            CREATE INDEX IF NOT EXISTS idx_questions_sub_category ON questions (sub_category);
+            CREATE INDEX IF NOT EXISTS idx_questions_difficulty ON questions (difficulty);"""
+        )
+        self._conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _row_values(question: Dict) -> tuple:
+        return (
+            question_hash(question['question_text']),
+            question['question_text'],
+            json.dumps(question.get('options', []), ensure_ascii=False),
+            question.get('correct_answer'),
+            question.get('explanation'),
+            question.get('category'),
+            question.get('sub_category'),
+            question.get('difficulty'),
+            question.get('source_url'),
+            question.get('scraped_date'),
+            time.time()
+        )
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        question = {field: row[field] for field in QUESTION_FIELDS}
+        question['options'] = json.loads(question['options'])
+        return question
+
+    def add_questions(self, questions: Iterable[Dict]) -> List[Dict]:
+        """Insert questions not already stored and return only the newly added ones."""
+        added = []
+        with self._write_lock:
+            for question in questions:
+                cursor = self._conn.execute(
+                    """INSERT INTO questions (question_hash, question_text, options, correct_answer,
+                           explanation, category, sub_category, difficulty, source_url,
+                           scraped_date, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(question_hash) DO NOTHING""",
+                    self._row_values(question)
+                )
+                if cursor.rowcount:
+                    added.append(question)
+            self._conn.commit()
+        return added
+
+    def upsert(self, questions: Iterable[Dict]) -> int:
+        """Insert new questions and overwrite the stored fields of existing ones."""
+        with self._write_lock:
+            cursor = self._conn.executemany(
+                """INSERT INTO questions (question_hash, question_text, options, correct_answer,
+                       explanation, category, sub_category, difficulty, source_url,
+                       scraped_date, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(question_hash) DO UPDATE SET
+                       question_text = excluded.question_text,
+                       options = excluded.options,
+                       correct_answer = excluded.correct_answer,
+                       explanation = excluded.explanation,
+                       category = excluded.category,
+                       sub_category = excluded.sub_category,
+                       difficulty = excluded.difficulty,
+                       source_url = excluded.source_url,
+                       scraped_date = excluded.scraped_date,
+                       updated_at = excluded.updated_at""",
+                (self._row_values(question) for question in questions)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def iter_questions(self, category: Optional[str] = None, sub_category: Optional[str] = None,
+                       difficulty: Optional[str] = None, batch_size: int = 500) -> Iterator[Dict]:
+        """Stream questions in insertion order, optionally filtered, without loading them all."""
+        filters = {'category': category, 'sub_category': sub_category, 'difficulty': difficulty}
+        clauses = [f"{field} = ?" for field, value in filters.items() if value]
+        params = [value for value in filters.values() if value]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        # A separate connection keeps this read snapshot independent of writers
+        conn = self._connect()
+        try:
+            cursor = conn.execute(f"SELECT * FROM questions {where} ORDER BY id", params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._to_dict(row)
+        finally:
+            conn.close()
+
+    def contains(self, question_text: str) -> bool:
+        return self._conn.execute(
+            "SELECT 1 FROM questions WHERE question_hash = ?", (question_hash(question_text),)
+        ).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def revision(self) -> str:
+        """A cheap token that changes whenever questions are added or updated."""
+        count, max_id, updated = self._conn.execute(
+            "SELECT COUNT(*), MAX(id), MAX(updated_at) FROM questions"
+        ).fetchone()
+        return f"{count}:{max_id}:{updated}"
+
+    def import_json(self, json_path: str) -> int:
+        """One-off migration of a legacy gmat_questions.json file into the store."""
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                questions = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+        added = self.add_questions(questions)
+        logging.info(f"Imported {len(added)} questions from {json_path}")
+        return len(added)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def open_question_store(path: str = 'gmat_questions.sqlite',
+                        legacy_json: str = 'gmat_questions.json') -> QuestionStore:
+    """Open the store, importing the legacy JSON file the first time if one exists."""
+    is_new = not os.path.exists(path)
+    store = QuestionStore(path)
+    if is_new and os.path.exists(legacy_json):
+        store.import_json(legacy_json)
+    return store
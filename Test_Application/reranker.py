@@ -0,0 +1,191 @@
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
+
+from two_stage_retriever import CrossEncoderReranker
+
+try:
+    from sentence_transformers import CrossEncoder
+except ImportError:
+    CrossEncoder = None
+
+try:
+    import cohere
+except ImportError:
+    cohere = None
+
+RerankDocument = Union[str, Dict[str, Any]]
+
+
+def load_cross_encoder(model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", backend: str = 'onnx',
+                       model_file: Optional[str] = None):
+    """Load a cross-encoder for CPU inference, ONNX by default.
+
+    ``model_file`` selects a quantized export inside the model repository,
+    e.g. ``onnx/model_qint8_avx512_vnni.onnx``.
+    """
+    if CrossEncoder is None:
+        raise ImportError("sentence-transformers is required for the local reranker: "
+                          "pip install 'sentence-transformers[onnx]>=3.2.0'")
+    model_kwargs = {'file_name': model_file} if model_file else None
+    return CrossEncoder(model_name, backend=backend, model_kwargs=model_kwargs)
+
+
+class RerankResult(NamedTuple):
+    """One reranked document, shaped like an entry of Cohere's ``results``."""
+    index: int
+    relevance_score: float
+
+
+def serialize_document(document: RerankDocument, rank_fields: Optional[Sequence[str]] = None) -> str:
+    """Flatten a document into the text a cross-encoder scores.
+
+    Plain strings pass through. Dicts become ``field: value`` lines for
+    ``rank_fields`` (or every field), in that order, the way Cohere's
+    rerank treats semi-structured documents; list values are joined with
+    commas and missing fields are skipped.
+    """
+    if isinstance(document, str):
+        return document
+    lines = []
+    for field in rank_fields or list(document):
+        value = document.get(field)
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ', '.join(str(item) for item in value)
+        elif isinstance(value, dict):
+            value = json.dumps(value, ensure_ascii=False)
+        lines.append(f"{field}: {value}")
+    return '\n'.join(lines)
+
+
+class _PendingPairs(NamedTuple):
+    pairs: List[List[str]]
+    future: Future
+
+
+class PairBatcher:
+    """Coalesce ``predict`` calls from concurrent queries into one model call.
+
+    Wraps a cross-encoder with the same ``predict(pairs, batch_size)``
+    interface. A dispatcher thread collects pending requests until it holds
+    ``max_batch_pairs`` pairs or ``max_wait`` seconds have passed since the
+    first arrived, runs a single ``predict`` over all of them and hands each
+    caller its own slice of the scores. The model is only ever called from
+    the dispatcher thread, so CPU backends are never oversubscribed.
+    """
+
+    def __init__(self, model: Any, max_batch_pairs: int = 256, max_wait: float = 0.002, batch_size: int = 64):
+        self.model = model
+        self.max_batch_pairs = max_batch_pairs
+        self.max_wait = max_wait
+        self.batch_size = batch_size
+        self.calls = 0
+        self.requests = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._dispatcher = None
+        self._start_lock = threading.Lock()
+
+    def predict(self, pairs: Sequence[Sequence[str]], batch_size: int = None, **kwargs) -> List[float]:
+        if not pairs:
+            return []
+        if self._dispatcher is None:
+            with self._start_lock:
+                if self._dispatcher is None:
+                    self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+                    self._dispatcher.start()
+        future: Future = Future()
+        self._queue.put(_PendingPairs([list(pair) for pair in pairs], future))
+        return future.result()
+
+    def _collect(self) -> List[_PendingPairs]:
+        batch = [self._queue.get()]
+        size = len(batch[0].pairs)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_pairs:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(pending)
+            size += len(pending.pairs)
+        return batch
+
+    def _dispatch(self) -> None:
+        while True:
+            batch = self._collect()
+            pairs = [pair for pending in batch for pair in pending.pairs]
+            try:
+                scores = self.model.predict(pairs, batch_size=self.batch_size)
+            except Exception as e:
+                logging.error(f"Batched rerank scoring failed: {str(e)}")
+                for pending in batch:
+                    pending.future.set_exception(e)
+                continue
+            self.calls += 1
+            self.requests += len(batch)
+            start = 0
+            for pending in batch:
+                pending.future.set_result([float(score) for score in scores[start:start + len(pending.pairs)]])
+                start += len(pending.pairs)
+
+    def stats(self) -> Dict[str, float]:
+        return {'model_calls': self.calls, 'requests': self.requests,
+                'requests_per_call': self.requests / self.calls if self.calls else 0.0}
+
+
+class LocalReranker:
+    """Cross-encoder reranking on the local CPU, a drop-in for ``co.rerank``.
+
+    Loads the sentence-transformers cross-encoder with load_cross_encoder
+    unless a ``model`` is given. Pairs from concurrent queries are
+    batched through a PairBatcher, and scores are cached per
+    (query, serialized document) by a CrossEncoderReranker, so a document
+    re-sent with the next query is not scored again.
+    """
+
+    def __init__(self, model: Any = None, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 backend: str = 'onnx', model_file: Optional[str] = None, max_batch_pairs: int = 256,
+                 max_wait: float = 0.002, cache_size: int = 50_000):
+        if model is None:
+            model = load_cross_encoder(model_name, backend, model_file)
+        self.batcher = PairBatcher(model, max_batch_pairs=max_batch_pairs, max_wait=max_wait)
+        self.scorer = CrossEncoderReranker(model=self.batcher, cache_size=cache_size)
+
+    def rerank(self, query: str, documents: Sequence[RerankDocument], top_n: Optional[int] = None,
+               rank_fields: Optional[Sequence[str]] = None) -> List[RerankResult]:
+        """Return the best ``top_n`` documents (all by default), highest score first."""
+        texts = [serialize_document(document, rank_fields) for document in documents]
+        scores, _ = self.scorer.score(query, texts)
+        ranked = sorted(range(len(texts)), key=lambda i: scores[i], reverse=True)[:top_n]
+        return [RerankResult(i, scores[i]) for i in ranked]
+
+    def stats(self) -> Dict[str, float]:
+        return {**self.batcher.stats(), 'cached_pairs': len(self.scorer._cache)}
+
+
+class CohereReranker:
+    """The hosted Cohere rerank endpoint behind the same ``rerank`` interface."""
+
+    def __init__(self, client: Any = None, api_key: Optional[str] = None, model: str = 'rerank-english-v3.0'):
+        if client is None:
+            if cohere is None:
+                raise ImportError("cohere is required for the Cohere reranker: pip install 'cohere>=5.0.0'")
+            client = cohere.Client(api_key)
+        self.client = client
+        self.model = model
+
+    def rerank(self, query: str, documents: Sequence[RerankDocument], top_n: Optional[int] = None,
+               rank_fields: Optional[Sequence[str]] = None) -> List[RerankResult]:
+        kwargs = {'rank_fields': list(rank_fields)} if rank_fields else {}
+        response = self.client.rerank(query=query, documents=list(documents), top_n=top_n or len(documents),
+                                      model=self.model, **kwargs)
+        return [RerankResult(result.index, result.relevance_score) for result in response.results]
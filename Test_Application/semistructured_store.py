@@ -0,0 +1,132 @@
+import re
+from collections import defaultdict
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import faiss
+import numpy as np
+
+from ann_index import search_parameters
+from reranker import RerankDocument, RerankResult, serialize_document
+
+_EMAIL_DOMAIN = re.compile(r'@([\w.-]+)')
+# Sentinel for documents without a parseable date, outside every date range
+_NO_DATE = np.iinfo(np.int64).min
+
+
+def sender_domain(sender: str) -> Optional[str]:
+    """The lower-cased domain of a ``Name <user@domain>`` or bare address."""
+    match = _EMAIL_DOMAIN.search(sender or '')
+    return match.group(1).lower().rstrip('.') if match else None
+
+
+def _day(value: Any) -> int:
+    """Days since 0001-01-01 for a ``date`` or ISO date string."""
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+
+class SemiStructuredStore:
+    """Indexed semi-structured documents (emails, tickets) for filtered reranking.
+
+    Each document is serialized once over ``rank_fields`` with the same
+    serialize_document a reranker uses, and its serialized text is embedded
+    once into a normalized inner-product FAISS index. A query then narrows
+    the collection with structured filters (date range and sender domain,
+    read from ``date_field`` and ``sender_field``), takes the best
+    ``candidates`` by dense similarity among what is left, and sends only
+    those pre-serialized texts to the reranker.
+    """
+
+    def __init__(self, embeddings, rank_fields: Sequence[str], reranker=None,
+                 date_field: str = 'date', sender_field: str = 'from'):
+        self.embeddings = embeddings
+        self.rank_fields = list(rank_fields)
+        self.reranker = reranker
+        self.date_field = date_field
+        self.sender_field = sender_field
+        self.documents: List[RerankDocument] = []
+        self.texts: List[str] = []
+        self.index = None
+        self._days = np.zeros(0, dtype=np.int64)
+        self._domains: Dict[str, Set[int]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add(self, documents: Sequence[RerankDocument], batch_size: int = 256) -> None:
+        """Serialize, embed and index documents; positions continue from the current size."""
+        start = len(self.documents)
+        texts = [serialize_document(document, self.rank_fields) for document in documents]
+        for offset in range(0, len(texts), batch_size):
+            vectors = np.array(self.embeddings.embed_documents(texts[offset:offset + batch_size]), dtype='float32')
+            faiss.normalize_L2(vectors)
+            if self.index is None:
+                self.index = faiss.IndexFlatIP(vectors.shape[1])
+            self.index.add(vectors)
+
+        days = []
+        for position, document in enumerate(documents, start):
+            value = document.get(self.date_field) if isinstance(document, dict) else None
+            try:
+                days.append(_day(value) if value else _NO_DATE)
+            except ValueError:
+                days.append(_NO_DATE)
+            domain = sender_domain(document.get(self.sender_field, '')) if isinstance(document, dict) else None
+            if domain:
+                self._domains[domain].add(position)
+        self._days = np.concatenate([self._days, np.array(days, dtype=np.int64)])
+        self.documents.extend(documents)
+        self.texts.extend(texts)
+
+    def filter_positions(self, date_from=None, date_to=None, sender_domain: Optional[str] = None) -> Optional[np.ndarray]:
+        """Sorted positions passing every given filter; None when no filter is set.
+
+        ``sender_domain`` also matches subdomains, so ``microsoft.com``
+        includes ``mail.microsoft.com``. Date bounds are inclusive.
+        """
+        if date_from is None and date_to is None and not sender_domain:
+            return None
+        mask = np.ones(len(self.documents), dtype=bool)
+        if date_from is not None or date_to is not None:
+            mask &= self._days != _NO_DATE
+            if date_from is not None:
+                mask &= self._days >= _day(date_from)
+            if date_to is not None:
+                mask &= self._days <= _day(date_to)
+        if sender_domain:
+            wanted = sender_domain.lower().lstrip('@')
+            senders = np.zeros(len(self.documents), dtype=bool)
+            for domain, positions in self._domains.items():
+                if domain == wanted or domain.endswith('.' + wanted):
+                    senders[list(positions)] = True
+            mask &= senders
+        return np.flatnonzero(mask).astype('int64')
+
+    def search(self, query: str, candidates: int = 20, **filters) -> List[Tuple[int, float]]:
+        """(position, cosine similarity) of the best ``candidates`` documents passing the filters."""
+        positions = self.filter_positions(**filters)
+        limit = len(self.documents) if positions is None else len(positions)
+        k = min(candidates, limit)
+        if k == 0 or self.index is None:
+            return []
+        vector = np.array([self.embeddings.embed_query(query)], dtype='float32')
+        faiss.normalize_L2(vector)
+        if positions is None or len(positions) == len(self.documents):
+            scores, found = self.index.search(vector, k)
+        else:
+            params = search_parameters(self.index, faiss.IDSelectorBatch(positions))
+            scores, found = self.index.search(vector, k, params=params)
+        return [(int(position), float(score)) for position, score in zip(found[0], scores[0]) if position != -1]
+
+    def rerank(self, query: str, top_n: int = 3, candidates: int = 20, **filters) -> List[RerankResult]:
+        """Filter, shortlist by dense similarity, then rerank; result indexes are store positions.
+
+        Without a reranker the dense similarities are returned as scores.
+        """
+        shortlist = self.search(query, candidates, **filters)
+        if self.reranker is None:
+            return [RerankResult(position, score) for position, score in shortlist[:top_n]]
+        results = self.reranker.rerank(query, [self.texts[position] for position, _ in shortlist], top_n=top_n)
+        return [RerankResult(shortlist[result.index][0], result.relevance_score) for result in results]
@@ -0,0 +1,86 @@
+import asyncio
+import contextvars
+import json
+import queue
+import threading
+from typing import Any, AsyncIterator, Iterator, Sequence, Tuple
+
+from langchain.callbacks.base import AsyncCallbackHandler, BaseCallbackHandler
+
+# Marks the end of a token stream in the queues below
+_DONE = object()
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class TokenQueueHandler(BaseCallbackHandler):
+    """Push every new LLM token onto a thread-safe queue."""
+
+    def __init__(self, tokens: queue.Queue):
+        self.tokens = tokens
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.tokens.put(token)
+
+
+class AsyncTokenQueueHandler(AsyncCallbackHandler):
+    """Push every new LLM token onto an asyncio queue."""
+
+    def __init__(self, tokens: asyncio.Queue):
+        self.tokens = tokens
+
+    async def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        await self.tokens.put(token)
+
+
+def stream_chain(chain, question: str, callbacks: Sequence = ()) -> Iterator[Tuple[str, str]]:
+    """Run a chain in a background thread and yield ('token', text) as the LLM emits them.
+
+    The last item is ('answer', full_answer). Errors raised by the chain are
+    re-raised in the caller once the tokens produced so far have been yielded.
+    ``callbacks`` are passed to the chain alongside the token handler. The
+    chain runs in a copy of the caller's context, so spans recorded by the
+    retrievers land on the caller's request trace.
+    """
+    tokens: queue.Queue = queue.Queue()
+    outcome = {}
+
+    def run():
+        try:
+            outcome['answer'] = chain.run(question, callbacks=[TokenQueueHandler(tokens), *callbacks])
+        except Exception as e:
+            outcome['error'] = e
+        finally:
+            tokens.put(_DONE)
+
+    threading.Thread(target=contextvars.copy_context().run, args=(run,), daemon=True).start()
+    while True:
+        token = tokens.get()
+        if token is _DONE:
+            break
+        yield 'token', token
+
+    if 'error' in outcome:
+        raise outcome['error']
+    yield 'answer', outcome['answer']
+
+
+async def astream_chain(chain, question: str, callbacks: Sequence = ()) -> AsyncIterator[Tuple[str, str]]:
+    """Async counterpart of stream_chain, running the chain on the event loop."""
+    tokens: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(chain.arun(question, callbacks=[AsyncTokenQueueHandler(tokens), *callbacks]))
+    task.add_done_callback(lambda _: tokens.put_nowait(_DONE))
+    try:
+        while True:
+            token = await tokens.get()
+            if token is _DONE:
+                break
+            yield 'token', token
+        yield 'answer', task.result()
+    finally:
+        # The client went away mid-stream; stop paying for the completion
+        if not task.done():
+            task.cancel()
@@ -0,0 +1,24 @@
+import os
+
+import numpy as np
+
+from ann_index import IndexSpec, load_or_train
+
+
+def test_trained_quantizer_is_saved_once_and_reused(tmp_path):
+    spec = IndexSpec('ivf_flat', nlist=4, nprobe=2)
+    sample = np.random.default_rng(0).random((spec.min_training_points(), 16), dtype='float32')
+
+    trained = load_or_train(spec, 16, sample, str(tmp_path))
+    reused = load_or_train(spec, 16, sample[:1], str(tmp_path))
+
+    # Only the final files remain, no temporary files from the atomic writes
+    assert sorted(os.listdir(tmp_path)) == ['trained.faiss', 'trained.json']
+    assert reused.is_trained and reused.nprobe == 2
+    assert np.array_equal(trained.quantizer.reconstruct_n(0, 4), reused.quantizer.reconstruct_n(0, 4))
+
+
+def test_key_for_stays_flat_below_the_training_threshold():
+    spec = IndexSpec('ivf_flat', nlist=4)
+    assert spec.key_for(spec.min_training_points() - 1) == 'Flat'
+    assert spec.key_for(spec.min_training_points()) == 'IVF4,Flat'
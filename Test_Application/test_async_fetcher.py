@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from async_fetcher import AsyncFetcher
+from bench_scrape import UNDECODABLE_PAGE, comparable, fixture_site, make_scraper, serve
+from page_cache import UNCHANGED, PageCache
+
+PAGE = b'<html><body><div class="question">If x = 2, what is x?</div></body></html>'
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/page':
+            if self.headers.get('If-None-Match') == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.respond(PAGE, etag='"v1"')
+        elif self.path == '/broken':
+            self.respond(UNDECODABLE_PAGE)
+        else:
+            self.send_error(404)
+
+    def respond(self, body, etag=None):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def port():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+
+
+def fetch_all(urls, **kwargs):
+    async def run():
+        async with AsyncFetcher(**kwargs) as fetcher:
+            return await fetcher.fetch_all(urls)
+    return asyncio.run(run())
+
+
+def test_page_is_unchanged_only_after_commit(port, tmp_path):
+    cache = PageCache(str(tmp_path / 'pages.sqlite'))
+    url = f'http://127.0.0.1:{port}/page'
+
+    assert fetch_all([url], rate_per_host=100, page_cache=cache)[url] == PAGE.decode()
+    # Not committed yet, so the page is fetched and parsed again
+    assert fetch_all([url], rate_per_host=100, page_cache=cache)[url] == PAGE.decode()
+
+    cache.commit()
+    assert fetch_all([url], rate_per_host=100, page_cache=cache)[url] is UNCHANGED
+    assert cache.metrics['not_modified'] == 1
+
+
+def test_undecodable_page_is_dropped_alone(port):
+    broken, page = f'http://127.0.0.1:{port}/broken', f'http://127.0.0.1:{port}/page'
+
+    bodies = fetch_all([broken, page], rate_per_host=100)
+
+    assert bodies == {broken: None, page: PAGE.decode()}
+
+
+def test_rate_limit_is_per_host(port):
+    one_host = [f'http://127.0.0.1:{port}/page'] * 3
+    two_hosts = one_host + [f'http://localhost:{port}/page'] * 3
+
+    start = time.perf_counter()
+    fetch_all(one_host, rate_per_host=5)
+    one_host_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    fetch_all(two_hosts, rate_per_host=5)
+    two_host_seconds = time.perf_counter() - start
+
+    assert one_host_seconds >= 0.38  # Two waits of 1/5 s after the first request
+    assert two_host_seconds < one_host_seconds + 0.2  # The second host is not queued behind the first
+
+
+def test_async_scrape_matches_sync_scrape():
+    server = serve(fixture_site(None, 2))
+    port = server.server_address[1]
+    try:
+        sync_scraper = make_scraper(port, 100)
+        sync_scraper.parse_workers = 0
+        sync_scraper.scrape_all_sources(pages=2)
+
+        async_scraper = make_scraper(port, 100)
+        async_scraper.parse_workers = 0
+        asyncio.run(async_scraper.scrape_all_sources_async(pages=2))
+    finally:
+        server.shutdown()
+
+    assert async_scraper.questions
+    assert comparable(async_scraper.questions) == comparable(sync_scraper.questions)
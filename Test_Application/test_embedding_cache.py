@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from embedding_cache import CachedEmbeddings
+from fake_models import HashEmbeddings
+
+
+@pytest.fixture
+def model():
+    return HashEmbeddings(size=32)
+
+
+def cached(model, tmp_path, **kwargs):
+    return CachedEmbeddings(model, str(tmp_path / 'embeddings.sqlite'), **kwargs)
+
+
+def test_unchanged_texts_are_not_embedded_again(model, tmp_path):
+    cache = cached(model, tmp_path)
+    first = cache.embed_documents(["a ratio question", "a geometry question"])
+    calls = model.calls
+
+    again = cache.embed_documents(["a geometry question", "a ratio question", "a new question"])
+
+    # Vectors are stored as float32
+    assert again[0] == pytest.approx(first[1]) and again[1] == pytest.approx(first[0])
+    assert model.calls == calls + 1  # Only "a new question" was sent
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (2, 3, 3)
+
+
+def test_cache_persists_across_instances(model, tmp_path):
+    vectors = cached(model, tmp_path).embed_documents(["a ratio question"])
+    reopened = cached(model, tmp_path)
+    calls = model.calls
+
+    assert reopened.embed_documents(["a ratio question"])[0] == pytest.approx(vectors[0])
+    assert model.calls == calls
+    assert len(reopened) == 1
+
+
+def test_least_recently_used_entries_are_evicted(model, tmp_path):
+    cache = cached(model, tmp_path, max_entries=2)
+    cache.embed_documents(["first", "second"])
+    cache.embed_documents(["first"])  # Now more recently used than "second"
+    cache.embed_documents(["third"])
+    calls = model.calls
+
+    assert len(cache) == 2
+    cache.embed_documents(["first", "third"])
+    assert model.calls == calls
+    cache.embed_documents(["second"])
+    assert model.calls == calls + 1
+
+
+def test_counters_are_exact_under_concurrency(model, tmp_path):
+    cache = cached(model, tmp_path)
+    texts = [f"question {i}" for i in range(20)]
+
+    def embed():
+        for _ in range(10):
+            cache.embed_documents(texts)
+
+    threads = [threading.Thread(target=embed) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert stats['hits'] + stats['misses'] == 8 * 10 * len(texts)
+    # Threads racing on the same misses insert each row once, so the running count stays exact
+    assert stats['entries'] == len(texts) == len(cache)
+
+
+def test_recent_queries_are_served_from_memory(model, tmp_path):
+    cache = cached(model, tmp_path, query_cache_size=2)
+    vector = cache.embed_query("what is x?")
+    calls = model.calls
+
+    assert cache.embed_query("what is x?") == vector
+    assert cache.embed_queries(["what is x?", "what is y?"])[0] == vector
+    assert model.calls == calls + 1
+    stats = cache.stats()
+    assert (stats['query_hits'], stats['query_misses']) == (2, 2)
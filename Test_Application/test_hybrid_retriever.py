@@ -0,0 +1,59 @@
+import numpy as np
+from langchain.vectorstores import FAISS
+
+from fake_models import HashEmbeddings, OverlapCrossEncoder
+from hybrid_retriever import BM25Index, HybridRetriever
+from two_stage_retriever import CrossEncoderReranker, TwoStageRetriever
+
+TEXTS = ["ratio of boys to girls in a class", "ratio of red to blue marbles", "area of a circle",
+         "probability of drawing a red marble", "ratio of cats to dogs"]
+
+
+def hybrid(**kwargs):
+    store = FAISS.from_texts(TEXTS, HashEmbeddings())
+    return HybridRetriever(vectorstore=store, bm25_index=BM25Index.from_vectorstore(store), **kwargs)
+
+
+def test_bm25_search_only_scores_allowed_positions():
+    index = BM25Index()
+    index.extend(0, TEXTS)
+    assert {position for position, _ in index.search("ratio", k=5)} == {0, 1, 4}
+    assert [position for position, _ in index.search("ratio", k=5, allowed={1, 2})] == [1]
+
+
+def test_allowed_positions_restrict_both_sides():
+    retriever = hybrid(allowed_positions=np.array([1, 3], dtype='int64'))
+    docs = retriever.invoke("ratio of red marbles")
+    assert sorted(doc.page_content for doc in docs) == sorted([TEXTS[1], TEXTS[3]])
+
+
+def test_no_allowed_positions_returns_nothing():
+    assert hybrid(allowed_positions=np.array([], dtype='int64')).invoke("ratio") == []
+
+
+def test_filtered_chain_keeps_hybrid_retrieval(rag):
+    with rag.index_holder.lease() as snapshot:
+        retriever = rag.get_qa_chain({'difficulty': 'Hard'}, snapshot).retriever
+        docs = retriever.invoke("what is the scaled ratio?")
+
+    assert isinstance(retriever, HybridRetriever)
+    assert docs and all(doc.metadata['difficulty'] == 'Hard' for doc in docs)
+
+
+def test_filtered_chain_keeps_reranking(rag, monkeypatch):
+    monkeypatch.setattr(rag, 'reranker', CrossEncoderReranker(model=OverlapCrossEncoder()))
+    filters = {'sub_category': 'Data Sufficiency', 'difficulty': 'Easy'}
+
+    with rag.index_holder.lease() as snapshot:
+        retriever = rag.get_qa_chain(filters, snapshot).retriever
+        docs = retriever.invoke("what is the scaled ratio?")
+
+    assert isinstance(retriever, TwoStageRetriever)
+    assert docs and all(doc.metadata['sub_category'] == 'Data Sufficiency' and doc.metadata['difficulty'] == 'Easy'
+                        for doc in docs)
+    assert all('rerank_score' in doc.metadata for doc in docs)
+
+
+def test_filtered_ask(rag):
+    response = rag.app.test_client().post('/ask', json={'question': "what is the ratio?", 'difficulty': 'Medium'})
+    assert response.json['status'] == 'success'
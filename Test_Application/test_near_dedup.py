@@ -0,0 +1,39 @@
+import pytest
+
+from near_dedup import NearDuplicateIndex, normalize_for_dedup
+
+
+def make_question(text, options=('A', 'B')):
+    return {'question_text': text, 'options': list(options)}
+
+
+@pytest.mark.parametrize('text', [
+    "If x = 2, what is x? Source: GMAT Prep",
+    "If x = 2, what is x?Source: OG 2020",
+    "If x = 2, what is x. - Source: Manhattan",
+    "If x = 2, what is x? (Source: https://gmatclub.com/forum/x-1.html)",
+    "If x = 2, what is x? src: gmatclub.com/forum/x-1.html",
+    "If x = 2, what is x?\nSource: GMAT Prep",
+])
+def test_trailing_attribution_is_stripped(text):
+    assert normalize_for_dedup(text) == 'if x 2 what is x'
+
+
+def test_inline_source_is_kept():
+    text = "A survey is the data source: which of the following must be true?"
+    assert normalize_for_dedup(text) == 'a survey is the data source which of the following must be true'
+
+
+def test_questions_differing_after_inline_source_are_both_kept():
+    stem = "A company picks one data source: "
+    questions = [
+        make_question(stem + "if the census covers 40% of towns and the survey 70%, how many towns are covered twice?"),
+        make_question(stem + "which assumption about the sampling error does the manager's argument rely on?"),
+    ]
+    assert NearDuplicateIndex(threshold=0.8).add_questions(questions) == questions
+
+
+def test_question_repeated_with_attribution_is_dropped():
+    original = make_question("If 3x + 5 = 20 and y = 2x, what is the value of y?")
+    attributed = make_question("If 3x + 5 = 20 and y = 2x, what is the value of y? Source: GMAT Prep")
+    assert NearDuplicateIndex(threshold=0.8).add_questions([original, attributed]) == [original]
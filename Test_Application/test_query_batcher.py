@@ -0,0 +1,21 @@
+from langchain.vectorstores import FAISS
+
+from embedding_cache import CachedEmbeddings
+from fake_models import HashEmbeddings
+from query_batcher import QueryBatcher
+
+TEXTS = ["ratio of boys to girls", "probability of two heads", "area of a circle", "critical reasoning assumption"]
+
+
+def test_repeated_query_is_embedded_once(tmp_path):
+    model = HashEmbeddings()
+    store = FAISS.from_texts(TEXTS, CachedEmbeddings(model, str(tmp_path / 'cache.sqlite')))
+    batcher = QueryBatcher(max_wait=0.0)
+    calls = model.calls
+
+    first = batcher.search(store, "area of a circle", k=1)
+    second = batcher.search(store, "area of a circle", k=1)
+
+    assert first[0].page_content == second[0].page_content == "area of a circle"
+    assert model.calls == calls + 1
+    assert store.embeddings.stats()['query_hits'] == 1
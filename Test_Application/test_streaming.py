@@ -0,0 +1,129 @@
+import asyncio
+import json
+
+from starlette.testclient import TestClient
+
+from conftest import ANSWER
+from tracing import metrics
+
+
+def parse_sse(body):
+    """(event, data) pairs from a server-sent event stream."""
+    events = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines())
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def stream(rag, question, **headers):
+    response = rag.app.test_client().post('/ask/stream', json={'question': question}, headers=headers)
+    return parse_sse(response.get_data(as_text=True))
+
+
+def test_stream_trace_includes_retrieval_spans(rag):
+    events = stream(rag, "what is the scaled ratio of 4 to 11?", **{rag.DEBUG_TIMING_HEADER: '1'})
+
+    event, answer = events[-1]
+    assert event == 'answer' and answer['status'] == 'success'
+    stages = {span['stage'] for span in answer['timing']['spans']}
+    # Recorded on the chain's thread, so only present if it runs in the request's context
+    assert {'query_embedding', 'faiss_search', 'bm25_search'} <= stages
+    assert {'answer_cache_lookup', 'qa_chain', 'first_token', 'retrieval', 'llm_completion'} <= stages
+    assert answer['answer'] == ANSWER
+
+
+class FailingChain:
+    """Streams one token, then fails like an LLM call that errors mid-answer."""
+
+    def run(self, question, callbacks=()):
+        callbacks[0].on_llm_new_token("partial ")
+        raise RuntimeError("LLM connection reset")
+
+    async def arun(self, question, callbacks=()):
+        await callbacks[0].on_llm_new_token("partial ")
+        raise RuntimeError("LLM connection reset")
+
+
+def stream_requests(status):
+    """How many /ask/stream requests the metrics counted with this status."""
+    return sum(value for labels, value in metrics.requests._values.items()
+               if ('endpoint', '/ask/stream') in labels and ('status', status) in labels)
+
+
+def assert_tokens_then_answer(events):
+    *tokens, (event, answer) = events
+    assert tokens and all(name == 'token' for name, _ in tokens)
+    assert event == 'answer'
+    assert answer == {'answer': ANSWER, 'status': 'success'}
+    assert ''.join(data for _, data in tokens) == ANSWER
+
+
+def test_stream_emits_tokens_then_answer(rag):
+    assert_tokens_then_answer(stream(rag, "what is 5 to 12 scaled by 3?"))
+
+
+def test_cached_answer_is_sent_without_tokens(rag):
+    question = "what is 6 to 13 scaled by 4?"
+    stream(rag, question)
+    assert stream(rag, question) == [('answer', {'answer': ANSWER, 'status': 'success'})]
+
+
+def test_stream_error_ends_with_error_event(rag, monkeypatch):
+    monkeypatch.setattr(rag, 'get_qa_chain', lambda filters, snapshot: FailingChain())
+    errors = stream_requests('error')
+
+    events = stream(rag, "what is 7 to 14 scaled by 2?")
+
+    assert events[0] == ('token', "partial ")
+    event, answer = events[-1]
+    assert event == 'answer' and answer['status'] == 'error'
+    assert stream_requests('error') == errors + 1
+
+
+def test_client_disconnect_cancels_the_stream(rag):
+    question = "what is 8 to 15 scaled by 5?"
+    cancelled = stream_requests('cancelled')
+    response = rag.app.test_client().post('/ask/stream', json={'question': question}, buffered=False)
+
+    first = next(iter(response.response))
+    response.close()
+
+    assert first.decode('utf-8').startswith('event: token')
+    assert stream_requests('cancelled') == cancelled + 1
+    # The partial answer was never cached, so the next request streams it again
+    assert_tokens_then_answer(stream(rag, question))
+
+
+def test_asgi_stream_emits_tokens_then_answer(rag):
+    import asgi_app
+
+    response = TestClient(asgi_app.app).post('/ask/stream', json={'question': "what is 9 to 16 scaled by 6?"})
+
+    assert response.headers['content-type'].startswith('text/event-stream')
+    assert_tokens_then_answer(parse_sse(response.text))
+
+
+def test_asgi_stream_error_ends_with_error_event(rag, monkeypatch):
+    import asgi_app
+    monkeypatch.setattr(rag, 'get_qa_chain', lambda filters, snapshot: FailingChain())
+
+    response = TestClient(asgi_app.app).post('/ask/stream', json={'question': "what is 10 to 17 scaled by 2?"})
+
+    events = parse_sse(response.text)
+    assert events[0] == ('token', "partial ")
+    assert events[-1][0] == 'answer' and events[-1][1]['status'] == 'error'
+
+
+def test_asgi_client_disconnect_cancels_the_stream(rag):
+    import asgi_app
+    cancelled = stream_requests('cancelled')
+
+    async def first_event_then_close():
+        events = asgi_app.answer_events("what is 11 to 18 scaled by 3?", {})
+        first = await events.__anext__()
+        await events.aclose()
+        return first
+
+    assert asyncio.run(first_event_then_close()).startswith('event: token')
+    assert stream_requests('cancelled') == cancelled + 1
@@ -0,0 +1,302 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain.callbacks.base import BaseCallbackHandler
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Seconds; fine-grained at the low end for embedding and search, up to slow completions
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CHUNK_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar('current_trace', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition format."""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_labels(key + (('le', _number(bound)),))} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_labels(key + (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.name}_sum{_labels(key)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(key)} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter in the Prometheus exposition format."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Tuple, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] += amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(key)} {_number(value)}")
+        return lines
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs: Tuple) -> str:
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Metrics:
+    """Process-wide request metrics, rendered for a Prometheus scrape of /metrics."""
+
+    def __init__(self):
+        self.request_seconds = Histogram('rag_request_duration_seconds', "End-to-end latency of answered questions.")
+        self.stage_seconds = Histogram('rag_stage_duration_seconds', "Latency of each pipeline stage.")
+        self.retrieved_chunks = Histogram('rag_retrieved_chunks', "Chunks retrieved per question.", CHUNK_BUCKETS)
+        self.requests = Counter('rag_requests_total', "Answered questions by endpoint, cache status and outcome.")
+        self.tokens = Counter('rag_llm_tokens_total', "LLM tokens by kind (prompt or completion).")
+
+    def record(self, trace: 'RequestTrace') -> None:
+        labels = {'endpoint': trace.endpoint, 'cache': trace.cache_status}
+        self.request_seconds.observe(trace.duration, **labels)
+        self.requests.inc(endpoint=trace.endpoint, cache=trace.cache_status, status=trace.status)
+        for name, _, duration in trace.spans:
+            self.stage_seconds.observe(duration, stage=name)
+        if trace.chunks is not None:
+            self.retrieved_chunks.observe(trace.chunks)
+        for kind in ('prompt', 'completion'):
+            if trace.tokens.get(kind):
+                self.tokens.inc(trace.tokens[kind], kind=kind)
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.request_seconds, self.stage_seconds, self.retrieved_chunks, self.requests, self.tokens):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+class RequestTrace:
+    """Spans and counters collected while answering one question."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.spans: List[Tuple[str, float, float]] = []  # (stage, start offset, duration) in seconds
+        self.cache_status = 'miss'
+        self.status = 'success'
+        self.chunks: Optional[int] = None
+        self.tokens: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, start: float, duration: float) -> None:
+        """Record a stage that began at ``start`` (a perf_counter value) and took ``duration`` seconds."""
+        with self._lock:
+            self.spans.append((name, start - self.started, duration))
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter() - start)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The per-request breakdown returned to clients that ask for it."""
+        return {
+            'total_ms': round((self.duration or time.perf_counter() - self.started) * 1000, 3),
+            'cache': self.cache_status,
+            'retrieved_chunks': self.chunks,
+            'tokens': dict(self.tokens),
+            'spans': [{'stage': name, 'start_ms': round(offset * 1000, 3), 'duration_ms': round(duration * 1000, 3)}
+                      for name, offset, duration in sorted(self.spans, key=lambda span: span[1])],
+        }
+
+
+@contextmanager
+def trace_request(endpoint: str):
+    """Trace one request: spans recorded in this context land on it, and it is counted in ``metrics``."""
+    trace = RequestTrace(endpoint)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    except Exception:
+        trace.status = 'error'
+        raise
+    except BaseException:
+        # A streamed response closed before it finished, e.g. the client disconnected
+        trace.status = 'cancelled'
+        raise
+    finally:
+        try:
+            _current_trace.reset(token)
+        except ValueError:
+            pass  # A stream closed from another context, such as an async generator finalizer
+        trace.duration = time.perf_counter() - trace.started
+        metrics.record(trace)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str):
+    """Time a stage of the current request; a no-op outside a traced request."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(name):
+        yield
+
+
+def record_span(name: str, start: float, duration: float) -> None:
+    """Record a stage timed elsewhere (e.g. on a batching thread) on the current request."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(name, start, duration)
+
+
+@lru_cache(maxsize=None)
+def _encoding(name: str):
+    """The tiktoken encoding, or None when tiktoken is missing or cannot fetch it (e.g. offline)."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logging.warning(f"Token counts will be estimated, tiktoken encoding unavailable: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, encoding: str = 'cl100k_base') -> int:
+    """Token count with tiktoken when available, otherwise a four-characters-per-token estimate."""
+    encoder = _encoding(encoding)
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return max(1, len(text) // 4)
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """Turns LangChain callbacks from a RetrievalQA run into spans on a RequestTrace.
+
+    Records the retriever call with its chunk count, the "stuff" documents
+    chain, the LLM completion with its token usage, and prompt assembly as
+    the part of the stuff chain spent outside the LLM. Streaming completions
+    report no usage, so their tokens are counted from the prompt text and
+    the streamed tokens instead.
+    """
+
+    run_inline = True  # Keep span bookkeeping on the calling thread in async chains too
+
+    def __init__(self, trace: RequestTrace):
+        self.trace = trace
+        self._starts: Dict[Any, Tuple[str, float]] = {}
+        self._prompt_tokens = 0
+        self._streamed_tokens = 0
+        self._llm_seconds = 0.0  # LLM time so far, subtracted from the stuff chain's span
+        self._llm_seconds_at_start = 0.0
+
+    def _begin(self, run_id, name: str) -> None:
+        self._starts[run_id] = (name, time.perf_counter())
+
+    def _end(self, run_id) -> float:
+        if run_id not in self._starts:
+            return 0.0
+        name, start = self._starts.pop(run_id)
+        duration = time.perf_counter() - start
+        self.trace.add_span(name, start, duration)
+        return duration
+
+    def on_chain_start(self, serialized, inputs, *, run_id, **kwargs) -> None:
+        name = (serialized or {}).get('id', ['chain'])[-1]
+        if name == 'StuffDocumentsChain':
+            self._begin(run_id, 'stuff_chain')
+            self._llm_seconds_at_start = self._llm_seconds
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs) -> None:
+        if run_id in self._starts:
+            start = self._starts[run_id][1]
+            duration = self._end(run_id)
+            assembly = duration - (self._llm_seconds - self._llm_seconds_at_start)
+            self.trace.add_span('prompt_assembly', start, max(assembly, 0.0))
+
+    def on_chain_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id)
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs) -> None:
+        self._begin(run_id, 'retrieval')
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs) -> None:
+        self._end(run_id)
+        self.trace.chunks = len(documents)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        self._begin(run_id, 'llm_completion')
+        self._prompt_tokens += sum(count_tokens(prompt) for prompt in prompts)
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        self._streamed_tokens += 1
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        self._llm_seconds += self._end(run_id)
+        usage = (response.llm_output or {}).get('token_usage') or {}
+        if usage.get('prompt_tokens') is not None:
+            self.trace.tokens = {'prompt': usage['prompt_tokens'], 'completion': usage.get('completion_tokens', 0),
+                                 'source': 'api'}
+        else:
+            self.trace.tokens = {'prompt': self._prompt_tokens, 'completion': self._streamed_tokens,
+                                 'source': 'counted'}
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        self._llm_seconds += self._end(run_id)
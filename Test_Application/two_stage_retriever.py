@@ -0,0 +1,229 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.callbacks.manager import CallbackManagerForRetrieverRun
+from langchain.schema import BaseRetriever, Document
+
+import tracing
+
+try:
+    from sentence_transformers import CrossEncoder, SentenceTransformer
+except ImportError:
+    CrossEncoder = SentenceTransformer = None
+
+
+class StageTimings:
+    """Accumulates per-stage latency and pair counts for a two-stage retriever."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.first_stage_seconds = 0.0
+        self.rerank_seconds = 0.0
+        self.candidates = 0
+        self.pairs_scored = 0
+        self.pairs_cached = 0
+        self.last: Dict[str, float] = {}
+
+    def record(self, first_stage: float, rerank: float, candidates: int, scored: int, cached: int) -> None:
+        with self._lock:
+            self.queries += 1
+            self.first_stage_seconds += first_stage
+            self.rerank_seconds += rerank
+            self.candidates += candidates
+            self.pairs_scored += scored
+            self.pairs_cached += cached
+            self.last = {'first_stage_ms': first_stage * 1000, 'rerank_ms': rerank * 1000,
+                         'candidates': candidates, 'pairs_scored': scored, 'pairs_cached': cached}
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            queries = self.queries or 1
+            return {
+                'queries': self.queries,
+                'mean_first_stage_ms': self.first_stage_seconds / queries * 1000,
+                'mean_rerank_ms': self.rerank_seconds / queries * 1000,
+                'mean_candidates': self.candidates / queries,
+                'mean_pairs_scored': self.pairs_scored / queries,
+                'mean_pairs_cached': self.pairs_cached / queries,
+                'last': dict(self.last),
+            }
+
+
+class CrossEncoderReranker:
+    """Batched cross-encoder scoring with an adaptive cutoff and a pair score cache.
+
+    Candidates are scored in first-stage order, ``batch_size`` pairs per
+    ``predict`` call. After ``min_candidates`` have been scored, scoring
+    stops as soon as ``patience`` consecutive batches fail to change the
+    current top ``top_n``: candidates that far down the first-stage ranking
+    rarely make it to the top, so the remaining pairs are not worth their
+    latency. ``max_candidates`` caps the work per query outright. Scores
+    are cached per (query, document text) pair, bounded to ``cache_size``
+    entries with LRU eviction.
+    """
+
+    def __init__(self, model: Any = None, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 batch_size: int = 32, min_candidates: int = 32, max_candidates: int = 500,
+                 patience: int = 1, cache_size: int = 50_000):
+        if model is None:
+            if CrossEncoder is None:
+                raise ImportError("sentence-transformers is required for the default cross-encoder")
+            model = CrossEncoder(model_name)
+        self.model = model
+        self.batch_size = batch_size
+        self.min_candidates = min_candidates
+        self.max_candidates = max_candidates
+        self.patience = patience
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(query: str, text: str) -> str:
+        return hashlib.sha256(f"{query}\0{text}".encode('utf-8')).hexdigest()
+
+    def _cached(self, keys: Sequence[str]) -> Dict[str, float]:
+        with self._lock:
+            found = {}
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    found[key] = self._cache[key]
+            return found
+
+    def _remember(self, scores: Dict[str, float]) -> None:
+        with self._lock:
+            self._cache.update(scores)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def score(self, query: str, texts: Sequence[str]) -> Tuple[List[float], int]:
+        """Score every text against the query; returns (scores, pairs served from cache)."""
+        keys = [self._key(query, text) for text in texts]
+        cached = self._cached(keys)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            predicted = self.model.predict([[query, texts[i]] for i in missing], batch_size=self.batch_size)
+            fresh = {keys[i]: float(score) for i, score in zip(missing, predicted)}
+            self._remember(fresh)
+            cached.update(fresh)
+        return [cached[key] for key in keys], len(texts) - len(missing)
+
+    def rerank(self, query: str, texts: Sequence[str], top_n: int) -> Tuple[List[Tuple[int, float]], int, int]:
+        """Return ((index, score) for the best ``top_n`` texts, pairs scored, pairs cached)."""
+        limit = min(len(texts), self.max_candidates)
+        scored: List[Tuple[int, float]] = []
+        top: List[int] = []
+        stale_batches = 0
+        cached_total = 0
+        start = 0
+        while start < limit:
+            end = min(start + self.batch_size, limit)
+            scores, cached = self.score(query, texts[start:end])
+            cached_total += cached
+            scored.extend(zip(range(start, end), scores))
+            start = end
+
+            ranked = sorted(scored, key=lambda item: item[1], reverse=True)[:top_n]
+            new_top = [index for index, _ in ranked]
+            stale_batches = stale_batches + 1 if new_top == top else 0
+            top = new_top
+            if start >= self.min_candidates and stale_batches >= self.patience:
+                break
+
+        ranked = sorted(scored, key=lambda item: item[1], reverse=True)[:top_n]
+        return ranked, len(scored), cached_total
+
+
+class BiEncoderRetriever(BaseRetriever):
+    """First stage from the notebook: cosine top-k over precomputed sentence embeddings."""
+
+    model: Any
+    sentences: List[str]
+    embeddings: Any
+    k: int = 100
+
+    @classmethod
+    def from_sentences(cls, sentences: List[str], model: Any = None,
+                       model_name: str = "all-MiniLM-L6-v2", **kwargs) -> 'BiEncoderRetriever':
+        if model is None:
+            if SentenceTransformer is None:
+                raise ImportError("sentence-transformers is required for the default bi-encoder")
+            model = SentenceTransformer(model_name)
+        embeddings = np.asarray(model.encode(sentences), dtype='float32')
+        return cls(model=model, sentences=sentences, embeddings=embeddings, **kwargs)
+
+    @classmethod
+    def from_corpus_store(cls, store, model: Any = None, max_corpus_size: Optional[int] = None,
+                          model_name: str = "all-MiniLM-L6-v2", **kwargs) -> 'BiEncoderRetriever':
+        """Search the first ``max_corpus_size`` rows of a CorpusEmbeddingStore without loading the rest."""
+        if model is None:
+            if SentenceTransformer is None:
+                raise ImportError("sentence-transformers is required for the default bi-encoder")
+            model = SentenceTransformer(model_name)
+        sentences, embeddings = store.load(max_corpus_size)
+        return cls(model=model, sentences=sentences, embeddings=embeddings, **kwargs)
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        query_vector = np.asarray(self.model.encode([query]), dtype='float32')[0]
+        query_vector /= np.linalg.norm(query_vector) or 1.0
+        # Score in chunks so float16 or memory-mapped matrices are never converted all at once
+        similarities = np.empty(len(self.embeddings), dtype='float32')
+        for start in range(0, len(similarities), 65536):
+            chunk = np.asarray(self.embeddings[start:start + 65536], dtype='float32')
+            norms = np.linalg.norm(chunk, axis=1)
+            similarities[start:start + len(chunk)] = chunk @ query_vector / np.where(norms == 0, 1.0, norms)
+        k = min(self.k, len(similarities))
+        if k == 0:
+            return []
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [Document(page_content=self.sentences[i], metadata={'corpus_id': int(i), 'score': float(similarities[i])})
+                for i in top]
+
+
+class TwoStageRetriever(BaseRetriever):
+    """A cheap first-stage retriever followed by cross-encoder reranking.
+
+    ``first_stage`` is any retriever returning candidates in its own rank
+    order (the app's hybrid retriever, or BiEncoderRetriever for the
+    notebook corpus); set its ``k`` to the number of candidates wanted. The
+    reranker rescores them and the best ``k`` are returned, each with its
+    ``rerank_score`` in the metadata. Per-stage timings accumulate in
+    ``timings``.
+    """
+
+    first_stage: BaseRetriever
+    reranker: CrossEncoderReranker
+    k: int = 4
+    timings: StageTimings = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.timings is None:
+            self.timings = StageTimings()
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        start = time.perf_counter()
+        candidates = self.first_stage.invoke(query, config={'callbacks': run_manager.get_child()})
+        first_stage = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ranked, scored, cached = self.reranker.rerank(query, [doc.page_content for doc in candidates], self.k)
+        rerank = time.perf_counter() - start
+        tracing.record_span('rerank', start, rerank)
+
+        self.timings.record(first_stage, rerank, len(candidates), scored, cached)
+        logging.debug(f"Two-stage retrieval: {len(candidates)} candidates in {first_stage * 1000:.1f} ms, "
+                      f"{scored} reranked ({cached} cached) in {rerank * 1000:.1f} ms")
+        return [Document(page_content=candidates[i].page_content,
+                         metadata={**candidates[i].metadata, 'rerank_score': score})
+                for i, score in ranked]
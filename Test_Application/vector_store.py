@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Optional
+
+import faiss
+from langchain.docstore import InMemoryDocstore
+from langchain.schema import Document
+from langchain.vectorstores import FAISS
+
+# Bump whenever the way questions are turned into documents changes,
+# so indexes built by older code are rebuilt instead of reused.
+INDEX_FORMAT_VERSION = 2
+
+INDEX_FILE = 'index.faiss'
+DOCSTORE_FILE = 'docstore.json'
+FINGERPRINT_FILE = 'fingerprint.json'
+
+
+def compute_fingerprint(source_revision: str, model_name: str, index_key: str = 'Flat') -> str:
+    """Fingerprint the question store revision together with the embedding model and index layout."""
+    digest = hashlib.sha256()
+    digest.update(f"v{INDEX_FORMAT_VERSION}\0{model_name}\0{index_key}\0{source_revision}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def write_atomically(path: str, write) -> None:
+    """Write to a uniquely named temporary file and rename it over ``path``.
+
+    The name is unique per call, so processes saving at the same time never
+    write into each other's half-finished file.
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix='.tmp',
+                                    dir=os.path.dirname(path) or '.')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_vectorstore(store: FAISS, folder: str, fingerprint: str) -> None:
+    """Persist a FAISS vector store together with the fingerprint of its source data.
+
+    The fingerprint is written last, so a save interrupted halfway never
+    matches on the next load and simply triggers a rebuild.
+    """
+    os.makedirs(folder, exist_ok=True)
+    fingerprint_path = os.path.join(folder, FINGERPRINT_FILE)
+    if os.path.exists(fingerprint_path):
+        os.remove(fingerprint_path)
+
+    write_atomically(
+        os.path.join(folder, INDEX_FILE),
+        lambda path: faiss.write_index(store.index, path)
+    )
+
+    docs = []
+    for position in range(store.index.ntotal):
+        doc_id = store.index_to_docstore_id[position]
+        doc = store.docstore.search(doc_id)
+        docs.append({'id': doc_id, 'page_content': doc.page_content, 'metadata': doc.metadata})
+
+    def write_docs(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(docs, f, ensure_ascii=False)
+
+    def write_fingerprint(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': fingerprint, 'version': INDEX_FORMAT_VERSION}, f)
+
+    write_atomically(os.path.join(folder, DOCSTORE_FILE), write_docs)
+    write_atomically(fingerprint_path, write_fingerprint)
+    logging.info(f"Saved vector store with {len(docs)} vectors to {folder}")
+
+
+def read_index(path: str, mmap: bool = True):
+    """Read a FAISS index, memory-mapping its vectors read-only when the index type allows.
+
+    IO_FLAG_MMAP_IFC maps the flat codes (of IndexFlat, HNSW storage and
+    IVF lists) straight from the file, so they are backed by the OS page
+    cache and every worker process that maps the same file shares one
+    physical copy. Plain IO_FLAG_MMAP would still read flat codes into
+    private memory.
+    """
+    if mmap:
+        try:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError as e:
+            logging.warning(f"Memory-mapping {path} failed, reading it into memory: {str(e)}")
+    return faiss.read_index(path)
+
+
+def saved_fingerprint(folder: str) -> Optional[str]:
+    """The fingerprint of the vector store saved in ``folder``, or None if there is none."""
+    try:
+        with open(os.path.join(folder, FINGERPRINT_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f).get('fingerprint')
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def load_vectorstore(folder: str, embeddings, fingerprint: str, mmap: bool = True) -> Optional[FAISS]:
+    """Load a persisted vector store if it was built from the same source data.
+
+    Returns None when nothing is saved or the saved fingerprint is stale.
+    """
+    saved = saved_fingerprint(folder)
+    if saved is None:
+        return None
+
+    if saved != fingerprint:
+        logging.info(f"Vector store in {folder} is stale, it will be rebuilt")
+        return None
+
+    index = read_index(os.path.join(folder, INDEX_FILE), mmap=mmap)
+    with open(os.path.join(folder, DOCSTORE_FILE), 'r', encoding='utf-8') as f:
+        docs = json.load(f)
+
+    docstore = InMemoryDocstore({
+        d['id']: Document(page_content=d['page_content'], metadata=d['metadata']) for d in docs
+    })
+    index_to_docstore_id = {position: d['id'] for position, d in enumerate(docs)}
+    logging.info(f"Loaded vector store with {index.ntotal} vectors from {folder}")
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+
+def clone_vectorstore(store: FAISS) -> FAISS:
+    """Copy a FAISS vector store so it can be extended without touching the live one.
+
+    This also turns a read-only memory-mapped index into a writable in-memory one:
+    clone_index would keep viewing the mapped codes, so the index is copied
+    through a serialize/deserialize round trip instead.
+    """
+    return FAISS(
+        store.embedding_function,
+        faiss.deserialize_index(faiss.serialize_index(store.index)),
+        InMemoryDocstore(dict(store.docstore._dict)),
+        dict(store.index_to_docstore_id)
+    )
+
+
+def empty_vectorstore(embeddings) -> FAISS:
+    """Create an empty FAISS vector store with the embedder's dimensionality."""
+    dimension = len(embeddings.embed_query("dimension probe"))
+    return FAISS(embeddings, faiss.IndexFlatL2(dimension), InMemoryDocstore({}), {})